@@ -6,7 +6,11 @@ import sys
 from typing import Dict, List, Optional
 from datetime import date, timedelta
 
+from back import http_scheduler, sharding
+
 # ---------- HTTP layer ----------
+# Requests go through http_scheduler so all ACA fetchers share one per-host
+# budget and back off together on 429/503.
 try:
     import cloudscraper  # type: ignore
     _SCRAPER = cloudscraper.create_scraper(
@@ -14,8 +18,9 @@ try:
     )
     def http_get(url: str):
         # Referer + desktop UA often helps
-        return _SCRAPER.get(
+        return http_scheduler.get(
             url,
+            session=_SCRAPER,
             timeout=25,
             headers={
                 "Referer": "https://www.google.com/",
@@ -40,7 +45,7 @@ except Exception:
         "Accept-Language": "en-US,en;q=0.9",
     })
     def http_get(url: str):
-        return _SCRAPER.get(url, timeout=25)
+        return http_scheduler.get(url, session=_SCRAPER, timeout=25)
 
 from bs4 import BeautifulSoup  # type: ignore
 
@@ -212,18 +217,24 @@ def fetch_aca_country(url: str, fallback_region: str) -> List[Dict]:
             r["region"] = fallback_region
     return rows
 
-def fetch_aca_all() -> List[Dict]:
+def fetch_aca_all(force: bool = False, run=None) -> List[Dict]:
+    """Plain-HTTP ACA fetcher (registry name "aca_http"); `run` is a registry.SourceRun."""
     pages = [
         ("https://www.allconferencealert.com/singapore/energy-conference.html", "Singapore"),
         ("https://www.allconferencealert.com/malaysia/energy-conference.html", "Malaysia"),
         ("https://www.allconferencealert.com/philippines/energy-conference.html", "Philippines"),
     ]
     total: List[Dict] = []
-    for url, region in pages:
+    for url, region in sharding.select(pages, keys=lambda p: (p[0], p[1])):
+        if run is not None and run.expired():
+            _debug(f"Time budget spent, stopping before {url}")
+            break
         try:
             got = fetch_aca_country(url, region)
             _debug(f"Parsed {len(got)} rows from {url}")
             total.extend(got)
+            if run is not None:
+                run.changed.append(region)
         except Exception as e:
             _debug(f"Parse error on {url}: {e}")
     _debug(f"Total ACA rows: {len(total)}")
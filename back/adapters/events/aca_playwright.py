@@ -1,19 +1,27 @@
 # back/adapters/events/aca_playwright.py
 from __future__ import annotations
 
+import json
 import re
 from datetime import datetime
 from typing import Dict, List, Optional
+from urllib.parse import urljoin
 
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup  # type: ignore
 
+from back import http_scheduler, sharding, source_fingerprints
+from back.config import HTTP_MAX_RETRIES, EVENTS_SKIP_UNCHANGED, ACA_SOURCES_JSON, ACA_EXTRACT_MODE
+from .registry import SourceRun
+
 
 ACA_SOURCES = [
     ("Singapore",  "https://www.allconferencealert.com/singapore/energy-conference.html"),
     ("Malaysia",   "https://www.allconferencealert.com/malaysia/energy-conference.html"),
     ("Philippines","https://www.allconferencealert.com/philippines/energy-conference.html"),
 ]
+if ACA_SOURCES_JSON:
+    ACA_SOURCES = [(c, u) for c, u in json.loads(ACA_SOURCES_JSON)]
 
 # Accept short + long month names
 MONTHS = {
@@ -46,9 +54,10 @@ def _clean_text(s: Optional[str]) -> str:
     return re.sub(r"\s+", " ", (s or "")).strip()
 
 
-# Date formats: "20 December 2025", "13th Jan 2026"
+# Date formats: "20 December 2025", "13th Jan 2026"; case-insensitive like
+# dateRe in _SECTION_JS, so every line picked as a date there parses here
 _DATE_RE = re.compile(
-    r"(?P<d>\d{1,2})(?:ST|ND|RD|TH)?\s+(?P<mon>[A-Za-z]+)\s+(?P<y>\d{4})"
+    r"(?P<d>\d{1,2})(?:ST|ND|RD|TH)?\s+(?P<mon>[A-Za-z]+)\s+(?P<y>\d{4})", re.I
 )
 
 def _parse_full_date(text: str) -> Optional[str]:
@@ -71,7 +80,36 @@ def _parse_full_date(text: str) -> Optional[str]:
         return None
 
 
-def _extract_events_from_html(html: str, country_name: str) -> List[Dict]:
+def _row(title: Optional[str], date_line: Optional[str], loc_line: Optional[str],
+         country_name: str) -> Optional[Dict]:
+    """Normalized event row from a card's title / date / "City, Country" lines."""
+    if not (title and date_line and loc_line):
+        return None
+    starts_on = _parse_full_date(date_line)
+    if not starts_on:
+        return None
+    return {
+        "title": _clean_text(title),
+        "region": country_name,
+        "city": loc_line.split(",")[0].strip().title(),
+        "venue": None,
+        "starts_on": starts_on,
+        "ends_on": None,
+        "link": None,
+        "source": "AllConferenceAlert",
+    }
+
+
+_BASE_URL = "https://www.allconferencealert.com/"
+
+
+def _event_link(href: Optional[str], page_url: str) -> Optional[str]:
+    """A card's raw href attribute, resolved against the page it was on (both extract paths)."""
+    href = (href or "").strip()
+    return urljoin(page_url, href) if href else None
+
+
+def _extract_events_from_html(html: str, country_name: str, page_url: str = _BASE_URL) -> List[Dict]:
     """
     Parse the new ACA layout (div/card-based) into normalized event rows:
     title, region, city, venue, starts_on, ends_on, link, source
@@ -129,27 +167,9 @@ def _extract_events_from_html(html: str, country_name: str) -> List[Dict]:
                 loc_line = ln
                 break
 
-        if not (title and date_line and loc_line):
-            continue
-
-        starts_on = _parse_full_date(date_line)
-        if not starts_on:
-            continue
-
-        city = loc_line.split(",")[0].strip().title()
-
-        events.append(
-            {
-                "title": title,
-                "region": country_name,
-                "city": city,
-                "venue": None,
-                "starts_on": starts_on,
-                "ends_on": None,
-                "link": None,  # Filled in later
-                "source": "AllConferenceAlert",
-            }
-        )
+        row = _row(title, date_line, loc_line, country_name)  # link filled in later
+        if row:
+            events.append(row)
 
     # ---------------------------
     # SECOND PASS → ATTACH LINKS
@@ -179,53 +199,170 @@ def _extract_events_from_html(html: str, country_name: str) -> List[Dict]:
         if not link_el:
             continue
 
-        href = link_el.get("href", "").strip()
-        if not href:
-            continue
+        link = _event_link(link_el.get("href"), page_url)
+        if link:
+            ev["link"] = link
+
+    return events
+
+
+_PAGE_TIMEOUT_MS = 60000
+
+
+def _timeout_ms(run: SourceRun) -> int:
+    # Playwright calls give up just past the run's deadline (well inside the
+    # registry's grace), so the run stops and closes Chromium instead of
+    # being abandoned with it still open
+    return int(min(_PAGE_TIMEOUT_MS, run.time_left() * 1000 + 1000))
+
+
+def _goto(page, url: str, timeout_ms: int = _PAGE_TIMEOUT_MS):
+    """Navigate within the host's outbound budget; back off and retry on 429/503."""
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        with http_scheduler.host_slot(url):
+            resp = page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+        if resp is None or resp.status not in http_scheduler.RETRY_STATUSES or attempt >= HTTP_MAX_RETRIES:
+            return resp
+        http_scheduler.note_throttled(url, resp.headers.get("retry-after"), attempt)
+    return resp
+
+
+# Same section lookup as _extract_events_from_html, done in the page: the text
+# node with the header, 4 levels up. `text` (section text + hrefs) feeds the
+# fingerprint. `cards` holds one record per "View Event" link: the card is the
+# widest ancestor holding only that link, and its lines are matched with the
+# same rules as the HTML path (title keyword, date, "City, Country").
+_SECTION_JS = """
+([country, keywords]) => {
+  const re = new RegExp("Upcoming Energy Conferences in .*" + country, "i");
+  const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+  let el = null, n;
+  while ((n = walker.nextNode())) {
+    if (re.test(n.nodeValue)) { el = n.parentElement; break; }
+  }
+  if (!el) return {text: "", cards: []};
+  for (let i = 0; i < 4 && el.parentElement; i++) el = el.parentElement;
+  const links = Array.from(el.querySelectorAll("a[href]")).map(a => a.getAttribute("href"));
+
+  const isView = a => /view event/i.test(a.textContent || "");
+  const dateRe = /\\d{1,2}(?:st|nd|rd|th)?\\s+[A-Za-z]+\\s+\\d{4}/i;
+  const place = country.replace(/\\\\/g, "").toLowerCase();
+  const cards = [];
+  for (const a of Array.from(el.querySelectorAll("a[href]")).filter(isView)) {
+    let card = a;
+    while (card.parentElement && card.parentElement !== el &&
+           Array.from(card.parentElement.querySelectorAll("a[href]")).filter(isView).length === 1) {
+      card = card.parentElement;
+    }
+    const lines = (card.innerText || "").split("\\n").map(s => s.trim()).filter(Boolean);
+    cards.push({
+      title: lines.find(l => keywords.some(k => l.includes(k))) || null,
+      date: lines.find(l => dateRe.test(l)) || null,
+      location: lines.find(l => l.includes(",") && l.toLowerCase().includes(place)) || null,
+      href: a.getAttribute("href"),
+    });
+  }
+  return {text: el.innerText + "\\n" + links.join("\\n"), cards};
+}
+"""
 
-        # Absolute URL
-        if href.startswith("/"):
-            href = "https://www.allconferencealert.com" + href
+def _read_section(page, country_name: str):
+    """(fingerprint, cards) of the events section; ("", None) when the page can't be queried."""
+    try:
+        res = page.evaluate(_SECTION_JS, [re.escape(country_name), list(_TITLE_KEYWORDS)])
+    except Exception as e:
+        print(f"[ACA] Section query failed for {country_name}: {e}")
+        return "", None
+    text = res.get("text") or ""
+    return (source_fingerprints.fingerprint(text) if text else ""), res.get("cards") or []
 
-        ev["link"] = href
 
+def _events_from_cards(cards: List[Dict], country_name: str, page_url: str = _BASE_URL) -> List[Dict]:
+    """Rows from the card records returned by _SECTION_JS (same shape as the HTML path)."""
+    events: List[Dict] = []
+    for c in cards:
+        row = _row(c.get("title"), c.get("date"), c.get("location"), country_name)
+        if row:
+            row["link"] = _event_link(c.get("href"), page_url)
+            events.append(row)
     return events
 
 
-def fetch_allconferencealert_events() -> List[Dict]:
+def _fetch_source(page, country_name: str, url: str, run: SourceRun) -> List[Dict]:
+    """Rows of one country page; [] when its section is unchanged (listed in run.unchanged)."""
+    print(f"[ACA] GET {url}")
+    _goto(page, url, _timeout_ms(run))
+    fp, cards = _read_section(page, country_name)
+    if EVENTS_SKIP_UNCHANGED and not run.force and source_fingerprints.matches(url, fp):
+        print(f"[ACA] {country_name} unchanged since last run, skipping")
+        run.unchanged.append(country_name)
+        return []
+    rows = _events_from_cards(cards, country_name, url) if ACA_EXTRACT_MODE == "dom" and cards else []
+    if rows:
+        print(f"[ACA] Extracted {len(rows)} rows in page for {country_name} ({len(cards)} cards)")
+    else:
+        # fallback: serialize the DOM and parse it here
+        html = page.content()
+        print(f"[ACA] HTML size: {len(html)}")
+        rows = _extract_events_from_html(html, country_name, url)
+        print(f"[ACA] Parsed {len(rows)} rows for {country_name}")
+    run.changed.append(country_name)
+    if fp:
+        run.fingerprints[url] = fp
+    return rows
+
+
+def fetch_allconferencealert_events(force: bool = False, run: Optional[SourceRun] = None) -> List[Dict]:
     """
     Fetch + parse new ACA layout using Playwright (render JS),
     returning normalized rows ready for Supabase.
+
+    With ACA_EXTRACT_MODE=dom the cards are read by a DOM query in the page
+    and only their records come back; when that yields nothing (or mode=html)
+    the rendered HTML is parsed with BeautifulSoup as before.
+
+    Sources whose events section has the same fingerprint as on the last
+    stored run are skipped (unless force=True) and listed in run.unchanged;
+    the others' fingerprints go to run.fingerprints, saved by the ingest
+    once their rows are stored. Stops between sources when run's budget is
+    spent; page calls time out at the deadline, so a slow page stops the run
+    there too and Chromium is closed before returning.
     """
+    run = run or SourceRun("aca_playwright", force)
     out: List[Dict] = []
+    sources = sharding.select(ACA_SOURCES, keys=lambda s: (s[1], s[0]))
+    if not sources:
+        print("[ACA] No sources on this shard")
+        return out
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/118.0.0.0 Safari/537.36"
+        try:
+            context = browser.new_context(
+                user_agent=(
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/118.0.0.0 Safari/537.36"
+                )
             )
-        )
-
-        for country_name, url in ACA_SOURCES:
-            page = context.new_page()
-            print(f"[ACA] GET {url}")
-
-            page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            html = page.content()
-
-            print(f"[ACA] HTML size: {len(html)}")
-
-            rows = _extract_events_from_html(html, country_name)
-            print(f"[ACA] Parsed {len(rows)} rows for {country_name}")
-
-            out.extend(rows)
-            page.close()
-
-        context.close()
-        browser.close()
+            for country_name, url in sources:
+                if run.expired():
+                    print(f"[ACA] Time budget spent, stopping before {country_name}")
+                    break
+                context.set_default_timeout(_timeout_ms(run))
+                page = context.new_page()
+                try:
+                    out.extend(_fetch_source(page, country_name, url, run))
+                except Exception:
+                    if not run.expired():
+                        raise
+                    print(f"[ACA] Time budget spent during {country_name}, stopping")
+                    break
+                finally:
+                    page.close()
+            context.close()
+        finally:
+            browser.close()
 
     print(f"[ACA] Total parsed events: {len(out)}")
     return out
@@ -1,10 +1,10 @@
 # back/adapters/events/normalize.py
 from __future__ import annotations
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import re
 from datetime import datetime
 
-__all__ = ["parse_date_range", "normalize_location"]
+__all__ = ["parse_date_range", "normalize_location", "normalize_event", "event_key", "dedupe_events"]
 
 ASEAN_CANON = {
     "singapore": "Singapore",
@@ -101,3 +101,65 @@ def normalize_location(location_raw: str) -> Dict[str, Optional[str]]:
         city = region
 
     return {"city": city, "region": region}
+
+_ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+def _clean(s: Optional[str]) -> Optional[str]:
+    s = re.sub(r"\s+", " ", s or "").strip()
+    return s or None
+
+def normalize_event(row: Dict, default_source: str = "") -> Optional[Dict]:
+    """
+    One shape for rows from any adapter:
+      title, region, city, venue, starts_on, ends_on, link, source
+    Dates may come as ISO (starts_on/ends_on) or raw text (date_raw, see
+    parse_date_range); location as region/city or raw text (location_raw,
+    see normalize_location). Regions are mapped to ASEAN canon.
+    Returns None for rows without a title or a start date.
+    """
+    title = _clean(row.get("title"))
+    starts_on, ends_on = row.get("starts_on"), row.get("ends_on")
+    if not (starts_on and _ISO_RE.match(str(starts_on))) and row.get("date_raw"):
+        starts_on, ends_on = parse_date_range(row["date_raw"])
+    if not title or not starts_on or not _ISO_RE.match(str(starts_on)):
+        return None
+
+    city, region = _clean(row.get("city")), _clean(row.get("region"))
+    if row.get("location_raw") and not (city and region):
+        loc = normalize_location(row["location_raw"])
+        city, region = city or loc["city"], region or loc["region"]
+    if region:
+        region = ASEAN_CANON.get(region.lower(), region)
+
+    return {
+        "title": title,
+        "region": region,
+        "city": city,
+        "venue": _clean(row.get("venue")),
+        "starts_on": str(starts_on),
+        "ends_on": str(ends_on) if ends_on and _ISO_RE.match(str(ends_on)) else None,
+        "link": _clean(row.get("link")),
+        "source": _clean(row.get("source")) or default_source or None,
+    }
+
+def event_key(row: Dict) -> Tuple[str, str, str]:
+    """(title, region, starts_on), case-insensitive: the identity dedupe_events merges on."""
+    return ((row.get("title") or "").lower(), (row.get("region") or "").lower(), row.get("starts_on") or "")
+
+def dedupe_events(rows: List[Dict]) -> List[Dict]:
+    """
+    Merge rows that describe the same event (title + region + starts_on,
+    case-insensitive, like the events.dedupe_key) across adapters; the
+    first row wins and missing fields are filled from later ones.
+    """
+    merged: Dict[Tuple[str, str, str], Dict] = {}
+    for r in rows:
+        k = event_key(r)
+        have = merged.get(k)
+        if have is None:
+            merged[k] = dict(r)
+            continue
+        for field, val in r.items():
+            if val and not have.get(field):
+                have[field] = val
+    return list(merged.values())
@@ -0,0 +1,152 @@
+# back/adapters/events/registry.py
+"""
+Event-source adapter registry.
+
+Each source is registered with the dotted path of its fetch function
+(imported only when the source runs, so Playwright/bs4 stay out of API
+startup) and a time budget. `run_sources()` runs every enabled source in
+its own thread:
+
+  * the fetch function gets a SourceRun; it should check `run.expired()`
+    between pages and return what it has when the budget is spent
+  * a source that overruns its budget anyway is abandoned (its rows are
+    dropped) so it never holds up the others, and `run.cancelled` is set:
+    expired() turns True, and an adapter holding a browser should not block
+    past `run.time_left()` so it notices, closes it and returns
+  * errors are caught per source and reported in its stats
+
+Raw rows from every source then go through one normalize + dedupe stage
+(normalize.normalize_event / dedupe_events) in events_ingest.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from back.config import EVENTS_ADAPTERS, EVENTS_ADAPTER_BUDGET_S, EVENTS_ADAPTER_BUDGETS
+
+__all__ = ["SourceRun", "register", "SOURCES", "enabled_sources", "run_sources"]
+
+# grace after a budget before an adapter that ignores its deadline is abandoned
+_GRACE_S = 15
+
+
+class SourceRun:
+    """What one adapter run is allowed to do, and what it reports back."""
+
+    def __init__(self, name: str, force: bool = False, budget_s: Optional[float] = None):
+        self.name = name
+        self.force = force
+        self.budget_s = budget_s
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.deadline = self.started + budget_s if budget_s else float("inf")
+        self.deadline_hit = False                # expired() said stop: the rows are incomplete
+        self.cancelled = threading.Event()       # set when run_sources abandons the run
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+        self.fingerprints: Dict[str, str] = {}   # source key -> fingerprint, saved after upsert
+
+    def expired(self) -> bool:
+        if self.cancelled.is_set() or time.monotonic() >= self.deadline:
+            self.deadline_hit = True
+        return self.deadline_hit
+
+    def time_left(self) -> float:
+        """Seconds until the deadline (inf without a budget)."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def stats(self) -> Dict:
+        return {"changed": self.changed, "unchanged": self.unchanged}
+
+
+def _parse_budgets(spec: str) -> Dict[str, float]:
+    # "aca_playwright=300,aca_http=60" -> {name: seconds}
+    out = {}
+    for part in (spec or "").split(","):
+        name, _, val = part.partition("=")
+        try:
+            out[name.strip()] = float(val)
+        except ValueError:
+            continue
+    return out
+
+
+_BUDGETS = _parse_budgets(EVENTS_ADAPTER_BUDGETS)
+
+# name -> {"fetch": "module:function", "label": shown in stats/source}
+SOURCES: Dict[str, Dict] = {}
+
+
+def register(name: str, fetch: str, label: str = "") -> None:
+    """Register an event source; `fetch` is "module:function" taking (force=..., run=...)."""
+    SOURCES[name] = {"fetch": fetch, "label": label or name}
+
+
+register("aca_playwright", "back.adapters.events.aca_playwright:fetch_allconferencealert_events",
+         label="AllConferenceAlert")
+register("aca_http", "back.adapters.events.aca:fetch_aca_all", label="AllConferenceAlert")
+
+
+def enabled_sources() -> List[str]:
+    names = [n for n in EVENTS_ADAPTERS if n in SOURCES]
+    for n in EVENTS_ADAPTERS:
+        if n not in SOURCES:
+            print(f"[EVENTS] Unknown adapter in EVENTS_ADAPTERS: {n}")
+    return names
+
+
+def _resolve(spec: str) -> Callable:
+    module, _, fn = spec.partition(":")
+    return getattr(importlib.import_module(module), fn)
+
+
+def _run_one(name: str, run: SourceRun) -> List[Dict]:
+    try:
+        fetch = _resolve(SOURCES[name]["fetch"])
+        return fetch(force=run.force, run=run) or []
+    finally:
+        run.finished = time.monotonic()
+
+
+def run_sources(names: Optional[List[str]] = None, force: bool = False) -> Dict[str, Dict]:
+    """
+    Run the given (default: enabled) sources concurrently. Returns
+    {name: {"rows", "status", "seconds", "run"}}; rows are raw, not yet
+    normalized. status is "ok", "partial" (it stopped early because
+    run.expired() said so), "timeout" (abandoned) or "error: ...".
+    """
+    names = enabled_sources() if names is None else names
+    if not names:
+        return {}
+    runs = {n: SourceRun(n, force, _BUDGETS.get(n, EVENTS_ADAPTER_BUDGET_S)) for n in names}
+
+    pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="events")
+    futures = {n: pool.submit(_run_one, n, runs[n]) for n in names}
+    for n in sorted(names, key=lambda n: runs[n].deadline):
+        wait([futures[n]], timeout=max(0.0, runs[n].deadline + _GRACE_S - time.monotonic()))
+    pool.shutdown(wait=False)   # don't wait for abandoned adapters
+    for n in names:
+        if not futures[n].done():
+            runs[n].cancelled.set()
+
+    results: Dict[str, Dict] = {}
+    for n in names:
+        fut, run = futures[n], runs[n]
+        res = {"rows": [], "status": "ok", "run": run,
+               "seconds": round((run.finished or time.monotonic()) - run.started, 2)}
+        if not fut.done():
+            res["status"] = "timeout"
+            print(f"[EVENTS] {n} exceeded its {run.budget_s:g}s budget, results dropped")
+        elif fut.exception() is not None:
+            res["status"] = f"error: {fut.exception()}"
+            print(f"[EVENTS] {n} failed: {fut.exception()}")
+        else:
+            res["rows"] = fut.result()
+            if run.deadline_hit:
+                res["status"] = "partial"
+        results[n] = res
+    return results
@@ -1,16 +1,26 @@
 # back/adapters/rss_adapter.py
 import re
 import logging
+import threading
+import multiprocessing
 import feedparser
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
 from urllib.parse import urlparse, urlunparse
 from dateutil import parser as dtparser
 
 # ✅ relative import from back.config
 from ..config import (
-    RSS_FEEDS, RSS_ENABLED, RSS_MAX_ITEMS,
+    RSS_FEEDS, RSS_ENABLED, RSS_MAX_ITEMS, RSS_FETCH_WORKERS, RSS_TIMEOUT,
+    RSS_STREAM_PARSE, RSS_STREAM_STALE_RUN, RSS_PARSE_PROCESSES,
     TITLE_KEYWORDS_ANY, TITLE_KEYWORDS_ALL,
+    URL_RESOLVE_ENABLED,
 )
+from ..url_resolver import resolve_links, is_google_news
+from .. import feed_health, feed_stream, http_scheduler, sharding
+from ..article import Article
 
 UA = {"User-Agent": "Mozilla/5.0 (ENGIE-NewsBot/1.0)"}
 
@@ -24,18 +34,12 @@ def _canonical_url(u: str) -> str:
     except Exception:
         return u or ""
 
-def _source_from_url(u: str) -> str:
+def source_from_url(u: str) -> str:
     try:
         return urlparse(u).netloc or ""
     except Exception:
         return ""
 
-def _is_gnews(u: str) -> bool:
-    try:
-        return urlparse(u).netloc.endswith("news.google.com")
-    except Exception:
-        return False
-
 def _gnews_source_name(entry, fallback: str) -> str:
     try:
         src = getattr(entry, "source", None) or getattr(entry, "source_detail", None)
@@ -57,19 +61,22 @@ def _gnews_source_name(entry, fallback: str) -> str:
         pass
     return fallback
 
-def _to_iso(dt_value) -> str:
+def _to_datetime(dt_value) -> datetime:
+    """struct_time / date string → aware UTC datetime (seconds precision); now() if unparseable."""
     try:
         if hasattr(dt_value, "tm_year"):
-            d = datetime(*dt_value[:6], tzinfo=timezone.utc)
-            return d.replace(microsecond=0).isoformat()
+            return datetime(*dt_value[:6], tzinfo=timezone.utc)
         if isinstance(dt_value, str) and dt_value.strip():
             d = dtparser.parse(dt_value)
             if not d.tzinfo:
                 d = d.replace(tzinfo=timezone.utc)
-            return d.astimezone(timezone.utc).replace(microsecond=0).isoformat()
+            return d.astimezone(timezone.utc).replace(microsecond=0)
     except Exception:
         pass
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+def _to_iso(dt_value) -> str:
+    return _to_datetime(dt_value).isoformat()
 
 # ---------------------------------------------------------------------
 # Title keyword gate (existing behavior)
@@ -172,90 +179,254 @@ def _infer_region(source: str, link: str) -> str:
     primary = _pick_primary_region(_infer_regions_title_first("", source, link))
     return primary
 
+def _count_new_entries(entries, prev_newest: str):
+    """How many entries are newer than the newest one seen last time, and the new newest."""
+    newest, new = prev_newest, 0
+    for e in entries:
+        parsed = getattr(e, "published_parsed", None)
+        if not parsed:
+            continue
+        ts = _to_iso(parsed)
+        if ts > prev_newest:
+            new += 1
+        if ts > newest:
+            newest = ts
+    return new, newest
+
+# ---------------------------------------------------------------------
+# Google News link resolution
+# ---------------------------------------------------------------------
+def resolve_gnews_items(items: list) -> int:
+    """
+    Swap Google News redirect links for the publisher URL (in place), then
+    redo region inference so the source/link fallback sees the real domain.
+    Returns how many links changed.
+    """
+    gnews = [a.link for a in items if is_google_news(a.link)]
+    if not gnews:
+        return 0
+    resolved = resolve_links(gnews)
+    changed = 0
+    for a in items:
+        final = resolved.get(a.link)
+        if not final or final == a.link:
+            continue
+        a.link = _canonical_url(final)
+        a.regions = _infer_regions_title_first(a.title, a.source, a.link)
+        a.region = _pick_primary_region(a.regions)
+        changed += 1
+    return changed
+
+# ---------------------------------------------------------------------
+# Fetch
+# ---------------------------------------------------------------------
+def feed_url_of(src) -> str:
+    """URL of an RSS_FEEDS entry (a URL string or {"name", "url"})."""
+    return src.get("url", "") if isinstance(src, dict) else str(src)
+
+def _wanted(entry) -> bool:
+    """Would the main loop keep this entry (ignoring the date and cross-feed dedupe)?"""
+    title = (getattr(entry, "title", "") or "").strip()
+    return bool(title and getattr(entry, "link", "")) and _title_matches_and_keywords(title)[0]
+
+def _stale_run(url: str) -> int:
+    # Google News search feeds are ordered by relevance, not date: an old
+    # entry says nothing about the ones after it
+    return 0 if is_google_news(url) else RSS_STREAM_STALE_RUN
+
+def _parse_body(body: bytes, headers: dict, since: datetime = None, stale_run: int = 0):
+    """Parse a downloaded feed (in a parse process when RSS_PARSE_PROCESSES > 0)."""
+    if not RSS_STREAM_PARSE:
+        return feedparser.parse(body, response_headers=headers)
+    return feed_stream.parse_stream(
+        [body], headers, limit=RSS_MAX_ITEMS, want=_wanted, since=since, stale_run=stale_run,
+    )
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    # kept for the life of the process; spawn, since fetch threads are running
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=RSS_PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+def _parse_in_pool(body: bytes, headers: dict, since: datetime = None, stale_run: int = 0):
+    global _parse_pool
+    pool = _get_parse_pool()
+    try:
+        return pool.submit(_parse_body, body, headers, since, stale_run).result()
+    except BrokenProcessPool:
+        with _parse_pool_lock:
+            if _parse_pool is pool:
+                _parse_pool = None
+        raise
+
+def _fetch_feed(url: str, since: datetime = None):
+    """
+    Download one feed through the per-host scheduler and parse it.
+    Returns (feed, error); error is a short string when nothing usable came back.
+
+    With RSS_STREAM_PARSE the body is parsed while it downloads and the
+    download stops once RSS_MAX_ITEMS entries would be kept (or entries run
+    past `since`, except on relevance-ordered Google News feeds), instead
+    of parsing the whole document with feedparser.
+    With RSS_PARSE_PROCESSES > 0 the body is downloaded whole and parsed in
+    a process pool instead, so several feeds parse at once on separate cores.
+    """
+    in_pool = RSS_PARSE_PROCESSES > 0
+    try:
+        r = http_scheduler.get(url, headers=UA, timeout=RSS_TIMEOUT, stream=RSS_STREAM_PARSE and not in_pool)
+    except Exception as ex:
+        return None, str(ex)
+    try:
+        if r.status_code >= 400:
+            return None, f"HTTP {r.status_code}"
+        headers = {k.lower(): v for k, v in r.headers.items()}
+        headers["content-location"] = r.url
+        if in_pool:
+            return _parse_in_pool(r.content, headers, since, _stale_run(url)), None
+        if not RSS_STREAM_PARSE:
+            return feedparser.parse(r.content, response_headers=headers), None
+        stats = feed_stream.StreamStats()
+        feed = feed_stream.parse_stream(
+            r.iter_content(chunk_size=16384), headers,
+            limit=RSS_MAX_ITEMS, want=_wanted, since=since,
+            stale_run=_stale_run(url), stats=stats,
+        )
+        if stats.stopped_early:
+            print(f"[RSS] {source_from_url(url)}: stopped after {stats.entries_seen} entries "
+                  f"({stats.bytes_read // 1024} KB read)")
+        return feed, None
+    except Exception as ex:
+        return None, str(ex)
+    finally:
+        r.close()
+
+# ---------------------------------------------------------------------
+# Entry -> Article
+# ---------------------------------------------------------------------
+def entry_to_article(e, feed_url: str, label: str, since: datetime) -> Optional[Article]:
+    """
+    Article for one feed entry, or None if it fails the title-keyword gate,
+    lacks a title/link or was published before `since`.
+    """
+    title = (getattr(e, "title", "") or "").strip()
+    link = _canonical_url(getattr(e, "link", "") or "")
+    if not title or not link:
+        return None
+
+    # Title-keyword gate (existing behavior)
+    keep, matched_keywords = _title_matches_and_keywords(title)
+    if not keep:
+        return None
+
+    source_label = label or source_from_url(link)
+    # If it's a GNews link or feed, repair the source label to the real publisher
+    if is_google_news(link) or is_google_news(feed_url):
+        source_label = _gnews_source_name(e, source_label)
+
+    # Published time handling
+    published = getattr(e, "published", None)
+    published_parsed = getattr(e, "published_parsed", None)
+    ts = _to_datetime(published_parsed or published)
+    if ts < since:
+        return None
+
+    # Summary: blank for GNews (to avoid duplicates/boilerplate), else trimmed
+    if is_google_news(link):
+        summary = ""
+    else:
+        summary = (getattr(e, "summary", "") or getattr(e, "description", "") or "").strip()[:300]
+
+    # --- Region inference (title-first, multiple allowed) ---
+    regions = _infer_regions_title_first(title, source_label, link)
+
+    return Article(
+        title=title,
+        link=link,
+        source=source_label,
+        published=ts,
+        summary=summary,
+        topic=matched_keywords,                 # chips
+        keywords=", ".join(matched_keywords),   # text form
+        regions=regions,                        # e.g., ["Singapore","Malaysia"]
+        region=_pick_primary_region(regions),   # primary for backward compatibility
+    )
+
 # ---------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------
-def get_news_from_rss(days_limit: int = 7) -> list:
+def iter_feed_batches(days_limit: int = 7, force: bool = False) -> Iterator[List[Article]]:
+    """
+    Fetch the feeds that are due according to feed_health's schedule
+    (all of them when force=True) and yield each feed's Article records,
+    in config order, as soon as that feed (and the ones before it) are in.
+    Links already yielded for an earlier feed are skipped.
+    """
     if not RSS_ENABLED or not RSS_FEEDS:
-        return []
+        return
 
     since = datetime.now(timezone.utc) - timedelta(days=days_limit)
-    items, seen = [], set()
-    print(f"[RSS] Loaded {len(RSS_FEEDS)} feeds from config")
+    seen = set()
+    # only this node's share of the feeds (all of them when SHARD_COUNT=1)
+    mine = sharding.select(RSS_FEEDS, keys=lambda f: (feed_url_of(f), f.get("name", "") if isinstance(f, dict) else ""))
+    feeds, skipped = feed_health.due_feeds(mine, force=force)
+    print(f"[RSS] Loaded {len(RSS_FEEDS)} feeds from config, {len(mine)} on shard "
+          f"{sharding.SHARD_INDEX}/{sharding.SHARD_COUNT} ({len(feeds)} due, {len(skipped)} not due yet)")
 
-    for src in RSS_FEEDS:
-        url = src.get("url", "") if isinstance(src, dict) else str(src)
-        label = (src.get("name") if isinstance(src, dict) else None) or _source_from_url(url)
-        if not url:
-            continue
+    feeds = [f for f in feeds if feed_url_of(f)]
 
-        feed = feedparser.parse(url, request_headers=UA)
-        if feed.bozo:
-            logging.warning("[RSS] BOZO on %s: %s", url, getattr(feed, "bozo_exception", "Unknown parse error"))
-        if not getattr(feed, "entries", []):
-            logging.warning("[RSS] EMPTY feed: %s", url)
-            continue
+    # Download in parallel; http_scheduler keeps each host within its budget.
+    # map() submits every feed up front and hands results back in config
+    # order, so results don't depend on download timing.
+    with ThreadPoolExecutor(max_workers=max(1, min(RSS_FETCH_WORKERS, len(feeds) or 1))) as pool:
+        fetched = pool.map(lambda f: _fetch_feed(feed_url_of(f), since), feeds)
 
-        kept = 0
-        for e in feed.entries:
-            if RSS_MAX_ITEMS and kept >= RSS_MAX_ITEMS:
-                break
+        for src, (feed, error) in zip(feeds, fetched):
+            url = feed_url_of(src)
+            label = (src.get("name") if isinstance(src, dict) else None) or source_from_url(url)
 
-            title = (getattr(e, "title", "") or "").strip()
-            link = _canonical_url(getattr(e, "link", "") or "")
-            if not title or not link or link in seen:
+            if error:
+                logging.warning("[RSS] FAILED %s: %s", url, error)
+                feed_health.record_fetch(url, label, error=error)
                 continue
-
-            # Title-keyword gate (existing behavior)
-            keep, matched_keywords = _title_matches_and_keywords(title)
-            if not keep:
+            if feed.bozo:
+                logging.warning("[RSS] BOZO on %s: %s", url, getattr(feed, "bozo_exception", "Unknown parse error"))
+            if not getattr(feed, "entries", []):
+                logging.warning("[RSS] EMPTY feed: %s", url)
+                feed_health.record_fetch(url, label, bozo=bool(feed.bozo), empty=True)
                 continue
 
-            source_label = label or _source_from_url(link)
-            # If it's a GNews link or feed, repair the source label to the real publisher
-            if _is_gnews(link) or _is_gnews(url):
-                source_label = _gnews_source_name(e, source_label)
-
-            # Published time handling
-            published = getattr(e, "published", None)
-            published_parsed = getattr(e, "published_parsed", None)
-            ts_str = _to_iso(published_parsed or published)
-            try:
-                ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-            except Exception:
-                ts = None
-            if ts and ts < since:
-                continue
+            new_items, newest = _count_new_entries(feed.entries, feed_health.newest_seen(url))
+
+            batch: List[Article] = []
+            for e in feed.entries:
+                if RSS_MAX_ITEMS and len(batch) >= RSS_MAX_ITEMS:
+                    break
+                a = entry_to_article(e, url, label, since)
+                if a is None or a.link in seen:
+                    continue
+                batch.append(a)
+                seen.add(a.link)
+
+            feed_health.record_fetch(url, label, new_items, newest, bozo=bool(feed.bozo))
+            print(f"[RSS] {label} -> kept {len(batch)} items (max {RSS_MAX_ITEMS}), {new_items} new since last fetch")
+            yield batch
+
+def get_news_from_rss(days_limit: int = 7, force: bool = False) -> List[Article]:
+    """All due feeds' Article records in one list (see iter_feed_batches)."""
+    items = [a for batch in iter_feed_batches(days_limit, force) for a in batch]
 
-            # Summary: blank for GNews (to avoid duplicates/boilerplate), else trimmed
-            if _is_gnews(link):
-                summary = ""
-            else:
-                summary = (getattr(e, "summary", "") or getattr(e, "description", "") or "").strip()[:300]
-
-            # --- Region inference (title-first, multiple allowed) ---
-            regions = _infer_regions_title_first(title, source_label, link)
-            primary_region = _pick_primary_region(regions)
-            regions_text = ", ".join(regions) if regions else ""
-
-            items.append({
-                "Title": title,
-                "Link": link,
-                "Source": source_label,
-                "PublishedAt": ts_str,
-                "Summary": summary,
-                "Topic": matched_keywords,                 # chips
-                "Keywords": ", ".join(matched_keywords),   # text form
-
-                # 🔹 New fields (multi-region support)
-                "Regions": regions,                        # e.g., ["Singapore","Malaysia"]
-                "Region": primary_region,                  # primary for backward compatibility
-                "RegionsText": regions_text,               # "Singapore, Malaysia" (Airtable/CSV-friendly)
-            })
-
-            seen.add(link)
-            kept += 1
-
-        print(f"[RSS] {label} -> kept {kept} items (max {RSS_MAX_ITEMS})")
+    # Canonicalization, dedupe (on_conflict=link) and region inference should
+    # all see the publisher's domain, not news.google.com
+    if URL_RESOLVE_ENABLED:
+        n = resolve_gnews_items(items)
+        if n:
+            print(f"[RSS] Resolved {n} Google News links to publisher URLs")
 
     return items
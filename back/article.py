@@ -0,0 +1,120 @@
+# back/article.py
+"""
+Article record used from RSS fetch through the Supabase write and read paths.
+
+It holds a parsed, timezone-aware `published` datetime and a canonical
+`link`, so nothing is re-parsed or re-canonicalized between stages. Dicts
+are built only at the edges: `to_row()` for the `news` table,
+`to_frontend()` for the API, and `to_dict()` for the legacy capitalized
+shape (Airtable / debug dumps).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+__all__ = ["Article", "parse_published"]
+
+
+def parse_published(value: Any) -> Optional[datetime]:
+    """ISO date/datetime string (or datetime) → aware UTC datetime; None if unparseable."""
+    if isinstance(value, datetime):
+        d = value
+    elif isinstance(value, str) and value.strip():
+        try:
+            d = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if not d.tzinfo:
+        d = d.replace(tzinfo=timezone.utc)
+    return d.astimezone(timezone.utc)
+
+
+@dataclass(slots=True)
+class Article:
+    title: str
+    link: str                                   # canonical (scheme://host/path)
+    source: str = ""
+    published: Optional[datetime] = None        # aware, UTC
+    summary: str = ""
+    topic: List[str] = field(default_factory=list)     # matched keywords (chips)
+    keywords: str = ""                          # text form of topic
+    regions: List[str] = field(default_factory=list)   # all detected regions
+    region: str = "Global"                      # primary region
+    alternates: List[Dict[str, str]] = field(default_factory=list)  # near-duplicate copies
+    id: Any = None                              # backend row id, when read back
+
+    @property
+    def published_date(self) -> str:
+        return self.published.date().isoformat() if self.published else ""
+
+    # ---------- edges ----------
+    def to_row(self) -> dict:
+        """Row for the Supabase `news` table."""
+        return {
+            "title": self.title,
+            "link": self.link,
+            "source": self.source,
+            "published": self.published_date,   # DATE (YYYY-MM-DD) or empty
+            "summary": self.summary,
+            "keywords": self.keywords or (", ".join(self.topic) if self.topic else "Energy"),
+            "region": self.region or "Global",
+            "topic": list(self.topic),          # jsonb array
+            "alternates": list(self.alternates),  # jsonb array, sql/news_alternates.sql
+        }
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Article":
+        """Article from a `news` row; missing columns keep their defaults."""
+        topic = row.get("topic")
+        alternates = row.get("alternates")
+        return cls(
+            title=row.get("title") or "",
+            link=row.get("link") or "",
+            source=row.get("source") or "",
+            published=parse_published(row.get("published")),
+            summary=row.get("summary") or "",
+            topic=topic if isinstance(topic, list) else [],
+            keywords=row.get("keywords") or "",
+            region=row.get("region") or "",
+            alternates=alternates if isinstance(alternates, list) else [],
+            id=row.get("id"),
+        )
+
+    def to_frontend(self, fields: Optional[Sequence[str]] = None) -> dict:
+        """Shape the frontend expects from /articles; `fields` keeps only those keys."""
+        out = {
+            "Title": self.title,
+            "Link": self.link,
+            "Source": self.source,
+            "PublishedAt": self.published_date,
+            "Summary": self.summary,
+            "Topic": list(self.topic),
+            "Region": self.region,
+            "Keywords": self.keywords,
+            "Bookmarked": False,
+            "id": self.link or self.id or "",
+            "Alternates": list(self.alternates),
+        }
+        if fields is None:
+            return out
+        return {k: out[k] for k in fields if k in out}
+
+    def to_dict(self) -> dict:
+        """Legacy capitalized dict (Airtable writer, rss_preview.json)."""
+        return {
+            "Title": self.title,
+            "Link": self.link,
+            "Source": self.source,
+            "PublishedAt": self.published.replace(microsecond=0).isoformat() if self.published else "",
+            "Summary": self.summary,
+            "Topic": list(self.topic),
+            "Keywords": self.keywords,
+            "Regions": list(self.regions),
+            "Region": self.region,
+            "RegionsText": ", ".join(self.regions),
+            "Alternates": list(self.alternates),
+        }
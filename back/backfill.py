@@ -0,0 +1,262 @@
+# back/backfill.py
+"""
+Historical backfill for news feeds.
+
+A refresh only sees what a feed lists right now, and a large days_limit
+only helps as far back as that goes, with everything held in one list
+until the write. This job walks each source's history instead:
+
+  * Google News search feeds: the query is re-run for date windows of
+    BACKFILL_WINDOW_DAYS (after:/before:), newest first. A window that
+    returns the feed's 100-item cap is split in half and retried, so busy
+    periods aren't cut off.
+  * other feeds: archive pages ?paged=2, 3, ... (WordPress and most feed
+    generators) until entries are older than the cutoff, a page is
+    missing/empty or repeats the previous one (no archive support), or
+    BACKFILL_MAX_PAGES pages have been read.
+
+Entries go through the same filter as a refresh
+(rss_adapter.entry_to_article) into a buffer that is written every
+BACKFILL_CHUNK articles (upsert on link, through the outbox), so memory
+stays at one page plus one chunk. Each feed's position (next window end or
+next page) is checkpointed to BACKFILL_STATE_PATH only after the items
+before it were written; a new run continues there, and a larger --days
+picks up where the previous cutoff stopped. Near-duplicate clustering runs
+per chunk. Feed scheduling state (feed_health) is not touched.
+
+    python -m back.backfill [--days N] [--feed NAME_OR_URL ...] [--restart] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import feedparser
+
+from .config import (
+    USE_SUPABASE, RSS_FEEDS, RSS_TIMEOUT, URL_RESOLVE_ENABLED,
+    NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD,
+    BACKFILL_DAYS, BACKFILL_WINDOW_DAYS, BACKFILL_MAX_PAGES, BACKFILL_CHUNK, BACKFILL_STATE_PATH,
+)
+from . import http_scheduler
+from .adapters.rss_adapter import (
+    UA, entry_to_article, feed_url_of, source_from_url, resolve_gnews_items,
+)
+from .url_resolver import is_google_news
+from .article import Article
+from .dedupe import cluster_near_duplicates
+
+__all__ = ["backfill"]
+
+GNEWS_CAP = 100  # Google News RSS never returns more entries than this
+
+
+# ---------------- State ----------------
+def _load_state() -> Dict:
+    try:
+        with open(BACKFILL_STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_state(state: Dict) -> None:
+    os.makedirs(os.path.dirname(BACKFILL_STATE_PATH) or ".", exist_ok=True)
+    tmp = f"{BACKFILL_STATE_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, BACKFILL_STATE_PATH)
+
+
+# ---------------- Sources ----------------
+def _with_params(url: str, **params) -> str:
+    u = urlparse(url)
+    q = dict(parse_qsl(u.query, keep_blank_values=True))
+    q.update({k: str(v) for k, v in params.items()})
+    return urlunparse(u._replace(query=urlencode(q)))
+
+
+def _gnews_window_url(url: str, start: date, end: date) -> str:
+    """Search feed URL restricted to [start, end) (a day of slack on each side; upserts absorb overlap)."""
+    q = dict(parse_qsl(urlparse(url).query)).get("q", "")
+    return _with_params(url, q=f"{q} after:{start - timedelta(days=1)} before:{end + timedelta(days=1)}")
+
+
+def _fetch(url: str):
+    """Parsed feed, or None when the page doesn't exist; raises on other errors."""
+    r = http_scheduler.get(url, headers=UA, timeout=RSS_TIMEOUT)
+    try:
+        if r.status_code in (404, 410):
+            return None
+        r.raise_for_status()
+        headers = {k.lower(): v for k, v in r.headers.items()}
+        headers["content-location"] = r.url
+        return feedparser.parse(r.content, response_headers=headers)
+    finally:
+        r.close()
+
+
+def _gnews_units(url: str, cutoff: date, st: Dict) -> Iterator[Tuple[list, Dict]]:
+    """(entries, position after them) per date window, newest first."""
+    end = date.fromisoformat(st["next"]) if st.get("next") else date.today() + timedelta(days=1)
+    while end > cutoff:
+        start = max(cutoff, end - timedelta(days=max(1, BACKFILL_WINDOW_DAYS)))
+        pending = [(start, end)]
+        entries: list = []
+        while pending:
+            s, e = pending.pop()
+            feed = _fetch(_gnews_window_url(url, s, e))
+            got = list(feed.entries) if feed is not None else []
+            if len(got) >= GNEWS_CAP and (e - s).days > 1:
+                mid = s + timedelta(days=(e - s).days // 2)
+                pending += [(s, mid), (mid, e)]  # older half is popped last
+                continue
+            if len(got) >= GNEWS_CAP:
+                print(f"[BACKFILL] {s}: still {len(got)} entries for one day, some may be missing")
+            entries += got
+        yield entries, {"next": start.isoformat()}
+        end = start
+
+
+def _paged_units(url: str, since: datetime, st: Dict) -> Iterator[Tuple[list, Dict]]:
+    """(entries, position after them) per archive page, until the cutoff or the last page."""
+    page = st.get("next") or 1
+    prev_links = None
+    for _ in range(BACKFILL_MAX_PAGES):
+        feed = _fetch(url if page == 1 else _with_params(url, paged=page))
+        entries = list(feed.entries) if feed is not None else []
+        links = [getattr(e, "link", "") for e in entries]
+        if not entries or links == prev_links:
+            yield [], {"next": page, "done": True}
+            return
+        prev_links = links
+        dates = [p for p in (getattr(e, "published_parsed", None) for e in entries) if p]
+        oldest = datetime(*min(dates)[:6], tzinfo=timezone.utc) if dates else None
+        page += 1
+        if oldest is not None and oldest < since:
+            yield entries, {"next": page, "done": True}
+            return
+        yield entries, {"next": page}
+    print(f"[BACKFILL] Stopped after {BACKFILL_MAX_PAGES} pages; the next run continues at page {page}")
+
+
+# ---------------- Writes ----------------
+def _write(items: List[Article], dry_run: bool) -> Tuple[int, List[str]]:
+    if URL_RESOLVE_ENABLED:
+        resolve_gnews_items(items)
+    items = list({a.link: a for a in items}.values())
+    if NEAR_DUP_ENABLED:
+        items = cluster_near_duplicates(items, threshold=NEAR_DUP_THRESHOLD)
+    if dry_run or not items:
+        return len(items), []
+    if USE_SUPABASE:
+        from .supabase_writer import write_to_supabase
+        written, errs, _sample = write_to_supabase(items)
+        for err in errs:
+            print(f"[BACKFILL] Write error (chunk kept in the outbox if retryable): {err}")
+        return written, errs
+    from .airtable_writer import write_to_airtable
+    write_to_airtable([a.to_dict() for a in items])
+    return len(items), []
+
+
+def _backfill_feed(src, cutoff: date, state: Dict, dry_run: bool) -> Dict:
+    url = feed_url_of(src)
+    label = (src.get("name") if isinstance(src, dict) else None) or source_from_url(url)
+    kind = "gnews" if is_google_news(url) else "paged"
+    st = state.get(url) or {}
+    if st.get("kind") != kind:
+        st = {}
+    if st.get("done"):
+        if date.fromisoformat(st["cutoff"]) <= cutoff:
+            print(f"[BACKFILL] {label}: already back to {st['cutoff']}")
+            return st
+        # a longer history was asked for: go on from where the last run ended
+        st["done"] = False
+        if kind == "paged":
+            st["next"] = max(1, st.get("next", 1) - 1)  # that page may hold newer-than-cutoff items too
+    st.update({"kind": kind, "cutoff": cutoff.isoformat()})
+    st.setdefault("written", 0)
+    since = datetime.combine(cutoff, dtime.min, tzinfo=timezone.utc)
+    units = _gnews_units(url, cutoff, st) if kind == "gnews" else _paged_units(url, since, st)
+
+    buf: List[Article] = []
+    scanned = 0
+    t0 = time.perf_counter()
+
+    def flush(pos: Dict) -> None:
+        nonlocal buf
+        written, errs = _write(buf, dry_run)
+        st["written"] += written
+        buf = []
+        if errs:
+            # keep the last checkpoint: the next run fetches this chunk again
+            raise RuntimeError(f"{len(errs)} write error(s), checkpoint kept at {st.get('next')}")
+        st.update(pos)
+        if not dry_run:
+            state[url] = st
+            _save_state(state)
+
+    pos: Optional[Dict] = None
+    for entries, pos in units:
+        scanned += len(entries)
+        for e in entries:
+            a = entry_to_article(e, url, label, since)
+            if a is not None:
+                buf.append(a)
+        if len(buf) >= BACKFILL_CHUNK:
+            flush(pos)
+            print(f"[BACKFILL] {label}: {scanned} entries scanned, {st['written']} written, at {st['next']}")
+    if kind == "gnews" and pos is not None:
+        pos = {**pos, "done": True}
+    flush(pos or {"done": True})
+    print(f"[BACKFILL] {label}: done={st.get('done', False)} after {time.perf_counter() - t0:.1f}s, "
+          f"{scanned} entries scanned, {st['written']} written")
+    return st
+
+
+def backfill(days: int = BACKFILL_DAYS, feeds: Optional[List[str]] = None,
+             restart: bool = False, dry_run: bool = False) -> Dict:
+    """
+    Load `days` of history for the configured feeds (or those named in
+    `feeds`, by name or URL). Returns per-feed state: written, done, next.
+    """
+    cutoff = date.today() - timedelta(days=days)
+    sources = [f for f in RSS_FEEDS if feed_url_of(f)]
+    if feeds:
+        wanted = {x.lower() for x in feeds}
+        sources = [f for f in sources
+                   if feed_url_of(f).lower() in wanted or (isinstance(f, dict) and f.get("name", "").lower() in wanted)]
+    state = {} if (restart or dry_run) else _load_state()
+    print(f"[BACKFILL] {len(sources)} feeds back to {cutoff}{' (dry run)' if dry_run else ''}")
+    out: Dict[str, Dict] = {}
+    for src in sources:
+        url = feed_url_of(src)
+        try:
+            out[url] = _backfill_feed(src, cutoff, state, dry_run)
+        except Exception as e:
+            # position is still the last flushed one; the next run retries from there
+            print(f"[BACKFILL] {url} failed: {e}")
+            out[url] = {**state.get(url, {}), "error": str(e)}
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--days", type=int, default=BACKFILL_DAYS, help="how far back to go")
+    ap.add_argument("--feed", action="append", help="only this feed (name or URL, repeatable)")
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoints")
+    ap.add_argument("--dry-run", action="store_true", help="fetch and filter, write nothing")
+    args = ap.parse_args(argv)
+    res = backfill(days=max(1, args.days), feeds=args.feed, restart=args.restart, dry_run=args.dry_run)
+    return 1 if any("error" in st for st in res.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
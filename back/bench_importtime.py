@@ -0,0 +1,129 @@
+# back/bench_importtime.py
+"""
+Cold-start import benchmark for the API process.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters (from the
+repo root) and adds up the self time of the app's own modules (`app` and
+`back.*`): module bodies, route registration, config parsing. Third-party
+imports are excluded, so framework noise doesn't leak into the number. In
+the same run it times the bare framework the app can't start without
+(`import fastapi, starlette.responses, dotenv`) as the yardstick. Exits 1
+when:
+  * a heavy adapter (playwright, bs4, lxml, feedparser, dateutil, supabase,
+    requests) is imported at startup, or
+  * the median own time is over --tolerance × the median framework time,
+    or over --budget-ms.
+
+    python -m back.bench_importtime
+    python -m back.bench_importtime --runs 9 --tolerance 0.2
+
+Medians over at least MIN_RUNS samples, from the same machine and run, so
+the check holds on any host without a stored baseline. back/tests runs it.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import List, NamedTuple, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY = ("playwright", "bs4", "lxml", "feedparser", "dateutil", "supabase", "requests")
+FRAMEWORK = ("fastapi", "starlette.responses", "dotenv")
+OWN = ("app", "back")   # top-level packages whose self time is the app's share
+MIN_RUNS = 5
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+class Sample(NamedTuple):
+    total_ms: float       # cumulative time of the requested top-level imports
+    own_ms: float         # self time of the OWN modules among them
+    heavy: List[str]      # HEAVY packages that got imported
+
+
+def parse(stderr: str, modules: Tuple[str, ...]) -> Sample:
+    """Read `-X importtime` output for an `import <modules>` run."""
+    total_us = own_us = 0
+    seen = False
+    heavy = set()
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cumulative, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        # top-level lines only; a module already pulled in by an earlier one has none
+        if name in modules and len(indent) <= 1:
+            total_us += cumulative
+            seen = True
+        top = name.split(".")[0]
+        if top in OWN:
+            own_us += self_us
+        if top in HEAVY:
+            heavy.add(top)
+    if not seen:
+        raise RuntimeError(f"no importtime line for {modules}")
+    return Sample(total_us / 1000.0, own_us / 1000.0, sorted(heavy))
+
+
+def measure_once(modules: Tuple[str, ...] = ("app",)) -> Sample:
+    """One fresh interpreter importing `modules`."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {', '.join(modules)} failed:\n{proc.stderr[-2000:]}")
+    return parse(proc.stderr, modules)
+
+
+def _samples(modules: Tuple[str, ...], runs: int) -> List[Sample]:
+    measure_once(modules)  # warms the bytecode cache
+    return [measure_once(modules) for _ in range(max(MIN_RUNS, runs))]
+
+
+def _fmt(values: List[float]) -> str:
+    return ", ".join(f"{v:.0f}" for v in values)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=MIN_RUNS, help=f"samples per measurement (at least {MIN_RUNS})")
+    ap.add_argument("--tolerance", type=float, default=0.2,
+                    help="allowed app share, as a fraction of the framework time (0.2 = +20%%)")
+    ap.add_argument("--budget-ms", type=float, default=None, help="absolute budget for the app's share")
+    args = ap.parse_args(argv)
+    if args.runs < MIN_RUNS:
+        ap.error(f"--runs must be at least {MIN_RUNS}")
+
+    framework = [s.total_ms for s in _samples(FRAMEWORK, args.runs)]
+    app = _samples(("app",), args.runs)
+    own = [s.own_ms for s in app]
+    base, own_med = statistics.median(framework), statistics.median(own)
+    heavy = sorted({h for s in app for h in s.heavy})
+    print(f"[IMPORTTIME] framework: median {base:.1f} ms (samples: {_fmt(framework)})")
+    print(f"[IMPORTTIME] app modules: median {own_med:.1f} ms (samples: {_fmt(own)}), "
+          f"import app total median {statistics.median(s.total_ms for s in app):.1f} ms")
+
+    ok = True
+    if heavy:
+        print(f"[IMPORTTIME] FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        ok = False
+
+    budget = args.budget_ms if args.budget_ms is not None else base * args.tolerance
+    if own_med > budget:
+        print(f"[IMPORTTIME] FAIL: app adds {own_med:.1f} ms > budget {budget:.1f} ms")
+        ok = False
+    else:
+        print(f"[IMPORTTIME] OK: app adds {own_med:.1f} ms <= budget {budget:.1f} ms")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 # -----------------------------
 # config.py · ENGIE News Repo (RSS-only)
 # -----------------------------
+import json
 import os
 from typing import List
 
@@ -17,6 +18,12 @@ def _get_int(name: str, default: int) -> int:
     except Exception:
         return default
 
+def _get_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "").strip())
+    except Exception:
+        return default
+
 def _csv(name: str, default: List[str]) -> List[str]:
     raw = os.getenv(name)
     if not raw:
@@ -30,13 +37,74 @@ DAYS_LIMIT = _get_int("DAYS_LIMIT", 7)   # keep only recent N days
 SUPABASE_URL         = os.getenv("SUPABASE_URL", "")          # e.g. https://xxxx.supabase.co
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")  # service_role key (backend only)
 SUPABASE_TABLE       = os.getenv("SUPABASE_TABLE", "news")
+TOMBSTONE_TABLE      = os.getenv("TOMBSTONE_TABLE", "news_tombstones")   # deleted news rows, for /articles/changes
+CHANGES_SAFETY_LAG_S = _get_int("CHANGES_SAFETY_LAG_S", 30)           # /articles/changes skips rows newer than this (may not be committed)
+ARTICLES_RPC         = os.getenv("ARTICLES_RPC", "news_frontend_latest") # frontend-shaped rows, sql/news_frontend_view.sql
+ARTICLES_PASSTHROUGH = _get_bool("ARTICLES_PASSTHROUGH", False)          # /articles = ARTICLES_RPC's bytes, not re-encoded
 USE_SUPABASE         = _get_bool("USE_SUPABASE", True)        # flip to False to fall back to Airtable
 
+# ============ Write outbox (Supabase outages) ============
+OUTBOX_ENABLED            = _get_bool("OUTBOX_ENABLED", True)
+OUTBOX_DIR                = os.getenv("OUTBOX_DIR", os.path.join(os.path.dirname(__file__), "_cache", "outbox"))
+OUTBOX_DRAIN_INTERVAL_S   = _get_int("OUTBOX_DRAIN_INTERVAL_S", 30)    # background replay period
+OUTBOX_DRAIN_ROWS         = _get_int("OUTBOX_DRAIN_ROWS", 1000)        # rows per replayed request
+OUTBOX_BREAKER_FAILURES   = _get_int("OUTBOX_BREAKER_FAILURES", 3)     # consecutive failures that open the breaker
+OUTBOX_BREAKER_COOLDOWN_S = _get_int("OUTBOX_BREAKER_COOLDOWN_S", 60)  # skip the backend this long once open
+
+# ============ Shared API snapshot (multi-worker) ============
+SNAPSHOT_ENABLED   = _get_bool("SNAPSHOT_ENABLED", True)
+SNAPSHOT_DIR       = os.getenv("SNAPSHOT_DIR", os.path.join(os.getenv("TMPDIR", "/tmp"), "engie-news-snapshot"))
+SNAPSHOT_MAX_AGE_S = _get_int("SNAPSHOT_MAX_AGE_S", 300)   # re-read Supabase after this, even without a refresh
+EVENTS_CACHE_TTL_S = _get_int("EVENTS_CACHE_TTL_S", 300)   # filtered /events results kept per worker
+
+# ============ Startup ============
+PREWARM_IMPORTS = _get_bool("PREWARM_IMPORTS", True)   # import adapters in the background after startup
+PREWARM_DELAY_S = _get_int("PREWARM_DELAY_S", 2)
+
+# ============ Sharded ingest (multi-node) ============
+SHARD_INDEX            = _get_int("SHARD_INDEX", 0)    # this node, 0..SHARD_COUNT-1
+SHARD_COUNT            = max(1, _get_int("SHARD_COUNT", 1))
+SHARD_ASSIGNMENTS_FILE = os.getenv("SHARD_ASSIGNMENTS_FILE", "")   # optional explicit pins (JSON)
+if not 0 <= SHARD_INDEX < SHARD_COUNT:
+    # a node outside the range would own no sources and silently ingest nothing
+    raise ValueError(f"SHARD_INDEX={SHARD_INDEX} must be in 0..{SHARD_COUNT - 1} (SHARD_COUNT={SHARD_COUNT})")
+
+# ============ Refresh coordination ============
+REFRESH_LOCK_DIR              = os.getenv("REFRESH_LOCK_DIR", os.path.join(os.getenv("TMPDIR", "/tmp"), "engie-news-locks"))
+REFRESH_MIN_INTERVAL_S        = _get_int("REFRESH_MIN_INTERVAL_S", 0)         # 0 = only coalesce overlapping calls
+EVENTS_REFRESH_MIN_INTERVAL_S = _get_int("EVENTS_REFRESH_MIN_INTERVAL_S", 0)
+# news refresh as fetch -> enrich -> write stages running side by side (see pipeline.py);
+# off by default: across chunks the first copy of a story wins, not the canonical one
+REFRESH_PIPELINE       = _get_bool("REFRESH_PIPELINE", False)
+REFRESH_PIPELINE_CHUNK = _get_int("REFRESH_PIPELINE_CHUNK", 50)   # articles per write
+REFRESH_PIPELINE_QUEUE = _get_int("REFRESH_PIPELINE_QUEUE", 4)    # batches buffered between stages
+
+# ============ Ingest worker process ============
+# inline (default) = refresh runs in the API process, no extra processes or memory;
+# process = in a spawned worker pool, opt-in for hosts that can spare it (see ingest_worker.py)
+INGEST_MODE             = (os.getenv("INGEST_MODE", "inline") or "inline").strip().lower()
+INGEST_WORKER_PROCESSES = max(1, _get_int("INGEST_WORKER_PROCESSES", 2))   # news and events can run side by side
+INGEST_WORKER_MAX_JOBS  = _get_int("INGEST_WORKER_MAX_JOBS", 20)    # recycle a worker after N jobs (0 = never)
+INGEST_JOB_TIMEOUT_S    = _get_int("INGEST_JOB_TIMEOUT_S", 900)     # API stops waiting after this (0 = no limit)
+
+# ============ Outbound HTTP (per-host budgets) ============
+HTTP_HOST_CONCURRENCY  = _get_int("HTTP_HOST_CONCURRENCY", 2)     # parallel requests per host
+HTTP_HOST_RATE         = _get_float("HTTP_HOST_RATE", 2.0)        # request starts per second per host
+# per-host overrides: "host=concurrency:rate,..."
+HTTP_HOST_LIMITS       = os.getenv("HTTP_HOST_LIMITS", "news.google.com=2:1,www.allconferencealert.com=1:0.5")
+HTTP_MAX_RETRIES       = _get_int("HTTP_MAX_RETRIES", 2)          # retries on 429/503
+HTTP_MAX_RETRY_AFTER_S = _get_int("HTTP_MAX_RETRY_AFTER_S", 60)   # cap on honoured Retry-After
+
 # ============ RSS ============
-RSS_ENABLED   = _get_bool("RSS_ENABLED", True)
-RSS_MAX_ITEMS = _get_int("RSS_MAX_ITEMS", 20)
+RSS_ENABLED       = _get_bool("RSS_ENABLED", True)
+RSS_MAX_ITEMS     = _get_int("RSS_MAX_ITEMS", 20)
+RSS_FETCH_WORKERS = _get_int("RSS_FETCH_WORKERS", 8)   # feeds downloaded in parallel (host budgets still apply)
+RSS_TIMEOUT       = _get_int("RSS_TIMEOUT", 20)
+RSS_STREAM_PARSE  = _get_bool("RSS_STREAM_PARSE", True)   # incremental lxml parse, stop at RSS_MAX_ITEMS
+RSS_STREAM_STALE_RUN = _get_int("RSS_STREAM_STALE_RUN", 10)  # stop after N consecutive too-old entries (0 = never)
+RSS_PARSE_PROCESSES  = _get_int("RSS_PARSE_PROCESSES", 0)     # parse downloaded feeds on N cores (0 = in the download threads)
 
-RSS_FEEDS = [
+_DEFAULT_RSS_FEEDS = [
     {"name": "Eco-Business News",   "url": "https://www.eco-business.com/feeds/news/"},
     {"name": "Asian Power (GNews)", "url": "https://news.google.com/rss/search?q=site:asian-power.com&hl=en-SG&gl=SG&ceid=SG:en"},
     {"name": "IEMOP (GNews)",       "url": "https://news.google.com/rss/search?q=site:iemop.ph&hl=en-SG&gl=SG&ceid=SG:en"},
@@ -48,6 +116,56 @@ RSS_FEEDS = [
     {"name": "Reuters (GNews)",
      "url": "https://news.google.com/rss/search?q=site:reuters.com+energy+OR+climate+OR+renewable&hl=en-SG&gl=SG&ceid=SG:en"},
 ]
+# RSS_FEEDS_JSON='[{"name": "...", "url": "..."}]' replaces the list (load tests, staging)
+RSS_FEEDS = json.loads(os.getenv("RSS_FEEDS_JSON") or "null") or _DEFAULT_RSS_FEEDS
+
+# ============ Adaptive feed polling ============
+FEED_SCHEDULING       = _get_bool("FEED_SCHEDULING", True)      # False = fetch every feed on every refresh
+FEED_STATE_PATH       = os.getenv("FEED_STATE_PATH", os.path.join(os.path.dirname(__file__), "_cache", "feed_state.json"))
+FEED_MIN_INTERVAL_MIN = _get_int("FEED_MIN_INTERVAL_MIN", 30)   # busy feeds
+FEED_MAX_INTERVAL_MIN = _get_int("FEED_MAX_INTERVAL_MIN", 720)  # quiet feeds
+FEED_MAX_BACKOFF_MIN  = _get_int("FEED_MAX_BACKOFF_MIN", 1440)  # failing feeds
+
+# ============ Google News link resolution ============
+URL_RESOLVE_ENABLED  = _get_bool("URL_RESOLVE_ENABLED", True)
+URL_RESOLVE_WORKERS  = _get_int("URL_RESOLVE_WORKERS", 4)
+URL_RESOLVE_TIMEOUT  = _get_int("URL_RESOLVE_TIMEOUT", 10)      # seconds per link
+URL_CACHE_PATH       = os.getenv("URL_CACHE_PATH", os.path.join(os.path.dirname(__file__), "_cache", "resolved_urls.json"))
+URL_CACHE_MAX        = _get_int("URL_CACHE_MAX", 20000)
+URL_MISS_TTL_S       = _get_int("URL_MISS_TTL_S", 86400)       # links Google didn't redirect: retried after this
+
+# ============ Events ingest ============
+EVENTS_SKIP_UNCHANGED    = _get_bool("EVENTS_SKIP_UNCHANGED", True)   # skip sources whose section fingerprint matches
+EVENTS_FINGERPRINT_PATH  = os.getenv("EVENTS_FINGERPRINT_PATH", os.path.join(os.path.dirname(__file__), "_cache", "event_fingerprints.json"))
+# ACA_SOURCES_JSON='[["Singapore", "https://..."]]' replaces the ACA country pages
+ACA_SOURCES_JSON         = os.getenv("ACA_SOURCES_JSON", "")
+# dom = read event cards with a query in the page; html = page.content() + BeautifulSoup
+ACA_EXTRACT_MODE         = (os.getenv("ACA_EXTRACT_MODE", "dom") or "dom").strip().lower()
+EVENTS_ADAPTERS          = _csv("EVENTS_ADAPTERS", ["aca_playwright"])   # registered names, see adapters/events/registry.py
+EVENTS_ADAPTER_BUDGET_S  = _get_int("EVENTS_ADAPTER_BUDGET_S", 240)      # per-adapter time budget
+# per-adapter overrides: "name=seconds,..."
+EVENTS_ADAPTER_BUDGETS   = os.getenv("EVENTS_ADAPTER_BUDGETS", "aca_http=90")
+
+# ============ Bulk re-classification ============
+RECLASSIFY_BATCH      = _get_int("RECLASSIFY_BATCH", 1000)   # rows per keyset page (PostgREST max-rows)
+RECLASSIFY_STATE_PATH = os.getenv("RECLASSIFY_STATE_PATH", os.path.join(os.path.dirname(__file__), "_cache", "reclassify_state.json"))
+
+# ============ Historical backfill ============
+BACKFILL_DAYS        = _get_int("BACKFILL_DAYS", 90)         # how far back `python -m back.backfill` goes
+BACKFILL_WINDOW_DAYS = _get_int("BACKFILL_WINDOW_DAYS", 7)   # Google News query window (split when it hits the cap)
+BACKFILL_MAX_PAGES   = _get_int("BACKFILL_MAX_PAGES", 100)   # archive pages (?paged=N) per feed and run
+BACKFILL_CHUNK       = _get_int("BACKFILL_CHUNK", 200)       # articles buffered before a write
+BACKFILL_STATE_PATH  = os.getenv("BACKFILL_STATE_PATH", os.path.join(os.path.dirname(__file__), "_cache", "backfill_state.json"))
+
+# ============ Retention / archival ============
+RETENTION_MODE            = os.getenv("RETENTION_MODE", "archive").strip().lower()   # "archive" (gzip jsonl, then delete) or "delete"
+RETENTION_NEWS_DAYS       = _get_int("RETENTION_NEWS_DAYS", 180)      # by published date; 0 = keep forever
+RETENTION_EVENTS_DAYS     = _get_int("RETENTION_EVENTS_DAYS", 30)     # days after an event ended; 0 = keep forever
+RETENTION_TOMBSTONE_DAYS  = _get_int("RETENTION_TOMBSTONE_DAYS", 30)  # older /articles/changes cursors must resync
+RETENTION_BATCH           = _get_int("RETENTION_BATCH", 500)          # rows per select/delete
+RETENTION_BATCH_INTERVAL_S = _get_float("RETENTION_BATCH_INTERVAL_S", 0.5)  # pause between batches
+RETENTION_MAX_BATCHES     = _get_int("RETENTION_MAX_BATCHES", 200)    # per table per run; the next run continues
+RETENTION_ARCHIVE_DIR     = os.getenv("RETENTION_ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "_cache", "archive"))
 
 # ============ Keyword rules (used by rss_adapter / filters) ============
 ANY_KEYWORDS = _csv("ANY_KEYWORDS", [
@@ -67,3 +185,7 @@ TITLE_KEYWORDS_ANY = _csv("TITLE_KEYWORDS_ANY", [
     "renewable", "storage", "power", "electricity",
 ])
 TITLE_KEYWORDS_ALL = _csv("TITLE_KEYWORDS_ALL", [])
+
+# ============ Near-duplicate clustering ============
+NEAR_DUP_ENABLED   = _get_bool("NEAR_DUP_ENABLED", True)
+NEAR_DUP_THRESHOLD = _get_int("NEAR_DUP_THRESHOLD_PCT", 60) / 100.0   # title word-set Jaccard
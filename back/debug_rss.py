@@ -5,7 +5,7 @@ if __name__ == "__main__":
     items = get_news_from_rss(days_limit=30)
     print(f"Got {len(items)} items total")
     for i, it in enumerate(items[:10], 1):
-        print(f"{i}. {it['Source']} | {it['Title']} | {it['PublishedAt']}")
+        print(f"{i}. {it.source} | {it.title} | {it.published_date}")
     with open("rss_preview.json", "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+        json.dump([it.to_dict() for it in items], f, ensure_ascii=False, indent=2)
     print("Wrote rss_preview.json")
@@ -0,0 +1,174 @@
+# back/dedupe.py
+"""
+Near-duplicate story clustering on normalized titles.
+
+The same story arrives via a Google News `site:` feed, the publisher's own
+feed, and syndicated title variants. We MinHash each title's word set and
+bucket the signatures with LSH banding, so only items sharing a band are
+compared (no all-pairs loop). Candidates are confirmed with exact Jaccard,
+merged with union-find, and each cluster keeps one canonical article; the
+other copies are attached to its `alternates`.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+import unicodedata
+from dataclasses import replace
+from typing import Dict, List, Optional, Set
+
+from .url_resolver import is_google_news
+from .article import Article
+
+__all__ = ["cluster_near_duplicates", "title_tokens", "NearDupIndex"]
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Each 64-byte blake2b digest yields 16 independent 32-bit hashes; salting it
+# gives NUM_PERM hash functions in NUM_PERM // 16 calls per token. Salts are
+# fixed so signatures are stable across runs/processes.
+_SALTS = [f"minhash{i}".encode() for i in range(NUM_PERM // 16)]
+_UNPACK = struct.Struct("<16I").unpack
+
+_STOPWORDS = {
+    "a", "an", "and", "the", "to", "of", "in", "on", "for", "with", "at", "by",
+    "as", "is", "are", "be", "from", "its", "it", "that", "this", "after", "over",
+    "says", "said", "new", "s",
+}
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SUFFIX_RE = re.compile(r"\s[-–—|]\s([^-–—|]{1,60})$")
+
+
+def title_tokens(title: str, source: str = "", strip_suffix: bool = False) -> Set[str]:
+    """Word set of a title: accent-folded, lowercased, stopwords and ' - Publisher' suffix removed."""
+    t = title or ""
+    m = _SUFFIX_RE.search(t)
+    if m and (strip_suffix or m.group(1).strip().lower() == (source or "").strip().lower()):
+        t = t[: m.start()]
+    t = unicodedata.normalize("NFKD", t)
+    t = "".join(ch for ch in t if not unicodedata.combining(ch)).lower()
+    return {w for w in _WORD_RE.findall(t) if w not in _STOPWORDS}
+
+
+def _minhash(tokens: Set[str]) -> List[int]:
+    vectors = []
+    for tok in tokens:
+        b = tok.encode()
+        vec: tuple = ()
+        for salt in _SALTS:
+            vec += _UNPACK(hashlib.blake2b(b, digest_size=64, salt=salt).digest())
+        vectors.append(vec)
+    return [min(col) for col in zip(*vectors)]
+
+
+def _jaccard(x: Set[str], y: Set[str]) -> float:
+    if not x or not y:
+        return 0.0
+    return len(x & y) / len(x | y)
+
+
+def _canonical_rank(a: Article, pos: int):
+    # prefer the publisher's own link, then a real summary, then the earliest
+    # publication time, then feed order
+    return (
+        1 if is_google_news(a.link) else 0,
+        0 if a.summary.strip() else 1,
+        a.published.timestamp() if a.published else float("inf"),
+        pos,
+    )
+
+
+def cluster_near_duplicates(items: List[Article], threshold: float = 0.6, min_tokens: int = 3) -> List[Article]:
+    """
+    Collapse near-duplicate titles. Returns one canonical article per cluster,
+    in original order; the others are listed in its `alternates` as
+    {"Title", "Link", "Source"}.
+    """
+    if len(items) < 2:
+        return list(items)
+
+    toks = [title_tokens(a.title, a.source, is_google_news(a.link)) for a in items]
+
+    parent = list(range(len(items)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: Dict[tuple, List[int]] = {}
+    for i, ts in enumerate(toks):
+        if len(ts) < min_tokens:
+            continue
+        sig = _minhash(ts)
+        for band in range(BANDS):
+            key = (band, *sig[band * ROWS:(band + 1) * ROWS])
+            bucket = buckets.setdefault(key, [])
+            for j in bucket:
+                ri, rj = find(i), find(j)
+                if ri != rj and _jaccard(ts, toks[j]) >= threshold:
+                    parent[ri] = rj
+            bucket.append(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(items)):
+        clusters.setdefault(find(i), []).append(i)
+
+    out: Dict[int, Article] = {}
+    for members in clusters.values():
+        if len(members) == 1:
+            out[members[0]] = items[members[0]]
+            continue
+        members.sort(key=lambda i: _canonical_rank(items[i], i))
+        canon = items[members[0]]
+        alternates = list(canon.alternates)
+        for i in members[1:]:
+            other = items[i]
+            alternates.append({"Title": other.title, "Link": other.link, "Source": other.source})
+            alternates.extend(other.alternates)
+        out[members[0]] = replace(canon, alternates=alternates)
+
+    return [out[i] for i in sorted(out)]
+
+
+class NearDupIndex:
+    """
+    Streaming counterpart of cluster_near_duplicates for the pipelined
+    refresh: the same MinHash/LSH/Jaccard test against every article kept
+    so far, but the first copy of a story wins, since it may already have
+    been written. Stored rows can be indexed up front (see
+    fetch_news.stored_near_dup_index); an article whose link is already
+    indexed is the same row, not a duplicate of it.
+    """
+
+    def __init__(self, threshold: float = 0.6, min_tokens: int = 3):
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self._buckets: Dict[tuple, List[int]] = {}
+        self._toks: List[Set[str]] = []
+        self._items: List[Article] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def match(self, a: Article) -> Optional[Article]:
+        """The kept article `a` duplicates, or None (then `a` is kept and indexed)."""
+        ts = title_tokens(a.title, a.source, is_google_news(a.link))
+        if len(ts) < self.min_tokens:
+            return None
+        sig = _minhash(ts)
+        keys = [(band, *sig[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        for key in keys:
+            for j in self._buckets.get(key, ()):
+                if self._items[j].link != a.link and _jaccard(ts, self._toks[j]) >= self.threshold:
+                    return self._items[j]
+        i = len(self._items)
+        self._toks.append(ts)
+        self._items.append(a)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(i)
+        return None
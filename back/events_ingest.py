@@ -1,27 +1,90 @@
 # back/events_ingest.py
 from __future__ import annotations
-from typing import Dict, List
+from typing import Dict, List, Set, Tuple
 
-from back.adapters.events.aca_playwright import fetch_allconferencealert_events
+from back.adapters.events.aca_playwright import ACA_SOURCES
+from back.adapters.events.normalize import normalize_event, event_key, dedupe_events
+from back.adapters.events.registry import SOURCES, run_sources
 from back.supabase_events import upsert_events
+from back import sharding, source_fingerprints
 
 
-def run_events_ingest() -> Dict:
+def run_events_ingest(force: bool = False) -> Dict:
     """
-    Scrape AllConferenceAlert (JS-rendered via Playwright) for SG/MY/PH energy events,
-    normalize them into (title, region, city, venue, starts_on, ends_on, link, source),
-    then upsert into Supabase (public.events).
+    Run every enabled event adapter (EVENTS_ADAPTERS, see
+    adapters/events/registry.py) concurrently within its time budget,
+    normalize and dedupe their rows together into
+    (title, region, city, venue, starts_on, ends_on, link, source),
+    then upsert into Supabase (public.events). Sources whose events section
+    hasn't changed since the last run are skipped unless force=True.
+
+    Each merged row is upserted with the first adapter that produced it,
+    one upsert_events call per adapter, and an adapter's new fingerprints
+    are saved only if every row it produced was stored or queued.
     """
-    # 1) Fetch & normalize (already normalized by the fetcher)
-    rows: List[Dict] = fetch_allconferencealert_events()
-    raw_count = len(rows)
+    # 1) Fetch (all adapters in parallel)
+    results = run_sources(force=force)
+
+    # 2) One normalization + dedupe stage for every adapter's rows
+    raw_count = 0
+    normalized: List[Dict] = []
+    adapters: Dict[str, Dict] = {}
+    keys: Dict[str, Set[Tuple[str, str, str]]] = {}
+    for name, res in results.items():
+        label = SOURCES[name]["label"]
+        rows = [r for r in (normalize_event(x, label) for x in res["rows"]) if r]
+        raw_count += len(res["rows"])
+        normalized.extend(rows)
+        keys[name] = {event_key(r) for r in rows}
+        adapters[name] = {
+            "status": res["status"],
+            "seconds": res["seconds"],
+            "raw": len(res["rows"]),
+            "normalized": len(rows),
+            **res["run"].stats(),
+        }
+    rows = dedupe_events(normalized)
+
+    # 3) Upsert to Supabase, each row with the first adapter that produced it
+    owner: Dict[Tuple[str, str, str], str] = {}
+    for name in results:
+        for k in keys[name]:
+            owner.setdefault(k, name)
+    inserted = skipped = queued = failed = 0
+    lost: Set[Tuple[str, str, str]] = set()
+    for name in results:
+        mine = [r for r in rows if owner[event_key(r)] == name]
+        res = dict(zip(("upserted", "skipped", "queued", "failed"), upsert_events(mine)))
+        adapters[name].update(res)
+        inserted += res["upserted"]
+        skipped += res["skipped"]
+        queued += res["queued"]
+        failed += res["failed"]
+        if res["failed"]:
+            lost |= {event_key(r) for r in mine}
 
-    # 2) Upsert to Supabase
-    inserted, skipped = upsert_events(rows)
+    # new fingerprints only count once every row of that adapter is stored
+    # or queued, otherwise the lost rows would never be fetched again
+    for name, res in results.items():
+        if res["status"] == "timeout" or res["status"].startswith("error"):
+            continue
+        if keys[name] & lost:
+            print(f"[EVENTS] {name}: rows were not stored; section fingerprints not updated")
+            continue
+        source_fingerprints.save(res["run"].fingerprints)
 
     return {
         "raw": raw_count,
-        "normalized": raw_count,  # fetcher returns normalized rows
+        "normalized": len(rows),
         "upserted": inserted,
         "skipped": skipped,
+        "queued": queued,  # kept in the outbox until Supabase accepts them
+        "failed": failed,  # rejected or not sent, not retried
+        "changed": [c for a in adapters.values() for c in a["changed"]],
+        "unchanged": [c for a in adapters.values() for c in a["unchanged"]],
+        "adapters": adapters,
+        "shard": {
+            **sharding.describe(),
+            "sources": [c for c, u in sharding.select(ACA_SOURCES, keys=lambda s: (s[1], s[0]))],
+        },
     }
@@ -0,0 +1,158 @@
+# back/feed_health.py
+"""
+Per-feed history and adaptive polling schedule.
+
+For every feed URL we remember how many new items each fetch produced,
+when the last new item appeared, and bozo / empty / error streaks. That
+history decides which feeds a refresh actually fetches:
+
+  * a feed that produced new items is polled again after FEED_MIN_INTERVAL_MIN
+  * a quiet feed's interval doubles each time, up to FEED_MAX_INTERVAL_MIN
+  * a failing feed (fetch error, or no entries) backs off exponentially, up
+    to FEED_MAX_BACKOFF_MIN. A bozo feed that still yields entries is
+    scheduled like any other; its bozo streak is only reported.
+
+`force=True` ignores the schedule (full refresh). State lives in a small
+JSON file so it survives restarts.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    FEED_SCHEDULING, FEED_STATE_PATH,
+    FEED_MIN_INTERVAL_MIN, FEED_MAX_INTERVAL_MIN, FEED_MAX_BACKOFF_MIN,
+)
+
+__all__ = ["due_feeds", "record_fetch", "newest_seen", "health_report", "last_run", "reload"]
+
+HISTORY_LEN = 10
+
+_lock = threading.Lock()
+_state: Optional[Dict[str, Dict]] = None
+
+# summary of the most recent refresh, for the /refresh response
+last_run: Dict[str, List[str]] = {"fetched": [], "skipped": []}
+
+
+def _load() -> Dict[str, Dict]:
+    global _state
+    if _state is None:
+        try:
+            with open(FEED_STATE_PATH, "r", encoding="utf-8") as f:
+                _state = json.load(f)
+        except Exception:
+            _state = {}
+    return _state
+
+
+def reload() -> None:
+    """Drop the in-memory state; the next call re-reads the file (written by another process)."""
+    global _state
+    with _lock:
+        _state = None
+
+
+def _save() -> None:
+    try:
+        os.makedirs(os.path.dirname(FEED_STATE_PATH) or ".", exist_ok=True)
+        tmp = f"{FEED_STATE_PATH}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_load(), f, indent=1)
+        os.replace(tmp, FEED_STATE_PATH)
+    except Exception as e:
+        print(f"[FEEDS] State save failed: {e}")
+
+
+def _feed_url(src) -> str:
+    return src.get("url", "") if isinstance(src, dict) else str(src)
+
+
+def due_feeds(feeds: List, force: bool = False) -> Tuple[List, List]:
+    """Split feeds into (to_fetch, skipped) according to each feed's next_due_at."""
+    if force or not FEED_SCHEDULING:
+        due, skipped = list(feeds), []
+    else:
+        now = time.time()
+        with _lock:
+            state = _load()
+            due = [f for f in feeds if state.get(_feed_url(f), {}).get("next_due_at", 0) <= now]
+            skipped = [f for f in feeds if f not in due]
+    last_run["fetched"] = [_feed_url(f) for f in due]
+    last_run["skipped"] = [_feed_url(f) for f in skipped]
+    return due, skipped
+
+
+def record_fetch(
+    url: str,
+    name: str = "",
+    new_items: int = 0,
+    newest_published: Optional[str] = None,
+    bozo: bool = False,
+    empty: bool = False,
+    error: Optional[str] = None,
+) -> Dict:
+    """Update a feed's history after a fetch and schedule its next one."""
+    now = time.time()
+    with _lock:
+        st = _load().setdefault(url, {})
+        st["name"] = name or st.get("name", "")
+        st["last_fetch_at"] = now
+        st["fetches"] = st.get("fetches", 0) + 1
+        st["history"] = (st.get("history", []) + [new_items])[-HISTORY_LEN:]
+        st["bozo_streak"] = st.get("bozo_streak", 0) + 1 if bozo else 0
+        st["empty_streak"] = st.get("empty_streak", 0) + 1 if empty else 0
+        st["error_streak"] = st.get("error_streak", 0) + 1 if error else 0
+        st["last_error"] = error or (st.get("last_error") if (bozo or empty) else None)
+        if newest_published and newest_published > (st.get("newest_published") or ""):
+            st["newest_published"] = newest_published
+        if new_items:
+            st["last_new_at"] = now
+
+        failing = error or empty  # bozo alone isn't: feedparser flags many feeds it reads fine
+        if failing:
+            streak = max(st["error_streak"], st["empty_streak"])
+            interval = min(FEED_MIN_INTERVAL_MIN * (2 ** streak), FEED_MAX_BACKOFF_MIN)
+        elif new_items:
+            interval = FEED_MIN_INTERVAL_MIN
+        else:
+            prev = st.get("interval_min") or FEED_MIN_INTERVAL_MIN
+            interval = min(prev * 2, FEED_MAX_INTERVAL_MIN)
+        st["interval_min"] = interval
+        st["next_due_at"] = now + interval * 60
+        _save()
+        return dict(st)
+
+
+def newest_seen(url: str) -> str:
+    with _lock:
+        return _load().get(url, {}).get("newest_published") or ""
+
+
+def health_report() -> List[Dict]:
+    """Readable per-feed summary for GET /feeds/health."""
+    now = time.time()
+    out = []
+    with _lock:
+        for url, st in _load().items():
+            hist = st.get("history", [])
+            last_new = st.get("last_new_at")
+            out.append({
+                "name": st.get("name", ""),
+                "url": url,
+                "fetches": st.get("fetches", 0),
+                "recent_new_items": hist,
+                "avg_new_per_fetch": round(sum(hist) / len(hist), 2) if hist else 0,
+                "hours_since_last_new": round((now - last_new) / 3600, 1) if last_new else None,
+                "bozo_streak": st.get("bozo_streak", 0),
+                "empty_streak": st.get("empty_streak", 0),
+                "error_streak": st.get("error_streak", 0),
+                "last_error": st.get("last_error"),
+                "interval_min": st.get("interval_min"),
+                "next_due_in_min": round(max(0.0, st.get("next_due_at", 0) - now) / 60, 1),
+            })
+    return out
@@ -0,0 +1,196 @@
+# back/feed_stream.py
+"""
+Incremental RSS / Atom parsing with early exit.
+
+feedparser needs the whole document before it returns the first entry,
+while get_news_from_rss only keeps RSS_MAX_ITEMS recent items per feed.
+`parse_stream()` reads the response body in chunks, feeds them to an lxml
+XMLPullParser and builds each entry as soon as its closing tag arrives. It
+stops downloading once `want(entry)` has accepted `limit` entries, or after
+`stale_run` consecutive entries older than `since`.
+
+Entries are feedparser.FeedParserDict objects with the fields the adapter
+reads (title, link, published, published_parsed, summary, source), so the
+two parsers are interchangeable. Anything that is not well-formed RSS 2.0,
+RSS 1.0 or Atom falls back to a full feedparser.parse of the body; that
+includes feeds using HTML entities such as &nbsp; (undefined in XML, so
+lxml rejects them), whichever chunk they turn up in.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+import feedparser
+from lxml import etree
+
+__all__ = ["parse_stream", "StreamStats"]
+
+_FEED_ROOTS = {"rss", "feed", "RDF"}
+_ENTRY_TAGS = {"item", "entry"}
+
+
+class StreamStats:
+    __slots__ = ("bytes_read", "entries_seen", "stopped_early", "fallback")
+
+    def __init__(self):
+        self.bytes_read = 0
+        self.entries_seen = 0
+        self.stopped_early = False
+        self.fallback = False
+
+
+def _local(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(value: str) -> Optional[time.struct_time]:
+    """RFC 822 (RSS) or ISO 8601 (Atom, dc:date) → UTC struct_time, like feedparser's *_parsed."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    d = None
+    try:
+        d = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            d = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return d.utctimetuple()
+
+
+def _text(el) -> str:
+    return "".join(el.itertext()).strip()
+
+
+def _entry(el) -> feedparser.FeedParserDict:
+    e = feedparser.FeedParserDict()
+    guid_link = ""
+    for child in el:
+        name = _local(child.tag)
+        if name == "title":
+            e["title"] = _text(child)
+        elif name == "link":
+            href = child.get("href")
+            if href is None:                                    # RSS <link>text</link>
+                e.setdefault("link", _text(child))
+            elif child.get("rel", "alternate") == "alternate":  # Atom <link href=.../>
+                e.setdefault("link", href.strip())
+        elif name == "guid" and child.get("isPermaLink", "true") != "false":
+            guid_link = _text(child)
+        elif name in ("pubDate", "published", "date", "updated", "issued"):
+            # prefer the publication date over updated
+            if name != "updated" or "published" not in e:
+                e["published"] = _text(child)
+        elif name in ("description", "summary"):
+            e.setdefault("summary", _text(child))
+        elif name == "content" and "summary" not in e:
+            e["summary"] = _text(child)
+        elif name == "source":
+            title = child.findtext("{*}title") if child.get("url") is None else None
+            e["source"] = feedparser.FeedParserDict(
+                title=(title or _text(child)).strip(),
+                href=child.get("url") or "",
+            )
+    if "link" not in e and guid_link.startswith("http"):
+        e["link"] = guid_link
+    if "summary" in e:
+        e["description"] = e["summary"]
+    if "published" in e:
+        e["published_parsed"] = _parse_date(e["published"])
+    return e
+
+
+def _full_parse(chunks: List[bytes], rest: Iterator[bytes], headers: Dict) -> feedparser.FeedParserDict:
+    body = b"".join(chunks) + b"".join(rest)
+    return feedparser.parse(body, response_headers=headers)
+
+
+def parse_stream(
+    chunks: Iterator[bytes],
+    headers: Optional[Dict] = None,
+    limit: int = 0,
+    want: Optional[Callable[[feedparser.FeedParserDict], bool]] = None,
+    since: Optional[datetime] = None,
+    stale_run: int = 0,
+    stats: Optional[StreamStats] = None,
+) -> feedparser.FeedParserDict:
+    """
+    Parse a feed from an iterator of byte chunks (e.g. response.iter_content).
+
+    Stops reading once `limit` entries passed `want` (all entries count when
+    want is None), or after `stale_run` consecutive entries published before
+    `since`. Returns a FeedParserDict with `entries` and `bozo`; on an XML
+    error, feedparser's result for the whole body instead.
+    """
+    stats = stats or StreamStats()
+    headers = headers or {}
+    chunks = iter(chunks)
+    parser = etree.XMLPullParser(events=("start", "end"), resolve_entities=False, no_network=True)
+    cutoff = since.utctimetuple() if since else None
+
+    body: List[bytes] = []      # everything read so far, for the fallback
+    root_ok = False
+    depth = 0
+    entries: List[feedparser.FeedParserDict] = []
+    accepted = stale = 0
+    out = feedparser.FeedParserDict(entries=entries, bozo=0)
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        stats.bytes_read += len(chunk)
+        body.append(chunk)
+        try:
+            parser.feed(chunk)
+            for event, el in parser.read_events():
+                name = _local(el.tag)
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        if name not in _FEED_ROOTS:
+                            stats.fallback = True
+                            return _full_parse(body, chunks, headers)
+                        root_ok = True
+                    continue
+                depth -= 1
+                if name not in _ENTRY_TAGS:
+                    continue
+
+                e = _entry(el)
+                # drop the finished entry (and earlier siblings) to keep memory flat
+                el.clear()
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+
+                stats.entries_seen += 1
+                entries.append(e)
+                if cutoff and e.get("published_parsed") and e["published_parsed"] < cutoff:
+                    stale += 1
+                else:
+                    stale = 0
+                    if want is None or want(e):
+                        accepted += 1
+                if (limit and accepted >= limit) or (stale_run and stale >= stale_run):
+                    stats.stopped_early = True
+                    return out
+        except etree.XMLSyntaxError:
+            # feedparser's loose parser copes with entities and sloppy markup
+            stats.fallback = True
+            return _full_parse(body, chunks, headers)
+
+    if root_ok:
+        try:
+            parser.close()
+            return out
+        except etree.XMLSyntaxError:
+            pass
+    stats.fallback = True
+    return _full_parse(body, iter(()), headers)
@@ -1,17 +1,45 @@
 # back/fetch_news.py (RSS-only)
-from typing import List
-from .config import DAYS_LIMIT, RSS_ENABLED
+from typing import List, Optional
+from .config import (
+    DAYS_LIMIT, RSS_ENABLED, NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD, SHARD_COUNT, USE_SUPABASE,
+)
 from .adapters.rss_adapter import get_news_from_rss
+from .dedupe import NearDupIndex, cluster_near_duplicates
+from .article import Article
 
-def fetch_filtered_news(days_limit: int = DAYS_LIMIT) -> List[dict]:
+def stored_near_dup_index(days_limit: int) -> Optional[NearDupIndex]:
+    """
+    With SHARD_COUNT > 1 each node only clusters the feeds it owns, so the
+    same story from two shards' feeds would be written twice. This indexes
+    the recent stored rows, which other shards have written, so new copies
+    of those stories are dropped before the write. Two shards seeing a new
+    story in the same run can still both write it; the next runs add none.
+    None when single-shard, off, or Supabase is unreachable.
+    """
+    if SHARD_COUNT <= 1 or not NEAR_DUP_ENABLED or not USE_SUPABASE:
+        return None
+    from .supabase_reader import get_recent_article_records
+    try:
+        stored = get_recent_article_records(days_limit)
+    except Exception as e:
+        print(f"[DEDUPE] Could not load stored articles for cross-shard dedupe: {e}")
+        return None
+    index = NearDupIndex(threshold=NEAR_DUP_THRESHOLD)
+    for a in stored:
+        index.match(a)
+    print(f"[DEDUPE] Indexed {len(stored)} stored articles for cross-shard dedupe")
+    return index
+
+def fetch_filtered_news(days_limit: int = DAYS_LIMIT, force: bool = False) -> List[Article]:
     """
     Fetch news items using RSS only, respecting days_limit.
-    Returns a list of normalized article dicts that downstream writer expects.
+    Only feeds that are due are fetched unless force=True.
+    Returns Article records; the writer serializes them.
     """
-    items: List[dict] = []
+    items: List[Article] = []
 
     if RSS_ENABLED:
-        rss_items = get_news_from_rss(days_limit=days_limit)
+        rss_items = get_news_from_rss(days_limit=days_limit, force=force)
         if rss_items:
             items.extend(rss_items)
 
@@ -19,10 +47,21 @@ def fetch_filtered_news(days_limit: int = DAYS_LIMIT) -> List[dict]:
     seen = set()
     deduped = []
     for it in items:
-        link = (it.get("Link") or "").strip()
-        key = link.lower()
+        key = it.link.strip().lower()
         if key and key not in seen:
             seen.add(key)
             deduped.append(it)
 
+    # Collapse the same story arriving from several feeds / title variants
+    if NEAR_DUP_ENABLED:
+        before = len(deduped)
+        deduped = cluster_near_duplicates(deduped, threshold=NEAR_DUP_THRESHOLD)
+        print(f"[DEDUPE] {before} -> {len(deduped)} items after near-duplicate clustering")
+
+        stored = stored_near_dup_index(days_limit)
+        if stored is not None:
+            before = len(deduped)
+            deduped = [a for a in deduped if stored.match(a) is None]
+            print(f"[DEDUPE] {before} -> {len(deduped)} items after dropping other shards' stories")
+
     return deduped
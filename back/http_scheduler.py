@@ -0,0 +1,175 @@
+# back/http_scheduler.py
+"""
+Per-host outbound request scheduler shared by every adapter.
+
+Five RSS feeds live on news.google.com and every ACA page on
+allconferencealert.com, so parallel fetching would trip their rate limits.
+Each host gets:
+
+  * a concurrency budget (semaphore) and a request-rate budget (min gap
+    between request starts)
+  * a cooldown set from Retry-After / 429 / 503 that every thread honours
+  * one keep-alive requests.Session, so connections are reused
+
+`get()` / `request()` wrap requests and follow redirects themselves, one
+hop at a time, so a publisher reached through a news.google.com redirect is
+held to its own budget too. `host_slot()` is the same gate for callers that
+bring their own client (cloudscraper, Playwright).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    HTTP_HOST_CONCURRENCY, HTTP_HOST_RATE, HTTP_HOST_LIMITS,
+    HTTP_MAX_RETRIES, HTTP_MAX_RETRY_AFTER_S,
+)
+
+__all__ = ["get", "request", "host_slot", "note_throttled", "RETRY_STATUSES"]
+
+RETRY_STATUSES = (429, 503)
+MAX_REDIRECTS = 10
+
+
+def _parse_limits(spec: str) -> Dict[str, tuple]:
+    # "news.google.com=2:0.5,www.allconferencealert.com=1:0.2" -> {host: (concurrency, rate)}
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        host, _, val = part.partition("=")
+        conc, _, rate = val.partition(":")
+        try:
+            out[host.strip().lower()] = (int(conc), float(rate) if rate else HTTP_HOST_RATE)
+        except ValueError:
+            continue
+    return out
+
+
+_LIMITS = _parse_limits(HTTP_HOST_LIMITS)
+
+
+class _Host:
+    def __init__(self, name: str):
+        conc, rate = _LIMITS.get(name, (HTTP_HOST_CONCURRENCY, HTTP_HOST_RATE))
+        self.name = name
+        self.sem = threading.BoundedSemaphore(max(1, conc))
+        self.gap = 1.0 / rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0           # earliest start of the next request
+        self.cooldown_until = 0.0    # set by Retry-After / 429 / 503
+        self.session = requests.Session()
+        # a few pools so redirects to other hosts don't evict this host's connections
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, conc))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def wait_turn(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at, self.cooldown_until)
+            self.next_at = start + self.gap
+        if start > now:
+            time.sleep(start - now)
+
+    def cool_down(self, seconds: float) -> None:
+        with self.lock:
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+
+_hosts_lock = threading.Lock()
+_hosts: Dict[str, _Host] = {}
+
+
+def _host(url: str) -> _Host:
+    name = (urlparse(url).netloc or "").lower()
+    with _hosts_lock:
+        h = _hosts.get(name)
+        if h is None:
+            h = _hosts[name] = _Host(name)
+        return h
+
+
+def _retry_after(value: Optional[str], attempt: int) -> float:
+    delay = None
+    if value:
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except Exception:
+                delay = None
+    if delay is None or delay < 0:
+        delay = 2.0 * (2 ** attempt)      # no/odd header: exponential backoff
+    return min(delay, HTTP_MAX_RETRY_AFTER_S)
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the host's concurrency slots, starting no sooner than its rate/cooldown allow."""
+    h = _host(url)
+    with h.sem:
+        h.wait_turn()
+        yield h
+
+
+def note_throttled(url: str, retry_after: Optional[str] = None, attempt: int = 0) -> float:
+    """Record a 429/503 seen by a caller with its own client. Returns the cooldown applied."""
+    delay = _retry_after(retry_after, attempt)
+    _host(url).cool_down(delay)
+    print(f"[HTTP] {_host(url).name} throttled, cooling down {delay:.1f}s")
+    return delay
+
+
+def _send(method: str, url: str, session: Optional[requests.Session],
+          retries: int, **kwargs) -> requests.Response:
+    for attempt in range(retries + 1):
+        with host_slot(url) as h:
+            r = (session or h.session).request(method, url, **kwargs)
+        if r.status_code not in RETRY_STATUSES or attempt >= retries:
+            return r
+        note_throttled(url, r.headers.get("Retry-After"), attempt)
+        r.close()
+    return r
+
+
+def request(method: str, url: str, session: Optional[requests.Session] = None,
+            retries: int = HTTP_MAX_RETRIES, **kwargs) -> requests.Response:
+    """
+    requests-style call through the host's budget. 429/503 responses put the
+    whole host on cooldown (Retry-After, else exponential) and are retried up
+    to `retries` times; the last response is returned either way. Redirects
+    (allow_redirects, default on except for HEAD) are followed here, each
+    hop through its own host's budget.
+    """
+    follow = kwargs.pop("allow_redirects", method.upper() != "HEAD")
+    history = []
+    for _ in range(MAX_REDIRECTS + 1):
+        r = _send(method, url, session, retries, allow_redirects=False, **kwargs)
+        if not (follow and r.is_redirect):
+            r.history = history
+            return r
+        history.append(r)
+        r.close()
+        url = urljoin(r.url, r.headers["Location"])
+        # like requests: 303, and 301/302 after a POST, continue as a GET without a body
+        m = method.upper()
+        if (r.status_code == 303 and m != "HEAD") or (r.status_code in (301, 302) and m == "POST"):
+            method = "GET"
+            kwargs.pop("data", None)
+            kwargs.pop("json", None)
+    raise requests.TooManyRedirects(f"more than {MAX_REDIRECTS} redirects from {history[0].url}",
+                                    response=r)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
@@ -0,0 +1,240 @@
+# back/ingest_worker.py
+"""
+Refresh work outside the API process.
+
+The fetch/parse/write part of a refresh (feedparser, dateutil, the region
+regexes, BeautifulSoup, Chromium) is CPU-heavy and holds the GIL, so while
+it runs in a uvicorn worker the /articles requests of that worker wait.
+
+With INGEST_MODE=process, POST /refresh and /refresh/events submit their
+job to a pool of INGEST_WORKER_PROCESSES spawned worker processes (started
+with the API, over the pool's local call/result queues) and wait for the
+result; the API process only does the in-memory follow-up (search index,
+snapshots, events cache). A worker is replaced after INGEST_WORKER_MAX_JOBS
+jobs, since Chromium and feed parsing leave a lot of heap behind, and the
+pool is rebuilt if a worker dies. Each worker reports its PID when it
+picks up a job; a job that runs past INGEST_JOB_TIMEOUT_S gets that
+process terminated and the pool replaced (a job of the other kind running
+beside it fails too), so it can't keep writing after its single-flight
+was released and the next refresh started.
+
+INGEST_MODE=inline is the default: the jobs run in the request thread, as
+before this module existed. It needs no extra processes or memory, which
+suits small single-worker deployments; the price is that the worker
+serving the refresh answers other requests slowly while it runs.
+
+Without the API (cron, one-off runs):
+
+    python -m back.ingest_worker news|events [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as JobTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from .config import (
+    USE_SUPABASE, DAYS_LIMIT, RSS_ENABLED, REFRESH_PIPELINE,
+    INGEST_MODE, INGEST_WORKER_PROCESSES, INGEST_WORKER_MAX_JOBS, INGEST_JOB_TIMEOUT_S,
+)
+
+__all__ = ["run", "start", "stop", "news_job", "events_job", "ISOLATED"]
+
+ISOLATED = INGEST_MODE == "process"
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_reports = None                    # the pool's queue of (job id, worker pid)
+_job_pids: Dict[int, int] = {}     # job id -> pid of the worker running it
+_job_ids = iter(range(1, sys.maxsize))
+
+# worker side: where to report the PID running each job (set by _init_worker)
+_report_to = None
+
+# imported by each worker when it starts, so the first job doesn't pay for it
+_WARM_MODULES = ["back.fetch_news", "back.events_ingest",
+                 "back.supabase_writer" if USE_SUPABASE else "back.airtable_writer"]
+
+
+# ---------------- Jobs (run in the worker, or inline) ----------------
+def _news_result(news) -> Dict:
+    from . import feed_health, sharding
+    return {
+        "status": "updated",
+        "fetched": len(news),
+        "feeds": {k: len(v) for k, v in feed_health.last_run.items()},
+        "shard": {**sharding.describe(), "feeds": feed_health.last_run["fetched"]},
+    }
+
+
+def news_job(force: bool = False) -> Dict:
+    """Fetch the due feeds and store them. {"result": /refresh response, "news": [Article]}."""
+    from .fetch_news import fetch_filtered_news
+
+    if USE_SUPABASE and RSS_ENABLED and REFRESH_PIPELINE:
+        from .pipeline import run_news_pipeline
+        print("🔄 Fetching and writing RSS articles (pipelined)...")
+        news, stats = run_news_pipeline(days_limit=DAYS_LIMIT, force=force)
+        print(f"✅  Fetched {len(news)} items, written {stats['written']} rows. "
+              f"Errors: {len(stats['backend_errors'])}")
+        result = {**_news_result(news), **stats}
+        if stats.get("error"):
+            result["status"] = "partial"  # a stage failed after some chunks were written
+        return {"result": result, "news": news}
+
+    print("🔄 Fetching new RSS articles...")
+    news = fetch_filtered_news(days_limit=DAYS_LIMIT, force=force)
+    print(f"✅  Fetched {len(news)} items.")
+    result = _news_result(news)
+    if USE_SUPABASE:
+        from .supabase_writer import write_to_supabase
+        print("☁️ Writing to Supabase...")
+        written, errs, sample = write_to_supabase(news)
+        print(f"✅  Written {written} rows. Errors: {len(errs)}")
+        result.update({"written": written, "backend_errors": errs, "backend_sample": sample})
+    else:
+        from .airtable_writer import write_to_airtable
+        print("✈️ Writing to Airtable...")
+        write_to_airtable([a.to_dict() for a in news])
+    return {"result": result, "news": news}
+
+
+def events_job(force: bool = False) -> Dict:
+    """Run the events ingest; returns its stats."""
+    from .events_ingest import run_events_ingest
+    print("🔄 Running Events ETL (Reuters → Supabase)...")
+    return run_events_ingest(force=force)
+
+
+_JOBS = {"news": news_job, "events": events_job}
+
+
+# ---------------- Worker pool ----------------
+def _init_worker(reports, warm_modules) -> None:
+    global _report_to
+    _report_to = reports
+    import importlib
+    for name in warm_modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[INGEST] Worker prewarm of {name} failed: {e}")
+
+
+def _run_job(job, job_id: int, force: bool) -> Dict:
+    # in the worker: tell the API process which PID to terminate if this job overruns
+    _report_to.put((job_id, os.getpid()))
+    return job(force=force)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _reports
+    with _lock:
+        if _pool is None:
+            # spawn: the API process has threads (prewarm, outbox drainer), fork would copy their locks
+            ctx = multiprocessing.get_context("spawn")
+            _reports = ctx.SimpleQueue()
+            _pool = ProcessPoolExecutor(
+                max_workers=INGEST_WORKER_PROCESSES,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(_reports, list(_WARM_MODULES)),
+                max_tasks_per_child=INGEST_WORKER_MAX_JOBS or None,
+            )
+            print(f"[INGEST] Started worker pool ({INGEST_WORKER_PROCESSES} processes)")
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _worker_pid(job_id: int) -> Optional[int]:
+    with _lock:
+        while _reports is not None and not _reports.empty():
+            jid, pid = _reports.get()
+            _job_pids[jid] = pid
+        return _job_pids.pop(job_id, None)
+
+
+def _kill_job(pool: ProcessPoolExecutor, job_id: int) -> None:
+    """Terminate the worker running `job_id` and drop the pool; the next job starts a fresh one."""
+    pid = _worker_pid(job_id)
+    _discard_pool(pool)
+    if pid is None:
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    # active_children() reaps the workers that exited (they're our children)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and any(p.pid == pid for p in multiprocessing.active_children()):
+        time.sleep(0.05)
+
+
+def start() -> None:
+    """Spawn the workers now (API startup) instead of on the first refresh."""
+    if ISOLATED:
+        _get_pool()
+
+
+def stop() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run(kind: str, force: bool = False) -> Dict:
+    """Run the `kind` job in a worker process (INGEST_MODE=process) or in this thread."""
+    job = _JOBS[kind]
+    if not ISOLATED:
+        return job(force=force)
+
+    pool = _get_pool()
+    job_id = next(_job_ids)
+    t0 = time.perf_counter()
+    try:
+        return pool.submit(_run_job, job, job_id, force).result(timeout=INGEST_JOB_TIMEOUT_S or None)
+    except JobTimeout:
+        _kill_job(pool, job_id)
+        raise RuntimeError(f"{kind} job ran past INGEST_JOB_TIMEOUT_S={INGEST_JOB_TIMEOUT_S}s "
+                           f"(its worker was terminated, pool restarted for the next run)")
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise RuntimeError(f"ingest worker died during the {kind} job (pool restarted for the next run)")
+    finally:
+        # the job has ended one way or another (its worker is dead on a timeout)
+        _worker_pid(job_id)  # drop its entry
+        print(f"[INGEST] {kind} job in worker finished in {time.perf_counter() - t0:.1f}s")
+        if kind == "news":
+            from . import feed_health
+            feed_health.reload()  # the worker updated the state file
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("kind", choices=sorted(_JOBS))
+    ap.add_argument("--force", action="store_true", help="fetch every source, due or not")
+    args = ap.parse_args(argv)
+    out = _JOBS[args.kind](force=args.force)
+    print(json.dumps(out.get("result", out), indent=1, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
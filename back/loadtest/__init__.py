@@ -0,0 +1,2 @@
+# back/loadtest/__init__.py
+"""Load-test harness: local PostgREST stand-in, feed/page fixtures and runner (see run.py)."""
@@ -0,0 +1,134 @@
+# back/loadtest/fixtures.py
+"""
+Local feed and event-page servers for load tests.
+
+  /feed/<n>.xml          RSS 2.0 feed n with `items` recent entries whose
+                         titles pass the default keyword gate
+  /aca/<country>.html    AllConferenceAlert-style country page with an
+                         "Upcoming Energy Conferences in <country>" section
+
+`latency` (seconds) is added to every response to mimic remote hosts.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+__all__ = ["FixtureServer"]
+
+
+_WORDS = ["solar", "wind", "grid", "battery", "tariff", "hydrogen", "LNG", "coal", "carbon", "storage",
+          "interconnector", "offshore", "rooftop", "auction", "subsidy", "utility", "demand", "pipeline",
+          "geothermal", "nuclear", "biomass", "transmission", "market", "investment", "licence"]
+_PLACES = ["Singapore", "Malaysia", "Philippines", "Indonesia", "Vietnam", "Thailand"]
+
+
+def _rss(n: int, items: int) -> bytes:
+    # distinct titles, so near-duplicate clustering keeps them apart
+    rng = random.Random(n)
+    now = datetime.now(timezone.utc)
+    entries = []
+    for i in range(items):
+        pub = format_datetime(now - timedelta(hours=i * 2 + n))
+        words = " ".join(rng.sample(_WORDS, 5))
+        entries.append(
+            f"<item><title>{rng.choice(_PLACES)} energy {words} ({n}-{i})</title>"
+            f"<link>https://fixture.example/feed{n}/article-{i}</link>"
+            f"<guid>https://fixture.example/feed{n}/article-{i}</guid>"
+            f"<pubDate>{pub}</pubDate>"
+            f"<description>Renewable energy and battery storage news item {i} from feed {n}.</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>Fixture feed {n}</title><link>https://fixture.example/</link>"
+        + "".join(entries) + "</channel></rss>"
+    ).encode()
+
+
+def _aca(country: str, events: int) -> bytes:
+    start = date.today() + timedelta(days=20)
+    cards = []
+    for i in range(events):
+        d = start + timedelta(days=i * 9)
+        cards.append(
+            f"<div class='card'><p>International Energy Conference {country} {i}</p>"
+            f"<p>{d.day} {d.strftime('%B')} {d.year}</p><p>{country}, {country}</p>"
+            f"<a href='/event/{country.lower()}-{i}'>View Event</a></div>"
+        )
+    return (
+        "<html><body><div><div><div><div><div>"
+        f"<h2>Upcoming Energy Conferences in {country} 2026</h2></div>"
+        + "".join(cards) + "</div></div></div></div></body></html>"
+    ).encode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # default listen backlog (5) resets connections under load
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    items = 50
+    events = 12
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/feed/") and path.endswith(".xml"):
+            body, ctype = _rss(int(path[6:-4] or 0), self.items), "application/rss+xml"
+        elif path.startswith("/aca/") and path.endswith(".html"):
+            body, ctype = _aca(path[5:-5].title(), self.events), "text/html"
+        else:
+            body, ctype = b"not found", "text/plain"
+            self.send_response(404)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer:
+    def __init__(self, feeds: int = 7, items: int = 50, events: int = 12,
+                 latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (_Handler,), {"latency": latency, "items": items, "events": events})
+        self.server = _Server((host, port), handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self.feeds = feeds
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fixtures", daemon=True)
+
+    def feed_config(self) -> List[Dict]:
+        """Value for RSS_FEEDS_JSON."""
+        return [{"name": f"Fixture {n}", "url": f"{self.url}/feed/{n}.xml"} for n in range(self.feeds)]
+
+    def aca_config(self) -> List[Tuple[str, str]]:
+        """Value for ACA_SOURCES_JSON."""
+        return [(c, f"{self.url}/aca/{c.lower()}.html") for c in ("Singapore", "Malaysia", "Philippines")]
+
+    def start(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
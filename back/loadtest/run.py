@@ -0,0 +1,331 @@
+# back/loadtest/run.py
+"""
+End-to-end HTTP load test of the API against local stand-ins.
+
+Starts the stub PostgREST (seeded), the feed / event-page fixture server
+and `uvicorn app:app` pointed at them, then drives a weighted mix of
+requests from concurrent clients for a fixed duration and reports, per
+endpoint and overall: throughput, p50/p95/p99/max latency, errors, and the
+server's memory (PSS of uvicorn, its workers and their children, sampled
+from /proc).
+
+    python -m back.loadtest.run
+    python -m back.loadtest.run --concurrency 32 --duration 30 --workers 2 \\
+        --mix articles=60,search=20,events=15,refresh=5
+
+Each run is saved as JSON in --out (default back/_cache/loadtest/) and
+compared with the previous run there. Endpoints for --mix: articles,
+articles_fields, search, changes, events, events_filtered, health,
+refresh, refresh_events (needs Chromium).
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .fixtures import FixtureServer
+from .stub_postgrest import StubPostgrest, seed
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_OUT = os.path.join(os.path.dirname(__file__), "..", "_cache", "loadtest")
+
+_SEARCH_TERMS = ["solar", "grid", "battery", "singapore power", "carbon tariff", "hydro", "wind storage"]
+
+# name -> (method, path or callable(rng) -> path)
+ENDPOINTS = {
+    "articles":        ("GET", "/articles"),
+    "articles_fields": ("GET", "/articles?fields=Title,Link,PublishedAt"),
+    "search":          ("GET", lambda rng: f"/articles/search?q={rng.choice(_SEARCH_TERMS).replace(' ', '+')}"),
+    "changes":         ("GET", "/articles/changes?limit=200"),
+    "events":          ("GET", "/events"),
+    "events_filtered": ("GET", "/events?region=Singapore&limit=20"),
+    "health":          ("GET", "/health"),
+    "refresh":         ("POST", "/refresh?force=true"),
+    "refresh_events":  ("POST", "/refresh/events"),
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, w = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name}")
+        mix[name] = float(w or 1)
+    return mix
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+# ---------------- server process ----------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _tree(pid: int) -> List[int]:
+    """pid and all its descendants (Linux /proc)."""
+    parents: Dict[int, List[int]] = {}
+    for stat in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat) as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents.setdefault(int(fields[1]), []).append(int(stat.split("/")[2]))
+        except (OSError, IndexError, ValueError):
+            continue
+    out, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        out.append(p)
+        todo.extend(parents.get(p, []))
+    return out
+
+
+def _mem_kb(pid: int) -> int:
+    # PSS splits pages shared between workers (forked/spawned interpreters,
+    # the page cache behind the mmapped snapshot) instead of counting them
+    # once per process; VmRSS where smaps_rollup isn't available
+    for path, key in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(key):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+def rss_mb(pid: int) -> float:
+    """Memory of pid and all its descendants (uvicorn workers, the ingest pool), in MB."""
+    return sum(_mem_kb(p) for p in _tree(pid)) / 1024.0
+
+
+def _wait_for_workers(pid: int, workers: int, timeout: float = 30.0) -> None:
+    """Until the supervisor has its worker processes and their memory has settled."""
+    deadline = time.time() + timeout
+    last = -1.0
+    while time.time() < deadline:
+        if workers <= 1 or len(_tree(pid)) - 1 >= workers:
+            now = rss_mb(pid)
+            if last > 0 and abs(now - last) <= 0.02 * last:
+                return
+            last = now
+        time.sleep(0.5)
+
+
+def start_app(port: int, workers: int, env_extra: Dict[str, str], log_path: str) -> subprocess.Popen:
+    env = dict(os.environ, **env_extra)
+    log = open(log_path, "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"app exited with {proc.returncode}, see {log_path}")
+        try:
+            c = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            c.request("GET", "/health")
+            if c.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"app did not come up, see {log_path}")
+
+
+# ---------------- load ----------------
+def _client(port: int, mix: Dict[str, float], until: float, warm_until: float,
+            seed_: int, out: List[Tuple[str, float, int]]) -> None:
+    rng = random.Random(seed_)
+    names, weights = list(mix), list(mix.values())
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    while time.time() < until:
+        name = rng.choices(names, weights)[0]
+        method, path = ENDPOINTS[name]
+        path = path(rng) if callable(path) else path
+        started, t0 = time.time(), time.perf_counter()
+        try:
+            conn.request(method, path, headers={"x-backend-token": os.getenv("BACKEND_API_TOKEN", "")})
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            status = 0
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        took = time.perf_counter() - t0
+        if started >= warm_until:
+            out.append((name, took, status))
+    conn.close()
+
+
+def _summarize(samples: List[Tuple[str, float, int]], seconds: float) -> Dict:
+    by: Dict[str, List[Tuple[float, int]]] = {}
+    for name, took, status in samples:
+        by.setdefault(name, []).append((took, status))
+    by["total"] = [(t, s) for _, t, s in samples]
+    out = {}
+    for name, vals in by.items():
+        lat = sorted(t * 1000 for t, _ in vals)
+        out[name] = {
+            "count": len(vals),
+            "errors": sum(1 for _, s in vals if s == 0 or s >= 500),
+            "rps": round(len(vals) / seconds, 1) if seconds else 0,
+            "p50_ms": round(percentile(lat, 50), 1),
+            "p95_ms": round(percentile(lat, 95), 1),
+            "p99_ms": round(percentile(lat, 99), 1),
+            "max_ms": round(lat[-1], 1) if lat else 0,
+        }
+    return out
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _previous(out_dir: str) -> Optional[Dict]:
+    files = sorted(glob.glob(os.path.join(out_dir, "*.json")))
+    if not files:
+        return None
+    with open(files[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _print_report(res: Dict, prev: Optional[Dict]) -> None:
+    print(f"\n{'endpoint':<16}{'count':>7}{'err':>5}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, s in res["endpoints"].items():
+        line = (f"{name:<16}{s['count']:>7}{s['errors']:>5}{s['rps']:>8}"
+                f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{s['max_ms']:>9}")
+        old = (prev or {}).get("endpoints", {}).get(name)
+        if old and old.get("p95_ms"):
+            line += f"   p95 {s['p95_ms'] - old['p95_ms']:+.1f} ms, rps {s['rps'] - old['rps']:+.1f}"
+        print(line)
+    m = res["memory_mb"]
+    print(f"\nserver memory ({m.get('processes', 1):.0f} processes, PSS): "
+          f"start {m['start']:.0f} MB, peak {m['peak']:.0f} MB, end {m['end']:.0f} MB"
+          + (f" (prev peak {prev['memory_mb']['peak']:.0f} MB)" if prev else ""))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mix", default="articles=50,search=20,events=15,events_filtered=5,changes=8,refresh=2")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20, help="seconds of measured load")
+    ap.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load first")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    ap.add_argument("--news", type=int, default=1000, help="seeded news rows")
+    ap.add_argument("--events", type=int, default=200, help="seeded event rows")
+    ap.add_argument("--feeds", type=int, default=7)
+    ap.add_argument("--feed-latency", type=float, default=0.05)
+    ap.add_argument("--out", default=DEFAULT_OUT)
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix="engie-loadtest-")
+
+    with StubPostgrest() as pg, FixtureServer(feeds=args.feeds, latency=args.feed_latency) as fx:
+        seed(pg, news=args.news, events=args.events)
+        port = _free_port()
+        env = {
+            "SUPABASE_URL": pg.url, "SUPABASE_SERVICE_KEY": "loadtest", "USE_SUPABASE": "true",
+            "BACKEND_API_TOKEN": "",
+            "RSS_FEEDS_JSON": json.dumps(fx.feed_config()),
+            "ACA_SOURCES_JSON": json.dumps(fx.aca_config()),
+            # host budgets are per host:port; all fixture feeds share one
+            "HTTP_HOST_LIMITS": f"{fx.url.split('://', 1)[1]}={max(4, args.feeds)}:0",
+            "URL_RESOLVE_ENABLED": "false",
+            "SNAPSHOT_DIR": os.path.join(tmp, "snapshot"),
+            "REFRESH_LOCK_DIR": os.path.join(tmp, "locks"),
+            "FEED_STATE_PATH": os.path.join(tmp, "feed_state.json"),
+            "URL_CACHE_PATH": os.path.join(tmp, "urls.json"),
+            "OUTBOX_DIR": os.path.join(tmp, "outbox"),
+            "EVENTS_FINGERPRINT_PATH": os.path.join(tmp, "fingerprints.json"),
+            "RECLASSIFY_STATE_PATH": os.path.join(tmp, "reclassify.json"),
+            "PREWARM_DELAY_S": "0",
+        }
+        proc = start_app(port, args.workers, env, os.path.join(out_dir, "server.log"))
+        try:
+            # /health answers as soon as one worker is up; measure all of them
+            _wait_for_workers(proc.pid, args.workers)
+            mem = {"start": rss_mb(proc.pid), "peak": 0.0, "end": 0.0}
+            stop = threading.Event()
+
+            def sample():
+                while not stop.wait(0.5):
+                    mem["peak"] = max(mem["peak"], rss_mb(proc.pid))
+            sampler = threading.Thread(target=sample, daemon=True)
+            sampler.start()
+
+            samples: List[Tuple[str, float, int]] = []
+            start = time.time()
+            warm_until = start + args.warmup
+            until = warm_until + args.duration
+            print(f"[LOADTEST] {args.concurrency} clients, {args.warmup:g}s warmup + {args.duration:g}s, "
+                  f"{args.workers} worker(s), mix {mix}")
+            clients = [
+                threading.Thread(target=_client, args=(port, mix, until, warm_until, i, samples))
+                for i in range(args.concurrency)
+            ]
+            for c in clients:
+                c.start()
+            for c in clients:
+                c.join()
+            stop.set()
+            mem["end"] = rss_mb(proc.pid)
+            mem["peak"] = max(mem["peak"], mem["end"])
+            mem["processes"] = len(_tree(proc.pid))
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    res = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(start)),
+        "git": _git_rev(),
+        "args": vars(args),
+        "endpoints": _summarize(samples, args.duration),
+        "memory_mb": {k: round(v, 1) for k, v in mem.items()},
+    }
+    prev = _previous(out_dir)
+    _print_report(res, prev)
+    if not args.no_save:
+        path = os.path.join(out_dir, time.strftime("%Y%m%d-%H%M%S", time.localtime(start)) + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"[LOADTEST] Saved {path}")
+    return 1 if res["endpoints"].get("total", {}).get("errors") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+# back/loadtest/stub_postgrest.py
+"""
+In-memory PostgREST stand-in for load tests.
+
+Serves /rest/v1/<table> for the tables the app uses (news, events,
+news_tombstones, the news_frontend view) and /rest/v1/rpc/news_frontend_latest,
+with the subset of PostgREST it relies on:
+
+  * GET: select (column projection), order (col.asc|desc, comma list),
+    limit / offset, or=(...) and column filters eq, neq, gt, gte, lt, lte,
+    ilike, is, in
+  * POST: upsert on `on_conflict` (merge), return=representation|minimal
+  * DELETE: same filters as GET
+
+It is not a database: filters compare strings (fine for ISO dates and
+timestamps) and ids are integers. `seed()` fills it with realistic rows.
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+__all__ = ["StubPostgrest", "seed"]
+
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns", "or"}
+# events are unique on (title, region, starts_on), like dedupe_key in Supabase
+_CONFLICT_KEYS = {"dedupe_key": ("title", "region", "starts_on")}
+
+# columns of tables whose schema the stub checks: a filter, order or select
+# on anything else gets PostgREST's 400 (42703), as it would in Supabase
+_COLUMNS = {
+    "news": {"id", "title", "link", "source", "published", "summary", "keywords", "region", "topic",
+             "alternates", "inserted_at", "updated_at"},
+}
+_FILTER_COL_RE = re.compile(r"(?:^|[(,])([A-Za-z_][A-Za-z0-9_]*)\.(?:eq|neq|gt|gte|lt|lte|is|in|ilike)\.")
+
+
+class UnknownColumn(Exception):
+    pass
+
+
+def _check_columns(table: str, params: List[Tuple[str, str]]) -> None:
+    known = _COLUMNS.get(table)
+    if known is None:
+        return
+    used = set()
+    for k, v in params:
+        if k in ("or", "and"):
+            used.update(_FILTER_COL_RE.findall(v))
+        elif k == "select" and v != "*":
+            used.update(c.strip() for c in v.split(","))
+        elif k == "order":
+            used.update(c.partition(".")[0] for c in v.split(",") if c)
+        elif k not in _RESERVED:
+            used.add(k)
+    unknown = sorted(used - known)
+    if unknown:
+        raise UnknownColumn(f"column {table}.{unknown[0]} does not exist")
+
+
+def _news_frontend(rows: List[Dict], args: Dict) -> List[Dict]:
+    # stands in for the view in sql/news_frontend_view.sql
+    from ..supabase_reader import _to_frontend
+    return [{**_to_frontend(r), "_published": r.get("published"), "_id": r.get("id")} for r in rows]
+
+
+def _news_frontend_latest(rows: List[Dict], args: Dict) -> List[Dict]:
+    # stands in for news_frontend_latest(max_rows): newest first (nulls first), limit, then undated last
+    by_id = sorted(rows, key=lambda r: r.get("id") or 0, reverse=True)
+    latest = sorted(by_id, key=lambda r: (r.get("published") is None, r.get("published") or ""), reverse=True)
+    latest = latest[:int(args.get("max_rows") or 1000)]
+    latest.sort(key=lambda r: (r.get("published") is not None, r.get("published") or ""), reverse=True)
+    return _news_frontend(latest, args)
+
+
+# read-only views and functions: name -> (base table, rows mapping, argument names)
+_VIEWS = {
+    "news_frontend": ("news", _news_frontend, ()),
+    "news_frontend_latest": ("news", _news_frontend_latest, ("max_rows",)),
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _unquote(v: str) -> str:
+    v = v.strip()
+    if len(v) >= 2 and v[0] == v[-1] == '"':
+        return v[1:-1].replace('\\"', '"')
+    return v
+
+
+def _split_top(s: str) -> List[str]:
+    """Split on commas that are not inside parentheses or quotes."""
+    out, depth, cur, quoted = [], 0, [], False
+    for ch in s:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            out.append("".join(cur))
+            cur = []
+            continue
+        cur.append(ch)
+    if cur:
+        out.append("".join(cur))
+    return out
+
+
+def _cmp_value(v):
+    if v is None:
+        return None
+    return v if isinstance(v, (int, float)) else str(v)
+
+
+def _like_regex(pattern: str) -> str:
+    # LIKE: % (or PostgREST's *) any run, _ one character, backslash escapes the next one
+    out, chars = [], iter(pattern)
+    for ch in chars:
+        if ch == "\\":
+            out.append(re.escape(next(chars, "\\")))
+        elif ch in "%*":
+            out.append(".*")
+        elif ch == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(ch))
+    return "^" + "".join(out) + "$"
+
+
+def _test(row: Dict, col: str, expr: str) -> bool:
+    op, _, raw = expr.partition(".")
+    val = row.get(col)
+    if op == "is":
+        return (val is None) if raw == "null" else (str(val).lower() == raw)
+    if op == "in":
+        items = {_unquote(x) for x in _split_top(raw.strip("()"))}
+        return str(val) in items
+    target = _unquote(raw)
+    if op == "ilike":
+        return val is not None and re.match(_like_regex(target.lower()), str(val).lower()) is not None
+    if val is None:
+        return False
+    a = _cmp_value(val)
+    b = type(a)(target) if isinstance(a, (int, float)) else target
+    return {
+        "eq": a == b, "neq": a != b, "gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b,
+    }.get(op, False)
+
+
+def _or(row: Dict, expr: str) -> bool:
+    # "(a.gt.1,and(b.eq.2,c.lt.3))"
+    for part in _split_top(expr.strip()[1:-1]):
+        if part.startswith("and("):
+            if all(_cond(row, p) for p in _split_top(part[4:-1])):
+                return True
+        elif _cond(row, part):
+            return True
+    return False
+
+
+def _cond(row: Dict, cond: str) -> bool:
+    col, _, expr = cond.partition(".")
+    return _test(row, col, expr)
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables: Dict[str, Dict[int, Dict]] = {"news": {}, "events": {}, "news_tombstones": {}}
+        self.next_id = 1
+
+    def _id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def query(self, table: str, params: List[Tuple[str, str]]) -> List[Dict]:
+        _check_columns(table, params)
+        p = dict(params)
+        base, view, argnames = _VIEWS.get(table, (table, None, ()))
+        with self.lock:
+            rows = list(self.tables.setdefault(base, {}).values())
+        if view:
+            rows = view(rows, {k: v for k, v in params if k in argnames})
+        for k, v in params:
+            if k == "or":
+                rows = [r for r in rows if _or(r, v)]
+            elif k not in _RESERVED and k not in argnames:
+                rows = [r for r in rows if _test(r, k, v)]
+        for key in reversed((p.get("order") or "").split(",")):
+            if not key:
+                continue
+            col, _, direction = key.partition(".")
+            desc = direction.startswith("desc")
+            rows.sort(key=lambda r: (r.get(col) is None, _cmp_value(r.get(col)) or ""), reverse=desc)
+        off = int(p.get("offset") or 0)
+        if p.get("limit"):
+            rows = rows[off:off + int(p["limit"])]
+        elif off:
+            rows = rows[off:]
+        sel = p.get("select", "*")
+        if sel != "*":
+            cols = [c.strip() for c in sel.split(",")]
+            rows = [{c: r.get(c) for c in cols} for r in rows]
+        return rows
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: str) -> List[Dict]:
+        keys = _CONFLICT_KEYS.get(on_conflict, (on_conflict or "id",))
+        out = []
+        with self.lock:
+            t = self.tables.setdefault(table, {})
+            index = {tuple(str(r.get(k)) for k in keys): r for r in t.values()}
+            for row in rows:
+                have = index.get(tuple(str(row.get(k)) for k in keys))
+                if have is None:
+                    have = {"id": self._id(), **row}
+                    t[have["id"]] = have
+                    index[tuple(str(row.get(k)) for k in keys)] = have
+                else:
+                    have.update(row)
+                have["updated_at"] = _now()
+                out.append(dict(have))
+        return out
+
+    def delete(self, table: str, params: List[Tuple[str, str]]) -> int:
+        doomed = self.query(table, [(k, v) for k, v in params if k not in ("select", "limit", "order")])
+        with self.lock:
+            t = self.tables.setdefault(table, {})
+            for r in doomed:
+                gone = t.pop(r["id"], None)
+                if gone and table == "news":
+                    tid = self._id()
+                    self.tables["news_tombstones"][tid] = {
+                        "id": tid, "news_id": str(gone["id"]), "link": gone.get("link"), "deleted_at": _now(),
+                    }
+        return len(doomed)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # default listen backlog (5) resets connections under load
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: _Store = None  # set per server
+
+    def _table(self) -> Tuple[str, List[Tuple[str, str]]]:
+        u = urlparse(self.path)
+        return u.path.rstrip("/").rsplit("/", 1)[-1], parse_qsl(u.query, keep_blank_values=True)
+
+    def _send(self, status: int, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _bad_column(self, e: UnknownColumn):
+        self._send(400, {"code": "42703", "message": str(e)})
+
+    def do_GET(self):
+        table, params = self._table()
+        rng = self.headers.get("Range")
+        if rng and "-" in rng:
+            lo, hi = rng.split("-", 1)
+            params += [("offset", lo), ("limit", str(int(hi) - int(lo) + 1))]
+        try:
+            self._send(200, self.store.query(table, params))
+        except UnknownColumn as e:
+            self._bad_column(e)
+
+    def do_HEAD(self):
+        self._send(200)
+
+    def do_POST(self):
+        table, params = self._table()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"[]")
+        rows = body if isinstance(body, list) else [body]
+        out = self.store.upsert(table, rows, dict(params).get("on_conflict", ""))
+        if "return=representation" in (self.headers.get("Prefer") or ""):
+            self._send(201, out)
+        else:
+            self._send(201)
+
+    def do_PATCH(self):
+        self.do_POST()
+
+    def do_DELETE(self):
+        table, params = self._table()
+        try:
+            self.store.delete(table, params)
+        except UnknownColumn as e:
+            self._bad_column(e)
+            return
+        self._send(204)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubPostgrest:
+    """`with StubPostgrest() as pg:` → pg.url is the SUPABASE_URL to use."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.store = _Store()
+        handler = type("Handler", (_Handler,), {"store": self.store})
+        self.server = _Server((host, port), handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-postgrest", daemon=True)
+
+    def start(self) -> "StubPostgrest":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+_TITLE_WORDS = ["solar", "wind", "grid", "battery", "power", "carbon", "LNG", "hydrogen", "tariff", "storage"]
+_REGIONS = ["Singapore", "Malaysia", "Philippines", "Indonesia", "Vietnam", "Thailand", "Global"]
+
+
+def seed(stub: StubPostgrest, news: int = 1000, events: int = 200, rng_seed: int = 7) -> None:
+    """Fill the stub with `news` articles (last 60 days) and `events` upcoming events."""
+    rng = random.Random(rng_seed)
+    today = date.today()
+    rows = []
+    for i in range(news):
+        words = rng.sample(_TITLE_WORDS, 3)
+        region = rng.choice(_REGIONS)
+        rows.append({
+            "title": f"{region} energy: {' '.join(words)} update #{i}",
+            "link": f"https://fixture.example/news/{i}",
+            "source": f"fixture-{i % 12}.example",
+            "published": (today - timedelta(days=rng.randrange(60))).isoformat(),
+            "summary": "Energy market update. " * rng.randrange(1, 12),
+            "keywords": ", ".join(words),
+            "region": region,
+            "topic": words,
+        })
+    stub.store.upsert("news", rows, "link")
+    ev = []
+    for i in range(events):
+        region = rng.choice(_REGIONS[:3])
+        ev.append({
+            "title": f"International Energy Conference #{i}",
+            "region": region,
+            "city": region,
+            "venue": None,
+            "starts_on": (today + timedelta(days=rng.randrange(-10, 365))).isoformat(),
+            "ends_on": None,
+            "link": f"https://fixture.example/event/{i}",
+            "source": "AllConferenceAlert",
+        })
+    stub.store.upsert("events", ev, "dedupe_key")
@@ -2,30 +2,96 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-import os, re
-from fastapi import FastAPI
-from starlette.responses import Response
+import os, re, threading
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
 # ---------------- Config Imports ----------------
-from .config import USE_SUPABASE, DAYS_LIMIT
-from .fetch_news import fetch_filtered_news
-
-# ----- News backend (existing) -----
-if USE_SUPABASE:
-    from .supabase_reader import get_articles
-    from .supabase_writer import write_to_supabase as write_to_backend
-    BACKEND_NAME = "supabase"
-else:
-    from .airtable_reader import get_articles
-    from .airtable_writer import write_to_airtable as write_to_backend
-    BACKEND_NAME = "airtable"
+from .config import (
+    USE_SUPABASE, SNAPSHOT_ENABLED, SNAPSHOT_MAX_AGE_S,
+    REFRESH_MIN_INTERVAL_S, EVENTS_REFRESH_MIN_INTERVAL_S,
+    PREWARM_IMPORTS, PREWARM_DELAY_S, ARTICLES_PASSTHROUGH,
+    INGEST_MODE, SHARD_COUNT, SHARD_INDEX,
+)
+from .singleflight import run_single_flight
+
+# ----- Backends & adapters (imported on first use) -----
+# feedparser/dateutil (fetch_news), playwright/bs4 (events_ingest), requests
+# and supabase are only needed by the data and refresh endpoints, so they
+# are not imported at startup; /health answers as soon as FastAPI is up.
+# The app's own modules (snapshot, search_index, outbox, ingest_worker, ...)
+# are imported where they're used too, so `import app` is FastAPI plus this file.
+BACKEND_NAME = "supabase" if USE_SUPABASE else "airtable"
+
+def get_articles(*args, **kwargs):
+    if USE_SUPABASE:
+        from .supabase_reader import get_articles as impl
+    else:
+        from .airtable_reader import get_articles as impl
+    return impl(*args, **kwargs)
+
+def get_articles_payload():
+    # /articles body: the view's bytes as they are, or rows mapped in Python
+    if USE_SUPABASE and ARTICLES_PASSTHROUGH:
+        from .supabase_reader import get_articles_bytes
+        return get_articles_bytes()
+    return get_articles()
+
+def get_article_records(*args, **kwargs):
+    from .supabase_reader import get_article_records as impl
+    return impl(*args, **kwargs)
 
 # ----- Events backend -----
-from back.events_ingest import run_events_ingest
-from back.supabase_events import fetch_upcoming_events
+def fetch_upcoming_events(*args, **kwargs):
+    from .supabase_events import fetch_upcoming_events as impl
+    return impl(*args, **kwargs)
+
+def invalidate_events_cache():
+    from .supabase_events import invalidate_events_cache as impl
+    impl()
+
+_PREWARM_MODULES = [
+    "back.supabase_reader" if USE_SUPABASE else "back.airtable_reader",
+    "back.supabase_events",
+    "back.search_index",
+    "supabase",
+]
+if INGEST_MODE != "process":  # otherwise the ingest workers import these
+    _PREWARM_MODULES += [
+        "back.supabase_writer" if USE_SUPABASE else "back.airtable_writer",
+        "back.fetch_news",
+        "back.events_ingest",
+    ]
+
+def _prewarm():
+    # Runs in a background thread after startup so the first refresh/articles
+    # call doesn't pay the import cost; failures only mean a lazy import later.
+    import importlib, time
+    time.sleep(PREWARM_DELAY_S)
+    t0 = time.perf_counter()
+    for name in _PREWARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ Prewarm of {name} failed: {e}")
+    print(f"🔥 Prewarmed adapters in {time.perf_counter() - t0:.2f}s")
+
+@asynccontextmanager
+async def _lifespan(app):
+    from . import outbox, ingest_worker
+    if PREWARM_IMPORTS:
+        threading.Thread(target=_prewarm, name="prewarm", daemon=True).start()
+    if USE_SUPABASE:
+        outbox.start_drainer()  # replays writes queued while Supabase was down
+    ingest_worker.start()  # INGEST_MODE=process: refresh work runs in these processes
+    yield
+    ingest_worker.stop()
 
 # ---------------- FastAPI App ----------------
-app = FastAPI(title="ENGIE News API (Render)")
+app = FastAPI(title="ENGIE News API (Render)", lifespan=_lifespan)
 
 # ---------------- Security Guard (token check) ----------------
 BACKEND_API_TOKEN = os.getenv("BACKEND_API_TOKEN", "").strip()
@@ -93,48 +159,224 @@ async def cors_middleware(request, call_next):
 # ---------------- Health ----------------
 @app.get("/health")
 def health():
-    return {"status": "ok", "backend": BACKEND_NAME}
+    from . import outbox
+    return {"status": "ok", "backend": BACKEND_NAME, "outbox": outbox.depth()}
+
+# ---------------- Shared snapshot ----------------
+def _serve_snapshot(name, build, fresh=None):
+    """
+    Serve the cross-worker snapshot `name`. When it is missing or stale, one
+    worker rebuilds and publishes it while the others keep serving the stale
+    copy (or wait for the new one if there is none yet).
+    """
+    if not SNAPSHOT_ENABLED:
+        return Response(_json_body(build()), media_type="application/json")
+    from . import snapshot
+    snap = snapshot.read_or_build(name, lambda: _json_body(build()),
+                                  max_age=SNAPSHOT_MAX_AGE_S, fresh=fresh)
+    return Response(snap.body, media_type="application/json",
+                    headers={"X-Snapshot-Version": str(snap.version)})
+
+def _json_body(payload) -> bytes:
+    # builders return rows, or JSON bytes that are already final (passthrough)
+    from . import snapshot
+    return payload if isinstance(payload, bytes) else snapshot.json_bytes(payload)
+
+def _publish_snapshot(name, build):
+    # returns the new version, or None
+    if not SNAPSHOT_ENABLED:
+        return None
+    from . import snapshot
+    try:
+        return snapshot.publish(name, _json_body(build()))
+    except Exception as e:
+        print(f"⚠️ Snapshot publish failed for {name}: {e}")
+        return None
+
+def _articles_version():
+    # other workers' refreshes show up here as a new articles snapshot
+    if not SNAPSHOT_ENABLED:
+        return None
+    from . import snapshot
+    snap = snapshot.read("articles")
+    return snap.version if snap is not None else None
+
+def _events_fresh(snap):
+    # the events list is cut at starts_on >= today
+    return date.fromtimestamp(snap.published_at) == date.today()
 
 # ---------------- Articles (news) ----------------
 @app.get("/articles")
-def articles():
+def articles(fields: str = ""):
     print("📰 Fetching articles from", BACKEND_NAME)
-    return get_articles()
+    # ?fields=Title,Link,Source,PublishedAt → smaller select + smaller payload
+    wanted = [f for f in fields.split(",") if f.strip()]
+    if BACKEND_NAME != "supabase":
+        return JSONResponse(get_articles())
+    if wanted and ARTICLES_PASSTHROUGH:
+        return _stream_articles(wanted)
+    if wanted:
+        return JSONResponse(get_articles(fields=wanted))
+    return _serve_snapshot("articles", get_articles_payload)
+
+def _stream_articles(fields):
+    # PostgREST's body goes out chunk by chunk, never decoded
+    from .supabase_reader import open_articles_stream
+    r = open_articles_stream(fields)
+    def body():
+        try:
+            yield from r.iter_content(chunk_size=65536)
+        finally:
+            r.close()
+    return StreamingResponse(body(), media_type="application/json")
+
+@app.get("/articles/changes")
+def article_changes(since: str = "", limit: int = Query(500, ge=1, le=1000)):
+    # delta sync: rows changed after the cursor + tombstones; no cursor = everything
+    if not USE_SUPABASE:
+        raise HTTPException(status_code=400, detail="delta sync needs the Supabase backend")
+    from .supabase_reader import get_changes, InvalidCursor
+    try:
+        return JSONResponse(get_changes(since=since or None, limit=limit))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/articles/search")
+def search_articles(q: str = "", limit: int = 20, prefix: bool = True):
+    if not USE_SUPABASE:
+        return []  # search index is Supabase-only
+    from . import search_index
+    index = search_index.ensure_loaded(get_article_records, version=_articles_version())
+    hits = index.search(q, limit=max(0, min(limit, 100)), prefix=prefix)
+    return [a.to_frontend() for a in hits]
+
+def _flight(kind):
+    # shards co-located on one host must not join each other's runs
+    if SHARD_COUNT > 1:
+        return f"{kind}.shard{SHARD_INDEX}"
+    return kind
 
 @app.post("/refresh")
-def refresh():
-    print("🔄 Fetching new RSS a" \
-    "rticles...")
-    news = fetch_filtered_news(days_limit=DAYS_LIMIT)
-    print(f"✅  Fetched {len(news)} items.")
+def refresh(force: bool = False):
+    # overlapping calls (cron + manual) join the run in flight, across workers too
+    return run_single_flight(
+        _flight("news"), lambda: _refresh_news(force),
+        min_interval=0 if force else REFRESH_MIN_INTERVAL_S, force=force,
+    )
 
+def _refresh_news(force: bool = False) -> dict:
+    from . import ingest_worker
+    try:
+        out = ingest_worker.run("news", force=force)
+    except Exception:
+        # rows may have been written before it failed (or timed out): don't
+        # keep serving the old snapshot and index
+        if BACKEND_NAME == "supabase":
+            _rebuild_index(_publish_snapshot("articles", get_articles_payload))
+        raise
     if BACKEND_NAME == "supabase":
-        print("☁️ Writing to Supabase...")
-        written, errs, sample = write_to_backend(news)
-        print(f"✅  Written {written} rows. Errors: {len(errs)}")
-        return {
-            "status": "updated",
-            "fetched": len(news),
-            "written": written,
-            "backend_errors": errs,
-            "backend_sample": sample,
-        }
-    else:
-        print("✈️ Writing to Airtable...")
-        write_to_backend(news)
-        return {"status": "updated", "fetched": len(news)}
+        version = _publish_snapshot("articles", get_articles_payload)
+        _reindex(out["news"], version)
+    return out["result"]
+
+def _reindex(news, version=None):
+    # Incremental search index update: only if it has been built already,
+    # otherwise the first search loads everything (including these rows).
+    # Tagging it with the new snapshot keeps this worker from rebuilding.
+    from . import search_index
+    if not search_index.INDEX.loaded:
+        return
+    n = search_index.INDEX.upsert(news)
+    search_index.INDEX.version = version
+    print(f"🔎 Search index updated with {n} rows ({len(search_index.INDEX)} total)")
+
+def _rebuild_index(version=None):
+    from . import search_index
+    if search_index.INDEX.loaded:
+        search_index.INDEX.replace_all(get_article_records(), version=version)
+
+@app.post("/refresh/reclassify")
+def refresh_reclassify(restart: bool = False, dry_run: bool = False, max_pages: Optional[int] = None):
+    # re-tag stored rows after keyword/region rule changes; resumes from its checkpoint
+    if not USE_SUPABASE:
+        raise HTTPException(status_code=400, detail="reclassify needs the Supabase backend")
+    return run_single_flight("reclassify", lambda: _reclassify(restart, dry_run, max_pages))
+
+def _reclassify(restart: bool, dry_run: bool, max_pages: Optional[int]) -> dict:
+    from .reclassify import reclassify
+    stats = reclassify(restart=restart, dry_run=dry_run, max_pages=max_pages)
+    # run_changed, not changed: that one counts earlier (resumed) runs too
+    if stats.get("run_changed") and not dry_run:
+        _rebuild_index(_publish_snapshot("articles", get_articles_payload))
+    return stats
+
+@app.post("/refresh/retention")
+def refresh_retention(dry_run: bool = False):
+    # batched delete/archive of expired news, past events and old tombstones
+    if not USE_SUPABASE:
+        raise HTTPException(status_code=400, detail="retention needs the Supabase backend")
+    return run_single_flight("retention", lambda: _retention(dry_run))
+
+def _retention(dry_run: bool) -> dict:
+    from .retention import run_retention
+    stats = run_retention(dry_run=dry_run)
+    if dry_run:
+        return stats
+    tables = stats["tables"]
+    if any(t.get("deleted") for name, t in tables.items() if name != "events"):
+        _rebuild_index(_publish_snapshot("articles", get_articles_payload))
+    if tables.get("events", {}).get("deleted"):
+        invalidate_events_cache()
+        _publish_snapshot("events", fetch_upcoming_events)
+    return stats
+
+@app.get("/feeds/health")
+def feeds_health():
+    from . import feed_health
+    return feed_health.health_report()
 
 # ---------------- Events ----------------
+def _iso_date(value: Optional[str], name: str) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM-DD")
+
 @app.get("/events")
-def list_events():
+def list_events(
+    region: Optional[str] = None,
+    city: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
     print("📅 Fetching upcoming events (Supabase)")
-    events = fetch_upcoming_events()
+    if not any([region, city, date_from, date_to, limit, offset]):
+        return _serve_snapshot("events", fetch_upcoming_events, fresh=_events_fresh)
+    events = fetch_upcoming_events(
+        region=region, city=city,
+        date_from=_iso_date(date_from, "from"), date_to=_iso_date(date_to, "to"),
+        limit=limit, offset=offset,
+    )
     print(f"✅ Returned {len(events)} upcoming events.")
-    return events
+    return JSONResponse(events)
 
 @app.post("/refresh/events")
-def refresh_events():
-    print("🔄 Running Events ETL (Reuters → Supabase)...")
-    stats = run_events_ingest()
+def refresh_events(force: bool = False):
+    # force=true re-parses and re-upserts sources whose page hasn't changed
+    return run_single_flight(
+        _flight("events"), lambda: _refresh_events(force),
+        min_interval=0 if force else EVENTS_REFRESH_MIN_INTERVAL_S, force=force,
+    )
+
+def _refresh_events(force: bool = False) -> dict:
+    from . import ingest_worker
+    stats = ingest_worker.run("events", force=force)
+    if stats.get("upserted"):  # unchanged sources wrote nothing; cached lists are still right
+        invalidate_events_cache()
+        _publish_snapshot("events", fetch_upcoming_events)
     print(f"✅ Events ETL done. Stats: {stats}")
     return {"ok": True, "stats": stats}
@@ -0,0 +1,408 @@
+# back/outbox.py
+"""
+Durable local outbox for backend writes.
+
+Scraped rows used to be lost when a Supabase upsert failed, and getting
+them back meant re-scraping (a full Playwright run for events). Now every
+batch is written to OUTBOX_DIR before it is uploaded, and the file is
+removed only after the upload succeeds:
+
+  * `deliver(kind, rows, sender)` – enqueue, upload, ack. A failed upload
+    leaves the batch on disk; a rejected one (PermanentError, e.g. a 4xx
+    for bad data) moves to OUTBOX_DIR/failed for inspection
+  * a circuit breaker opens after OUTBOX_BREAKER_FAILURES consecutive
+    failures; while open, writes are only queued, so a down backend does
+    not add timeouts to every refresh
+  * `start_drainer()` replays pending batches in the background, merged
+    into requests of up to OUTBOX_DRAIN_ROWS rows, once the breaker lets a
+    trial request through
+
+Replays never overwrite newer data. Uploads and the drainer share an flock
+(uploads shared, the drainer exclusive), so a replay never runs alongside
+a newer upload. When an upload is acked while older batches of the same
+kind are still pending, the keys it wrote are recorded in a small ledger,
+and the drainer drops those rows from the older batches.
+
+Batch files are written once (tmp + fsync + rename) and never modified.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only; elsewhere drainers aren't coordinated across processes
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .config import (
+    OUTBOX_ENABLED, OUTBOX_DIR, OUTBOX_DRAIN_INTERVAL_S, OUTBOX_DRAIN_ROWS,
+    OUTBOX_BREAKER_FAILURES, OUTBOX_BREAKER_COOLDOWN_S,
+)
+
+__all__ = [
+    "deliver", "enqueue", "ack", "drain", "depth", "start_drainer",
+    "PermanentError", "CircuitBreaker", "BREAKER",
+]
+
+# kind -> "module:function" uploading a list of rows; imported when first replayed
+_SENDERS = {
+    "articles": "back.supabase_writer:send_batch",
+    "events": "back.supabase_events:send_batch",
+}
+
+# kind -> the row field its upsert conflicts on, for kinds whose upsert
+# overwrites existing rows (events are inserted with ignore_duplicates, so a
+# late replay can't clobber anything)
+_KEYS = {
+    "articles": "link",
+}
+
+# batches younger than this may still be in their first upload attempt
+_GRACE_S = 60
+
+_FAILED_DIR = os.path.join(OUTBOX_DIR, "failed")
+
+
+class PermanentError(Exception):
+    """The backend rejected the batch; retrying the same rows won't help."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.failures < self.threshold:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # half-open: one trial call per cooldown period
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            if self.failures >= self.threshold:
+                print("[OUTBOX] Backend reachable again, circuit closed")
+            self.failures = 0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.failures == self.threshold:
+                    print(f"[OUTBOX] {self.failures} failures in a row, circuit open for {self.cooldown}s")
+                self.opened_at = time.monotonic()
+
+    def describe(self) -> Dict:
+        with self._lock:
+            if self.failures < self.threshold:
+                return {"state": "closed", "failures": self.failures}
+            left = self.cooldown - (time.monotonic() - self.opened_at)
+            return {"state": "open", "failures": self.failures, "retry_in_s": max(0, round(left))}
+
+
+BREAKER = CircuitBreaker(OUTBOX_BREAKER_FAILURES, OUTBOX_BREAKER_COOLDOWN_S)
+
+
+# ---------------- batch files ----------------
+def enqueue(kind: str, rows: List[Dict]) -> str:
+    """Persist a batch; returns its id (the file name)."""
+    os.makedirs(OUTBOX_DIR, exist_ok=True)
+    name = f"{kind}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.json"
+    path = os.path.join(OUTBOX_DIR, name)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "created_at": time.time(), "rows": rows}, f, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return name
+
+
+def _batch_ns(batch_id: str) -> int:
+    # enqueue time, from the file name
+    return int(batch_id.split("-")[1])
+
+
+def ack(batch_id: str) -> None:
+    try:
+        os.remove(os.path.join(OUTBOX_DIR, batch_id))
+    except FileNotFoundError:
+        pass  # already replayed by the drainer
+
+
+def _dead_letter(batch_id: str, reason: str) -> None:
+    os.makedirs(_FAILED_DIR, exist_ok=True)
+    try:
+        os.replace(os.path.join(OUTBOX_DIR, batch_id), os.path.join(_FAILED_DIR, batch_id))
+        print(f"[OUTBOX] Batch {batch_id} rejected, moved to failed/: {reason[:200]}")
+    except FileNotFoundError:
+        pass
+
+
+def _pending(kind: Optional[str] = None) -> List[str]:
+    try:
+        names = [e.name for e in os.scandir(OUTBOX_DIR)
+                 if e.is_file() and e.name.endswith(".json") and not e.name.startswith(".")]
+    except FileNotFoundError:
+        return []
+    if kind:
+        names = [n for n in names if n.startswith(f"{kind}-")]
+    return sorted(names, key=_batch_ns)  # oldest first
+
+
+def _read(batch_id: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(OUTBOX_DIR, batch_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        _dead_letter(batch_id, f"unreadable: {e}")
+        return None
+
+
+def depth() -> Dict:
+    """Pending / failed batch counts and breaker state (cheap: directory listing only)."""
+    by_kind: Dict[str, int] = {}
+    for n in _pending():
+        k = n.split("-", 1)[0]
+        by_kind[k] = by_kind.get(k, 0) + 1
+    try:
+        failed = sum(1 for e in os.scandir(_FAILED_DIR) if e.name.endswith(".json"))
+    except FileNotFoundError:
+        failed = 0
+    return {"pending": sum(by_kind.values()), "by_kind": by_kind, "failed": failed,
+            "breaker": BREAKER.describe()}
+
+
+@contextmanager
+def _flock(name: str, mode: str):
+    """flock on OUTBOX_DIR/<name>: mode "shared", "exclusive", or "try" (exclusive, yields False if taken)."""
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(OUTBOX_DIR, exist_ok=True)
+    flags = {"shared": fcntl.LOCK_SH, "exclusive": fcntl.LOCK_EX, "try": fcntl.LOCK_EX | fcntl.LOCK_NB}[mode]
+    with open(os.path.join(OUTBOX_DIR, name), "a+") as lf:
+        try:
+            fcntl.flock(lf, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+# ---------------- acked-keys ledger ----------------
+def _ledger_path(kind: str) -> str:
+    return os.path.join(OUTBOX_DIR, f".acked-{kind}.ledger")
+
+
+def _load_ledger(kind: str) -> Dict[str, int]:
+    """key -> enqueue time (ns) of the newest acked batch that wrote it."""
+    try:
+        with open(_ledger_path(kind), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"[OUTBOX] Unreadable {kind} ledger, ignoring it: {e}")
+        return {}
+
+
+def _update_ledger(kind: str, batch_id: Optional[str] = None, rows: List[Dict] = ()) -> None:
+    """Record the keys of an acked batch and prune entries no pending batch is older than."""
+    field = _KEYS.get(kind)
+    if not field:
+        return
+    with _flock(".ledger.lock", "exclusive"):
+        pending = [_batch_ns(n) for n in _pending(kind)]
+        ledger = _load_ledger(kind)
+        before = dict(ledger)
+        if batch_id is not None and pending:
+            ns = _batch_ns(batch_id)
+            if min(pending) < ns:
+                for r in rows:
+                    key = r.get(field)
+                    if key and ledger.get(key, 0) < ns:
+                        ledger[key] = ns
+        oldest = min(pending) if pending else None
+        ledger = {k: v for k, v in ledger.items() if oldest is not None and v > oldest}
+        if ledger == before:
+            return
+        path = _ledger_path(kind)
+        if not ledger:
+            os.remove(path)
+            return
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(ledger, f)
+        os.replace(tmp, path)
+
+
+def _not_superseded(kind: str, batch_id: str, rows: List[Dict], ledger: Dict[str, int]) -> List[Dict]:
+    """Rows of a pending batch that no newer acked batch has written since."""
+    field = _KEYS.get(kind)
+    if not field or not ledger:
+        return rows
+    ns = _batch_ns(batch_id)
+    return [r for r in rows if ledger.get(r.get(field), 0) <= ns]
+
+
+# ---------------- upload ----------------
+def deliver(kind: str, rows: List[Dict], sender: Callable[[List[Dict]], int]) -> Tuple[Optional[int], Optional[str], bool]:
+    """
+    Upload `rows` with `sender(rows)` through the outbox.
+    Returns (sender result or None, error or None, queued): `queued` means
+    the rows are on disk and the drainer will retry them.
+    """
+    if not rows:
+        return 0, None, False
+    if not OUTBOX_ENABLED:
+        try:
+            return sender(rows), None, False
+        except Exception as e:
+            return None, str(e), False
+
+    batch = enqueue(kind, rows)
+    if not BREAKER.allow():
+        return None, f"backend unavailable, {len(rows)} {kind} rows queued", True
+    # shared with other uploads, never with a drain replaying older batches
+    with _flock(".drain.lock", "shared"):
+        try:
+            result = sender(rows)
+        except PermanentError as e:
+            BREAKER.success()  # the backend answered
+            _dead_letter(batch, str(e))
+            return None, str(e), False
+        except Exception as e:
+            BREAKER.failure()
+            return None, f"{e} ({len(rows)} {kind} rows queued)", True
+        ack(batch)
+        _update_ledger(kind, batch, rows)
+    BREAKER.success()
+    return result, None, False
+
+
+def _sender(kind: str) -> Optional[Callable[[List[Dict]], int]]:
+    spec = _SENDERS.get(kind)
+    if not spec:
+        return None
+    module, _, fn = spec.partition(":")
+    return getattr(importlib.import_module(module), fn)
+
+
+def _replay(kind: str, sender, group: List[Tuple[str, List[Dict]]], stats: Dict) -> bool:
+    """Send a group of batches as one request. False if the backend is failing."""
+    rows = [r for _, batch_rows in group for r in batch_rows]
+    try:
+        sender(rows)
+    except PermanentError as e:
+        BREAKER.success()
+        if len(group) == 1:
+            _dead_letter(group[0][0], str(e))
+            stats["failed"] += 1
+            return True
+        # find the bad batch(es): replay one by one
+        return all(_replay(kind, sender, [g], stats) for g in group)
+    except Exception as e:
+        BREAKER.failure()
+        print(f"[OUTBOX] Replay of {len(rows)} {kind} rows failed: {e}")
+        return False
+    BREAKER.success()
+    for batch_id, _ in group:
+        ack(batch_id)
+    stats["batches"] += len(group)
+    stats["rows"] += len(rows)
+    return True
+
+
+def _drain_kind(kind: str, cutoff: float, stats: Dict) -> bool:
+    """Replay one kind's pending batches, oldest first. False if the backend is failing."""
+    names = [n for n in _pending(kind) if _batch_ns(n) / 1e9 < cutoff]
+    if not names:
+        return True
+    sender = _sender(kind)
+    ledger = _load_ledger(kind)
+    group: List[Tuple[str, List[Dict]]] = []
+    size = 0
+    try:
+        for name in names:
+            batch = _read(name)
+            if batch is None:
+                continue
+            all_rows = batch.get("rows") or []
+            rows = _not_superseded(kind, name, all_rows, ledger)
+            stats["superseded"] += len(all_rows) - len(rows)
+            if not rows:
+                ack(name)  # every row was rewritten by a newer upload
+                continue
+            if group and size + len(rows) > OUTBOX_DRAIN_ROWS:
+                if not _replay(kind, sender, group, stats):
+                    return False
+                group, size = [], 0
+            group.append((name, rows))
+            size += len(rows)
+        return not group or _replay(kind, sender, group, stats)
+    finally:
+        _update_ledger(kind)
+
+
+def _drain_locked() -> Dict:
+    stats = _empty_stats()
+    cutoff = time.time() - _GRACE_S
+    for kind in _SENDERS:
+        if not _drain_kind(kind, cutoff, stats):
+            break
+    return stats
+
+
+def _empty_stats() -> Dict:
+    return {"batches": 0, "rows": 0, "failed": 0, "superseded": 0}
+
+
+def drain() -> Dict:
+    """Replay pending batches (oldest first) unless the breaker is open or another process is draining."""
+    if not _pending() or not BREAKER.allow():
+        return _empty_stats()
+    with _flock(".drain.lock", "try") as held:
+        return _drain_locked() if held else _empty_stats()
+
+
+_drainer: Optional[threading.Thread] = None
+
+
+def _drain_loop() -> None:
+    while True:
+        time.sleep(OUTBOX_DRAIN_INTERVAL_S)
+        try:
+            stats = drain()
+            if stats["batches"]:
+                print(f"[OUTBOX] Replayed {stats['batches']} batches ({stats['rows']} rows)")
+        except Exception as e:
+            print(f"[OUTBOX] Drain failed: {e}")
+
+
+def start_drainer() -> None:
+    """Start the background replay thread (once per process)."""
+    global _drainer
+    if not OUTBOX_ENABLED or _drainer is not None:
+        return
+    _drainer = threading.Thread(target=_drain_loop, name="outbox-drainer", daemon=True)
+    _drainer.start()
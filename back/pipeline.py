@@ -0,0 +1,234 @@
+# back/pipeline.py
+"""
+Pipelined news refresh.
+
+The phased refresh downloads every feed, then dedupes and clusters, then
+writes, so the network-bound fetch and write never overlap. Here three
+stages run side by side, connected by bounded queues of
+REFRESH_PIPELINE_QUEUE batches (a slow stage holds the others back instead
+of letting memory pile up):
+
+  fetch   rss_adapter.iter_feed_batches: one batch per feed in config
+          order, with the downloads running in parallel underneath
+  enrich  Google News link resolution, link dedupe, near-duplicate
+          clustering per chunk of REFRESH_PIPELINE_CHUNK articles plus a
+          streaming check against earlier chunks (dedupe.NearDupIndex)
+  write   write_to_supabase per chunk (outbox, upsert on link)
+
+The first chunk is written while later feeds are still downloading. Across
+chunks the first copy of a story wins (it may already be written), and so
+does a copy another shard has stored; within a chunk the usual canonical
+choice applies. Later copies are still listed in the winner's
+`alternates`; a winner written before a later chunk added to its list is
+upserted once more after the last chunk, so the stored row has them all
+(rows other shards stored are left alone: only their ids and titles are
+loaded). Because the winner depends on feed order rather than on
+dedupe._canonical_rank, the pipeline is opt-in (REFRESH_PIPELINE=true).
+Each stage reports its busy time, the time it was blocked on a full queue
+and when it finished; a refresh takes about as long as its slowest stage
+instead of their sum.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    URL_RESOLVE_ENABLED, NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD,
+    REFRESH_PIPELINE_CHUNK, REFRESH_PIPELINE_QUEUE,
+)
+from .adapters.rss_adapter import iter_feed_batches, resolve_gnews_items
+from .article import Article
+from .dedupe import NearDupIndex, cluster_near_duplicates
+from .fetch_news import stored_near_dup_index
+
+__all__ = ["run_news_pipeline"]
+
+_DONE = object()
+
+
+class _Revised(list):
+    """Articles already written whose alternates grew since: upserted again, not new."""
+
+
+class _Stage:
+    def __init__(self, name: str, t0: float):
+        self.name = name
+        self.t0 = t0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.batches = 0
+        self.first: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[BaseException] = None
+
+    def put(self, q: queue.Queue, item) -> None:
+        t = time.perf_counter()
+        q.put(item)
+        self.blocked += time.perf_counter() - t
+
+    def work(self, fn, *args):
+        t = time.perf_counter()
+        if self.first is None:
+            self.first = t
+        try:
+            return fn(*args)
+        finally:
+            self.busy += time.perf_counter() - t
+            self.batches += 1
+
+    def report(self) -> Dict:
+        rel = lambda t: round(t - self.t0, 2) if t is not None else None
+        return {"busy_s": round(self.busy, 2), "blocked_s": round(self.blocked, 2),
+                "batches": self.batches, "started_s": rel(self.first), "finished_s": rel(self.finished)}
+
+
+def _consume(stage: _Stage, inbox: queue.Queue, handle, abort: threading.Event) -> None:
+    """Feed every batch from `inbox` to handle() until _DONE; after a failure, only drain."""
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            return
+        if stage.error is not None:
+            continue  # keep draining so the stage before us can finish
+        try:
+            stage.work(handle, item)
+        except Exception as e:
+            stage.error = e
+            abort.set()
+            print(f"[PIPELINE] {stage.name} stage failed: {e}")
+
+
+def run_news_pipeline(days_limit: int, force: bool = False) -> Tuple[List[Article], Dict]:
+    """
+    Fetch, enrich and write the due feeds as a pipeline. Returns the kept
+    articles and {"written", "revised", "backend_errors", "backend_sample",
+    "stages", "wall_s", "near_dups"}; "revised" counts the rows upserted
+    again for their alternates. If a stage fails after chunks were written,
+    returns those articles with the error in "error"; if nothing was
+    written yet, raises it.
+    """
+    t0 = time.perf_counter()
+    fetch, enrich, write = (_Stage(n, t0) for n in ("fetch", "enrich", "write"))
+    to_enrich: queue.Queue = queue.Queue(maxsize=max(1, REFRESH_PIPELINE_QUEUE))
+    to_write: queue.Queue = queue.Queue(maxsize=max(1, REFRESH_PIPELINE_QUEUE))
+    abort = threading.Event()
+
+    kept: List[Article] = []
+    seen = set()
+    pending: List[Article] = []
+    # with several shards, seeded with the stories the others already stored
+    index = stored_near_dup_index(days_limit)
+    if index is None:
+        index = NearDupIndex(threshold=NEAR_DUP_THRESHOLD)
+    ours = set()      # id() of the articles this run sent to the write stage
+    revised: Dict[int, Article] = {}
+    out = {"written": 0, "revised": 0, "backend_errors": [], "backend_sample": None, "near_dups": 0}
+    chunk_size = max(1, REFRESH_PIPELINE_CHUNK)
+
+    # ---- enrich ----
+    def emit(chunk: List[Article]) -> None:
+        n = len(chunk)
+        if NEAR_DUP_ENABLED:
+            fresh = []
+            for a in cluster_near_duplicates(chunk, threshold=NEAR_DUP_THRESHOLD):
+                first = index.match(a)
+                if first is None:
+                    fresh.append(a)
+                else:
+                    # same as cluster_near_duplicates, but the copy written first stays canonical
+                    first.alternates.append({"Title": a.title, "Link": a.link, "Source": a.source})
+                    first.alternates.extend(a.alternates)
+                    if id(first) in ours:
+                        revised[id(first)] = first  # its chunk may be written already
+            chunk = fresh
+        out["near_dups"] += n - len(chunk)
+        ours.update(id(a) for a in chunk)
+        if chunk:
+            enrich.put(to_write, chunk)
+
+    def enrich_batch(batch: List[Article]) -> None:
+        if URL_RESOLVE_ENABLED:
+            resolve_gnews_items(batch)
+        for a in batch:
+            key = a.link.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                pending.append(a)
+        while len(pending) >= chunk_size:
+            emit(pending[:chunk_size])
+            del pending[:chunk_size]
+
+    def run_enrich() -> None:
+        try:
+            _consume(enrich, to_enrich, enrich_batch, abort)
+            if enrich.error is None and pending:
+                enrich.work(emit, list(pending))
+            if enrich.error is None and revised:
+                enrich.put(to_write, _Revised(revised.values()))
+        except Exception as e:
+            enrich.error = e
+            abort.set()
+        finally:
+            enrich.finished = time.perf_counter()
+            to_write.put(_DONE)
+
+    # ---- write ----
+    def write_chunk(chunk: List[Article]) -> None:
+        from .supabase_writer import write_to_supabase
+        written, errs, sample = write_to_supabase(chunk)
+        if isinstance(chunk, _Revised):
+            out["revised"] += written
+        else:
+            kept.extend(chunk)  # stored, or queued in the outbox
+            out["written"] += written
+        out["backend_errors"] += errs
+        out["backend_sample"] = out["backend_sample"] or sample
+
+    def run_write() -> None:
+        try:
+            _consume(write, to_write, write_chunk, abort)
+        finally:
+            write.finished = time.perf_counter()
+
+    threads = [threading.Thread(target=run_enrich, name="pipeline-enrich", daemon=True),
+               threading.Thread(target=run_write, name="pipeline-write", daemon=True)]
+    for t in threads:
+        t.start()
+
+    # ---- fetch (this thread) ----
+    batches = iter_feed_batches(days_limit=days_limit, force=force)
+    try:
+        while not abort.is_set():
+            batch = fetch.work(next, batches, None)
+            if batch is None:
+                fetch.batches -= 1  # the end-of-feeds call
+                break
+            if batch:
+                fetch.put(to_enrich, batch)
+    except Exception as e:
+        fetch.error = e
+        abort.set()
+    finally:
+        fetch.finished = time.perf_counter()
+        to_enrich.put(_DONE)
+        batches.close()  # after an abort: lets the feed downloads still in flight finish
+        for t in threads:
+            t.join()
+
+    error = next((s.error for s in (fetch, enrich, write) if s.error is not None), None)
+    if error is not None:
+        if not kept:
+            raise error
+        # the written chunks are in the backend: the caller must still index them
+        out["error"] = f"{type(error).__name__}: {error}"
+
+    wall = time.perf_counter() - t0
+    stages = {s.name: s.report() for s in (fetch, enrich, write)}
+    out.update({"stages": stages, "wall_s": round(wall, 2)})
+    print(f"[PIPELINE] {len(kept)} articles ({out['near_dups']} near-duplicates dropped), "
+          f"{out['written']} written in {wall:.1f}s; busy: "
+          + ", ".join(f"{s} {v['busy_s']}s" for s, v in stages.items()))
+    return kept, out
@@ -0,0 +1,183 @@
+# back/reclassify.py
+"""
+Bulk re-classification of stored articles.
+
+topic / keywords / region are computed once at ingest time. After a change
+to TITLE_KEYWORDS_ANY / _ALL or the region patterns, this job re-tags the
+whole `news` table without re-scraping:
+
+  * rows are read in keyset pages (id > last_id, ordered by id) of
+    RECLASSIFY_BATCH, so memory stays at one page
+  * tags are recomputed with the ingest functions
+    (rss_adapter._title_matches_and_keywords / _infer_regions_title_first)
+  * only rows whose tags changed are written back, one bulk upsert per page
+  * the last id is checkpointed to RECLASSIFY_STATE_PATH after each page; a
+    new run resumes there unless the rules changed or restart=True
+
+    python -m back.reclassify [--restart] [--dry-run] [--batch-size N]
+
+Also exposed as POST /refresh/reclassify.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from .config import (
+    SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_TABLE,
+    TITLE_KEYWORDS_ANY, TITLE_KEYWORDS_ALL,
+    RECLASSIFY_BATCH, RECLASSIFY_STATE_PATH,
+)
+from .adapters.rss_adapter import (
+    _title_matches_and_keywords, _infer_regions_title_first, _pick_primary_region,
+    _REGION_PATTERNS, _REGION_PRIORITY,
+)
+
+__all__ = ["reclassify", "retag"]
+
+REST = f"{SUPABASE_URL.rstrip('/')}/rest/v1"
+HEADERS = {
+    "apikey": SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=minimal,resolution=merge-duplicates",
+}
+SELECT = "id,title,link,source,published,keywords,region,topic"
+
+
+def _rules_version() -> str:
+    """Changes whenever the keyword or region rules change."""
+    rules = [TITLE_KEYWORDS_ANY, TITLE_KEYWORDS_ALL, _REGION_PATTERNS, _REGION_PRIORITY]
+    return hashlib.blake2b(json.dumps(rules, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def retag(row: Dict) -> Optional[Dict]:
+    """The row with recomputed topic/keywords/region, or None if nothing changed."""
+    title = row.get("title") or ""
+    _keep, matched = _title_matches_and_keywords(title)
+    regions = _infer_regions_title_first(title, row.get("source") or "", row.get("link") or "")
+    new = {
+        "topic": matched,
+        "keywords": ", ".join(matched) or "Energy",   # same fallback as Article.to_row
+        "region": _pick_primary_region(regions),
+    }
+    old_topic = row.get("topic") if isinstance(row.get("topic"), list) else []
+    if (old_topic == new["topic"] and (row.get("keywords") or "") == new["keywords"]
+            and (row.get("region") or "") == new["region"]):
+        return None
+    out = {k: row.get(k) for k in ("title", "link", "source", "published")}
+    out.update(new)
+    return out
+
+
+def _load_state() -> Dict:
+    try:
+        with open(RECLASSIFY_STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_state(state: Dict) -> None:
+    os.makedirs(os.path.dirname(RECLASSIFY_STATE_PATH) or ".", exist_ok=True)
+    tmp = f"{RECLASSIFY_STATE_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, RECLASSIFY_STATE_PATH)
+
+
+def _page(session: requests.Session, last_id, limit: int) -> List[Dict]:
+    params = {"select": SELECT, "order": "id.asc", "limit": str(limit)}
+    if last_id is not None:
+        params["id"] = f"gt.{last_id}"
+    r = session.get(f"{REST}/{SUPABASE_TABLE}", headers=HEADERS, params=params, timeout=30)
+    r.raise_for_status()
+    return r.json() if r.text else []
+
+
+def _write(session: requests.Session, rows: List[Dict]) -> None:
+    r = session.post(
+        f"{REST}/{SUPABASE_TABLE}",
+        headers=HEADERS,
+        params={"on_conflict": "link"},
+        data=json.dumps(rows),
+        timeout=60,
+    )
+    if r.status_code >= 400:
+        raise RuntimeError(f"upsert {r.status_code}: {r.text[:300]}")
+
+
+def reclassify(restart: bool = False, dry_run: bool = False,
+               batch_size: int = RECLASSIFY_BATCH, max_pages: Optional[int] = None) -> Dict:
+    """
+    Re-tag stored rows page by page, resuming from the checkpoint.
+    Returns scanned/changed counts (cumulative over resumed runs), this
+    run's pages and run_changed, and whether the table is done.
+    """
+    version = _rules_version()
+    state = {} if (restart or dry_run) else _load_state()
+    if state.get("rules") != version:
+        state = {}
+    if state.get("done"):
+        print(f"[RECLASSIFY] Already done for rules {version} (use restart to run again)")
+        return {**state, "status": "up-to-date"}
+    if not state:
+        state = {"rules": version, "last_id": None, "scanned": 0, "changed": 0,
+                 "started_at": time.time(), "done": False}
+    elif not dry_run:
+        print(f"[RECLASSIFY] Resuming after id {state['last_id']} ({state['scanned']} rows scanned)")
+
+    t0 = time.perf_counter()
+    pages = run_changed = 0
+    with requests.Session() as session:
+        while max_pages is None or pages < max_pages:
+            rows = _page(session, state["last_id"], batch_size)
+            if not rows:
+                state["done"] = True
+                break
+            changed = [c for c in (retag(r) for r in rows) if c is not None]
+            if changed and not dry_run:
+                _write(session, changed)
+            pages += 1
+            state["last_id"] = rows[-1]["id"]
+            state["scanned"] += len(rows)
+            state["changed"] += len(changed)
+            run_changed += len(changed)
+            if not dry_run:
+                _save_state(state)
+            print(f"[RECLASSIFY] Page {pages}: {len(rows)} rows, {len(changed)} changed "
+                  f"(total {state['scanned']} / {state['changed']})")
+            if len(rows) < batch_size:
+                state["done"] = True
+                break
+    if not dry_run:
+        _save_state(state)
+
+    took = time.perf_counter() - t0
+    print(f"[RECLASSIFY] {'Dry run' if dry_run else 'Run'} finished in {took:.1f}s: "
+          f"{state['scanned']} scanned, {state['changed']} changed, done={state['done']}")
+    return {**state, "status": "done" if state["done"] else "partial",
+            "pages": pages, "run_changed": run_changed, "seconds": round(took, 1), "dry_run": dry_run}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first row")
+    ap.add_argument("--dry-run", action="store_true", help="count changes without writing")
+    ap.add_argument("--batch-size", type=int, default=RECLASSIFY_BATCH)
+    ap.add_argument("--max-pages", type=int, default=None)
+    args = ap.parse_args(argv)
+    reclassify(restart=args.restart, dry_run=args.dry_run,
+               batch_size=max(1, args.batch_size), max_pages=args.max_pages)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# back/retention.py
+"""
+Retention job for the `news` and `events` tables.
+
+DAYS_LIMIT only filters at ingest, so both tables used to grow forever.
+This job removes what the policy in config.py says has expired:
+
+  * news rows published more than RETENTION_NEWS_DAYS ago (undated rows:
+    stored more than RETENTION_NEWS_DAYS ago, by inserted_at)
+  * events that ended (ends_on, else starts_on) more than
+    RETENTION_EVENTS_DAYS ago
+  * news_tombstones older than RETENTION_TOMBSTONE_DAYS
+
+Work is done in batches of RETENTION_BATCH rows (oldest ids first) with a
+pause of RETENTION_BATCH_INTERVAL_S between batches and at most
+RETENTION_MAX_BATCHES per table per run. Each batch is selected, optionally
+archived, then deleted by id, so an interrupted run loses nothing and the
+next one simply continues. With RETENTION_MODE=archive every batch is first
+written to RETENTION_ARCHIVE_DIR/<table>/<first>-<last>.jsonl.gz (a re-run
+of the same batch overwrites its file). Deleted news rows get tombstones
+from the trigger in sql/news_tombstones.sql.
+
+    python -m back.retention [--dry-run] [--table news|events|news_tombstones]
+
+Also exposed as POST /refresh/retention.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+from .config import (
+    SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_TABLE, TOMBSTONE_TABLE,
+    RETENTION_MODE, RETENTION_NEWS_DAYS, RETENTION_EVENTS_DAYS, RETENTION_TOMBSTONE_DAYS,
+    RETENTION_BATCH, RETENTION_BATCH_INTERVAL_S, RETENTION_MAX_BATCHES, RETENTION_ARCHIVE_DIR,
+)
+
+__all__ = ["run_retention", "policies"]
+
+REST = f"{SUPABASE_URL.rstrip('/')}/rest/v1"
+HEADERS = {
+    "apikey": SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=minimal",
+}
+
+
+def policies(today: Optional[date] = None) -> Dict[str, Dict]:
+    """table -> {"filter": PostgREST filter params for expired rows, "archive": bool}."""
+    today = today or date.today()
+    out: Dict[str, Dict] = {}
+    if RETENTION_NEWS_DAYS > 0:
+        cutoff = (today - timedelta(days=RETENTION_NEWS_DAYS)).isoformat()
+        # published.lt never matches NULL, so undated rows age by inserted_at
+        out[SUPABASE_TABLE] = {
+            "filter": {"or": f"(published.lt.{cutoff},and(published.is.null,inserted_at.lt.{cutoff}))"},
+            "archive": True,
+        }
+    if RETENTION_EVENTS_DAYS > 0:
+        cutoff = (today - timedelta(days=RETENTION_EVENTS_DAYS)).isoformat()
+        out["events"] = {
+            "filter": {"or": f"(ends_on.lt.{cutoff},and(ends_on.is.null,starts_on.lt.{cutoff}))"},
+            "archive": True,
+        }
+    if RETENTION_TOMBSTONE_DAYS > 0:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=RETENTION_TOMBSTONE_DAYS)).isoformat()
+        out[TOMBSTONE_TABLE] = {"filter": {"deleted_at": f"lt.{cutoff}"}, "archive": False}
+    return out
+
+
+def _archive(table: str, rows: List[Dict]) -> str:
+    d = os.path.join(RETENTION_ARCHIVE_DIR, table)
+    os.makedirs(d, exist_ok=True)
+    path = os.path.join(d, f"{rows[0]['id']}-{rows[-1]['id']}.jsonl.gz")
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False, default=str))
+            f.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def _expired_batch(session: requests.Session, table: str, flt: Dict, select: str) -> List[Dict]:
+    params = {"select": select, "order": "id.asc", "limit": str(RETENTION_BATCH), **flt}
+    r = session.get(f"{REST}/{table}", headers=HEADERS, params=params, timeout=30)
+    r.raise_for_status()
+    return r.json() if r.text else []
+
+
+def _delete(session: requests.Session, table: str, ids: List) -> None:
+    quoted = ",".join(f'"{i}"' for i in ids)
+    r = session.delete(f"{REST}/{table}", headers=HEADERS, params={"id": f"in.({quoted})"}, timeout=60)
+    if r.status_code >= 400:
+        raise RuntimeError(f"delete from {table} {r.status_code}: {r.text[:300]}")
+
+
+def _run_table(session: requests.Session, table: str, policy: Dict, dry_run: bool) -> Dict:
+    archive = policy["archive"] and RETENTION_MODE == "archive"
+    stats = {"deleted": 0, "archived": 0, "batches": 0, "done": False, "files": []}
+    last_ids = None
+    while stats["batches"] < RETENTION_MAX_BATCHES:
+        rows = _expired_batch(session, table, policy["filter"], "*" if archive else "id")
+        if not rows:
+            stats["done"] = True
+            break
+        ids = [r["id"] for r in rows]
+        if dry_run:
+            # nothing gets deleted, so the same rows would come back: count one batch only
+            stats["expired"] = len(ids)
+            stats["done"] = len(rows) < RETENTION_BATCH
+            break
+        if ids == last_ids:
+            raise RuntimeError(f"rows in {table} were not deleted (check the service key / RLS)")
+        if archive:
+            stats["files"].append(_archive(table, rows))
+            stats["archived"] += len(rows)
+        _delete(session, table, ids)
+        last_ids = ids
+        stats["deleted"] += len(ids)
+        stats["batches"] += 1
+        if len(rows) < RETENTION_BATCH:
+            stats["done"] = True
+            break
+        time.sleep(RETENTION_BATCH_INTERVAL_S)  # keep the load on the database low
+    stats["files"] = len(stats["files"])
+    return stats
+
+
+def run_retention(tables: Optional[List[str]] = None, dry_run: bool = False) -> Dict:
+    """Apply the retention policy; returns per-table stats. `done` False = more left for the next run."""
+    pol = policies()
+    if tables:
+        pol = {t: p for t, p in pol.items() if t in tables}
+    out: Dict[str, Dict] = {}
+    t0 = time.perf_counter()
+    with requests.Session() as session:
+        for table, policy in pol.items():
+            try:
+                out[table] = _run_table(session, table, policy, dry_run)
+            except Exception as e:
+                out[table] = {"error": str(e)}
+            print(f"[RETENTION] {table}: {out[table]}")
+    print(f"[RETENTION] {'Dry run' if dry_run else 'Run'} finished in {time.perf_counter() - t0:.1f}s")
+    return {"mode": RETENTION_MODE, "dry_run": dry_run, "tables": out}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dry-run", action="store_true", help="count the first batch per table, change nothing")
+    ap.add_argument("--table", action="append", help="limit to this table (repeatable)")
+    args = ap.parse_args(argv)
+    res = run_retention(tables=args.table, dry_run=args.dry_run)
+    return 1 if any("error" in t for t in res["tables"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
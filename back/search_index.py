@@ -0,0 +1,226 @@
+# back/search_index.py
+"""
+In-memory inverted index over articles (title, summary, keywords, source),
+ranked with BM25. Used by GET /articles/search.
+
+The index is loaded once from the backend on first search and then updated
+incrementally with the rows written by each /refresh, so queries never touch
+Supabase. The last query token is prefix-expanded for type-ahead.
+
+Each worker holds its own index, and only the one that ran the refresh sees
+its rows. The index therefore remembers the version of the articles snapshot
+it matches; a worker that finds a newer snapshot rebuilds its index once.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .article import Article
+
+__all__ = ["SearchIndex", "INDEX", "tokenize", "ensure_loaded"]
+
+# BM25 parameters (standard defaults)
+K1 = 1.2
+B = 0.75
+
+# Field weights: a title hit counts more than a summary hit
+FIELD_WEIGHTS = (
+    ("title", 2),
+    ("summary", 1),
+    ("keywords", 1),
+    ("source", 1),
+)
+
+# Cap on how many vocabulary terms a prefix may expand to
+MAX_PREFIX_EXPANSION = 50
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip accents, split on anything that isn't a letter/digit."""
+    if not text:
+        return []
+    t = unicodedata.normalize("NFKD", text)
+    t = "".join(ch for ch in t if not unicodedata.combining(ch)).lower()
+    return _TOKEN_RE.findall(t)
+
+
+def _doc_id(a: Article) -> str:
+    return (a.link or str(a.id or "")).strip()
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Article] = {}           # doc_id -> article
+        self._doc_terms: Dict[str, Dict[str, int]] = {}  # doc_id -> {term: tf}
+        self._doc_len: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}   # term -> {doc_id: tf}
+        self._total_len = 0
+        self._vocab: Optional[List[str]] = None       # sorted terms, rebuilt lazily
+        self._norm: Optional[Dict[str, float]] = None  # doc_id -> BM25 length norm, rebuilt lazily
+        self.loaded = False
+        self.version: Optional[int] = None  # articles snapshot version the contents match
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ---------- writes ----------
+    def _remove_locked(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            plist = self._postings.get(term)
+            if plist is None:
+                continue
+            plist.pop(doc_id, None)
+            if not plist:
+                del self._postings[term]
+                self._vocab = None
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        self._docs.pop(doc_id, None)
+        self._norm = None
+
+    def _add_locked(self, doc_id: str, article: Article) -> None:
+        tf: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS:
+            for tok in tokenize(getattr(article, field) or ""):
+                tf[tok] = tf.get(tok, 0) + weight
+        length = sum(tf.values())
+        self._docs[doc_id] = article
+        self._doc_terms[doc_id] = tf
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        self._norm = None
+        for term, n in tf.items():
+            plist = self._postings.get(term)
+            if plist is None:
+                plist = self._postings[term] = {}
+                self._vocab = None
+            plist[doc_id] = n
+
+    def upsert(self, articles: Iterable[Article]) -> int:
+        """Add or replace articles (keyed by link). Returns how many were indexed."""
+        n = 0
+        with self._lock:
+            for a in articles or []:
+                doc_id = _doc_id(a)
+                if not doc_id:
+                    continue
+                self._remove_locked(doc_id)
+                self._add_locked(doc_id, a)
+                n += 1
+        return n
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids or []:
+                self._remove_locked(doc_id)
+
+    def replace_all(self, articles: Iterable[Article], version: Optional[int] = None) -> int:
+        """Build a new index aside and swap it in; searches meanwhile see the old one."""
+        fresh = SearchIndex()
+        n = fresh.upsert(articles)
+        with self._lock:
+            self._docs, self._doc_terms, self._doc_len = fresh._docs, fresh._doc_terms, fresh._doc_len
+            self._postings, self._total_len = fresh._postings, fresh._total_len
+            self._vocab = None
+            self._norm = None
+            self.version = version
+            self.loaded = True
+        return n
+
+    # ---------- reads ----------
+    def _expand_prefix_locked(self, prefix: str) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        vocab = self._vocab
+        out: List[str] = []
+        i = bisect_left(vocab, prefix)
+        while i < len(vocab) and vocab[i].startswith(prefix) and len(out) < MAX_PREFIX_EXPANSION:
+            out.append(vocab[i])
+            i += 1
+        return out
+
+    def _norms_locked(self) -> Dict[str, float]:
+        if self._norm is None:
+            avg_len = (self._total_len / len(self._docs)) or 1.0
+            self._norm = {
+                doc_id: K1 * (1 - B + B * n / avg_len)
+                for doc_id, n in self._doc_len.items()
+            }
+        return self._norm
+
+    def _score_term_locked(self, term: str, n_docs: int, norms: Dict[str, float]) -> Dict[str, float]:
+        plist = self._postings.get(term)
+        if not plist:
+            return {}
+        df = len(plist)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * (K1 + 1)
+        return {doc_id: idf * tf / (tf + norms[doc_id]) for doc_id, tf in plist.items()}
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[Article]:
+        """
+        BM25 search. When prefix=True and the query doesn't end in whitespace,
+        the last token matches every indexed term that starts with it
+        (e.g. 'hydro' → 'hydrogen', 'hydropower').
+        """
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+
+        last_is_prefix = prefix and not query[-1:].isspace()
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            norms = self._norms_locked()
+            scores: Dict[str, float] = {}
+
+            exact = tokens[:-1] if last_is_prefix else tokens
+            for term in dict.fromkeys(exact):
+                for doc_id, s in self._score_term_locked(term, n_docs, norms).items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + s
+
+            if last_is_prefix:
+                # best expansion per doc, so a prefix can't out-score a full word
+                best: Dict[str, float] = {}
+                for term in self._expand_prefix_locked(tokens[-1]):
+                    for doc_id, s in self._score_term_locked(term, n_docs, norms).items():
+                        if s > best.get(doc_id, 0.0):
+                            best[doc_id] = s
+                for doc_id, s in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + s
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+            return [self._docs[doc_id] for doc_id, _ in top]
+
+
+INDEX = SearchIndex()
+_load_lock = threading.Lock()
+
+
+def _stale(version: Optional[int]) -> bool:
+    return not INDEX.loaded or (version is not None and version != INDEX.version)
+
+
+def ensure_loaded(loader: Callable[[], List[Article]], version: Optional[int] = None) -> SearchIndex:
+    """
+    Build the index from `loader()` on first use, or again when `version`
+    (the current articles snapshot) differs from the one it was built for.
+    Concurrent callers wait for a single build.
+    """
+    if _stale(version):
+        with _load_lock:
+            if _stale(version):
+                INDEX.replace_all(loader(), version=version)
+                print(f"[SEARCH] Indexed {len(INDEX)} articles" + (f" (snapshot v{version})" if version else ""))
+    return INDEX
@@ -0,0 +1,73 @@
+# back/sharding.py
+"""
+Split ingest work (RSS feeds, ACA event sources) across several nodes.
+
+Each node runs with SHARD_INDEX / SHARD_COUNT and only fetches and writes
+the sources it owns. Ownership uses rendezvous (highest-random-weight)
+hashing on the source URL, so a source's owner depends only on its own key
+and the shard count: adding or removing feeds never moves the others.
+
+SHARD_ASSIGNMENTS_FILE can pin sources explicitly, e.g.
+    {"0": ["Reuters (GNews)"], "1": ["https://powerphilippines.com/feed/"]}
+(keys are shard indexes, values are feed names or URLs); everything not
+listed falls back to hashing.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from .config import SHARD_INDEX, SHARD_COUNT, SHARD_ASSIGNMENTS_FILE
+
+__all__ = ["owner_of", "owns", "select", "describe", "SHARD_INDEX", "SHARD_COUNT"]
+
+T = TypeVar("T")
+
+_assignments: Optional[Dict[str, int]] = None
+
+
+def _load_assignments() -> Dict[str, int]:
+    global _assignments
+    if _assignments is None:
+        _assignments = {}
+        if SHARD_ASSIGNMENTS_FILE:
+            try:
+                with open(SHARD_ASSIGNMENTS_FILE, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                for shard, keys in raw.items():
+                    for k in keys or []:
+                        _assignments[str(k).strip().lower()] = int(shard)
+            except Exception as e:
+                print(f"[SHARD] Could not read {SHARD_ASSIGNMENTS_FILE}: {e}")
+    return _assignments
+
+
+def _weight(key: str, shard: int) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{shard}:{key}".encode(), digest_size=8).digest(), "big")
+
+
+def owner_of(*keys: str, count: int = SHARD_COUNT) -> int:
+    """Shard that owns a source; `keys` are its identifiers (URL first, then name)."""
+    if count <= 1:
+        return 0
+    pinned = _load_assignments()
+    for k in keys:
+        shard = pinned.get((k or "").strip().lower())
+        if shard is not None and 0 <= shard < count:
+            return shard
+    key = (keys[0] if keys else "").strip().lower()
+    return max(range(count), key=lambda s: _weight(key, s))
+
+
+def owns(*keys: str) -> bool:
+    return owner_of(*keys) == SHARD_INDEX
+
+
+def select(items: Iterable[T], keys: Callable[[T], Sequence[str]]) -> List[T]:
+    """The items this node owns; `keys(item)` returns (url, name, ...)."""
+    return [it for it in items if owns(*keys(it))]
+
+
+def describe() -> dict:
+    return {"index": SHARD_INDEX, "count": SHARD_COUNT}
@@ -0,0 +1,148 @@
+# back/singleflight.py
+"""
+Single-flight coordination for refresh runs.
+
+A cron job and a manual trigger often hit POST /refresh (or /refresh/events)
+at the same time. Concurrent calls of the same kind now join the run that
+is already in flight and get its result instead of fetching every feed (or
+launching Chromium) again:
+
+  * inside one process, joiners wait on the leader's Future
+  * across uvicorn workers, an flock() on REFRESH_LOCK_DIR/<kind>.lock
+    serializes runs; a worker that had to wait for the lock returns the
+    result the other worker just wrote instead of running again
+
+`min_interval` seconds after a run finishes, new calls get that last result
+back without running at all.
+
+A `force=True` call only joins another forced run. If the run in flight is
+a normal one (which may skip feeds that aren't due), it waits for that run
+to finish and then runs itself.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only; elsewhere coordination is per-process
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .config import REFRESH_LOCK_DIR
+
+__all__ = ["run_single_flight"]
+
+_lock = threading.Lock()
+_inflight: Dict[str, Tuple[Future, bool]] = {}   # kind -> (leader's Future, forced)
+
+
+def _result_path(kind: str) -> str:
+    return os.path.join(REFRESH_LOCK_DIR, f"{kind}.last.json")
+
+
+def _last_result(kind: str) -> Optional[dict]:
+    try:
+        with open(_result_path(kind), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _store_result(kind: str, started_at: float, result, force: bool) -> None:
+    tmp = f"{_result_path(kind)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"started_at": started_at, "finished_at": time.time(), "force": force, "result": result},
+                      f, default=str)
+        os.replace(tmp, _result_path(kind))
+    except Exception as e:
+        print(f"[SINGLEFLIGHT] Could not store {kind} result: {e}")
+
+
+def _tag(result, how: str):
+    if isinstance(result, dict):
+        return {**result, "coalesced": how}
+    return result
+
+
+def _run_with_file_lock(kind: str, fn: Callable[[], dict], requested_at: float, force: bool):
+    if fcntl is None:
+        return fn()
+
+    def usable(last, key):
+        # a forced call can't stand in for a normal run's result
+        return last and last.get(key, 0) >= requested_at and (last.get("force") or not force)
+
+    with open(os.path.join(REFRESH_LOCK_DIR, f"{kind}.lock"), "a+") as lf:
+        try:
+            fcntl.flock(lf, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # another worker is refreshing: wait for it and take its result
+            print(f"[SINGLEFLIGHT] {kind} refresh running in another process, waiting for it")
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            last = _last_result(kind)
+            if usable(last, "finished_at"):
+                return _tag(last.get("result"), "joined")
+        try:
+            # it may also have finished between our request and taking the lock
+            last = _last_result(kind)
+            if usable(last, "started_at"):
+                return _tag(last.get("result"), "joined")
+            started_at = time.time()
+            result = fn()
+            _store_result(kind, started_at, result, force)
+            return result
+        finally:
+            fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+def run_single_flight(kind: str, fn: Callable[[], dict], min_interval: float = 0, force: bool = False):
+    """
+    Run fn() unless a `kind` run is already in flight (join it) or one
+    finished less than `min_interval` seconds ago (return its result).
+    With `force`, only a forced run in flight is joined.
+    """
+    requested_at = time.time()
+    os.makedirs(REFRESH_LOCK_DIR, exist_ok=True)
+
+    if min_interval > 0 and not force:
+        last = _last_result(kind)
+        if last and requested_at - last.get("finished_at", 0) < min_interval:
+            print(f"[SINGLEFLIGHT] {kind} refreshed {requested_at - last['finished_at']:.0f}s ago, reusing result")
+            return _tag(last.get("result"), "recent")
+
+    while True:
+        with _lock:
+            entry = _inflight.get(kind)
+            if entry is None:
+                fut = Future()
+                _inflight[kind] = (fut, force)
+                break
+        other, other_forced = entry
+        if other_forced or not force:
+            print(f"[SINGLEFLIGHT] {kind} refresh already running, joining it")
+            return _tag(other.result(), "joined")
+        print(f"[SINGLEFLIGHT] {kind} refresh already running without force, running after it")
+        wait([other])
+
+    # leave _inflight before resolving, so a forced waiter that wakes up
+    # finds the slot free
+    try:
+        result = _run_with_file_lock(kind, fn, requested_at, force)
+    except BaseException as e:
+        _leave(kind)
+        fut.set_exception(e)
+        raise
+    _leave(kind)
+    fut.set_result(result)
+    return result
+
+
+def _leave(kind: str) -> None:
+    with _lock:
+        _inflight.pop(kind, None)
@@ -0,0 +1,167 @@
+# back/snapshot.py
+"""
+Cross-process snapshot of serialized API payloads.
+
+With several uvicorn workers, each one used to fetch and transform its own
+copy of /articles and /events. Instead, whoever refreshes (or the first
+worker to miss) publishes the already-encoded JSON into a file under
+SNAPSHOT_DIR, and every worker mmaps that file and serves a memoryview of
+it. The pages live once in the OS page cache no matter how many workers
+there are, and Supabase sees one read per publish instead of one per worker.
+
+File layout: 32-byte header (magic, version, published_at, length) + body.
+Publishing writes a temp file and os.replace()s it, so readers only ever
+see a complete snapshot; a reader notices a new one by its inode changing.
+
+read_or_build() lets one caller rebuild an expired snapshot at a time (a
+thread lock in-process, an flock on REFRESH_LOCK_DIR across workers);
+everyone else keeps serving the stale one until the new one is published.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+try:
+    import fcntl  # POSIX only; elsewhere rebuilds are coordinated per-process
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from .config import REFRESH_LOCK_DIR, SNAPSHOT_DIR
+
+__all__ = ["Snapshot", "publish", "read", "read_or_build", "json_bytes"]
+
+_MAGIC = b"ENGS"
+_HEADER = struct.Struct("<4sQdQ")   # magic, version, published_at, body length
+
+_lock = threading.Lock()
+_maps: Dict[str, tuple] = {}        # name -> (inode, mtime_ns, mmap, Snapshot)
+_build_locks: Dict[str, threading.Lock] = {}
+
+
+class Snapshot(NamedTuple):
+    version: int
+    published_at: float
+    body: memoryview
+
+
+def json_bytes(content: Any) -> bytes:
+    """Encode exactly like starlette's JSONResponse."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _path(name: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{name}.snap")
+
+
+def publish(name: str, body: bytes) -> int:
+    """Atomically replace snapshot `name` with `body`. Returns the new version."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    version = time.time_ns()
+    # per thread too: a refresh and a request thread may publish at the same time
+    tmp = f"{_path(name)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, version, time.time(), len(body)))
+        f.write(body)
+    os.replace(tmp, _path(name))
+    print(f"[SNAPSHOT] Published {name} v{version} ({len(body)} bytes)")
+    return version
+
+
+def read(name: str, max_age: Optional[float] = None) -> Optional[Snapshot]:
+    """
+    Current snapshot `name` as a zero-copy view, or None if there is none,
+    it is malformed, or it is older than `max_age` seconds.
+    """
+    path = _path(name)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        cached = _maps.get(name)
+        if cached and cached[0] == st.st_ino and cached[1] == st.st_mtime_ns:
+            snap = cached[3]
+        else:
+            try:
+                with open(path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+            if len(mm) < _HEADER.size:
+                return None
+            magic, version, published_at, length = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or _HEADER.size + length > len(mm):
+                return None
+            # the previous mmap is released once in-flight responses drop their views
+            snap = Snapshot(version, published_at, memoryview(mm)[_HEADER.size:_HEADER.size + length])
+            _maps[name] = (st.st_ino, st.st_mtime_ns, mm, snap)
+
+    if max_age is not None and time.time() - snap.published_at > max_age:
+        return None
+    return snap
+
+
+@contextmanager
+def _rebuild_lock(name: str, wait: bool):
+    # yields False if another process holds the lock and wait is False
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(REFRESH_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(REFRESH_LOCK_DIR, f"snapshot-{name}.lock"), "a+") as lf:
+        try:
+            fcntl.flock(lf, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+def read_or_build(
+    name: str,
+    build: Callable[[], bytes],
+    max_age: Optional[float] = None,
+    fresh: Optional[Callable[[Snapshot], bool]] = None,
+) -> Snapshot:
+    """
+    Snapshot `name`, republished from build() when it is missing, older than
+    `max_age` or not `fresh`. Only one thread/process rebuilds at a time; the
+    others get the stale snapshot meanwhile, or wait if there is none.
+    """
+    def usable(snap):
+        return snap is not None \
+            and (max_age is None or time.time() - snap.published_at <= max_age) \
+            and (fresh is None or fresh(snap))
+
+    stale = read(name)
+    if usable(stale):
+        return stale
+    with _lock:
+        lock = _build_locks.setdefault(name, threading.Lock())
+    if not lock.acquire(blocking=stale is None):
+        return stale  # another thread is rebuilding
+    try:
+        with _rebuild_lock(name, wait=stale is None) as held:
+            if not held:
+                return stale  # another worker is rebuilding
+            snap = read(name)
+            if usable(snap):
+                return snap  # rebuilt while we waited
+            body = build()
+            version = publish(name, body)
+            return read(name) or Snapshot(version, time.time(), memoryview(body))
+    finally:
+        lock.release()
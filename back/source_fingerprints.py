@@ -0,0 +1,69 @@
+# back/source_fingerprints.py
+"""
+Content fingerprints of scraped event sources, kept between runs.
+
+A fetcher hashes the part of a page it parses (e.g. the "Upcoming Energy
+Conferences" section) and compares it with the fingerprint stored for that
+source. On a match the source is skipped: no parsing, no upsert.
+
+Fetchers collect new fingerprints on their registry.SourceRun; ingest
+`save()`s them once every row was upserted (or queued in the outbox), so
+a failed or abandoned run is fetched in full again next time.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from .config import EVENTS_FINGERPRINT_PATH
+
+__all__ = ["fingerprint", "matches", "save"]
+
+# bump when the parsers change, so every source is parsed again once
+VERSION = "1"
+
+_lock = threading.Lock()
+_state: Optional[Dict[str, str]] = None
+
+
+def _load() -> Dict[str, str]:
+    global _state
+    if _state is None:
+        try:
+            with open(EVENTS_FINGERPRINT_PATH, "r", encoding="utf-8") as f:
+                _state = json.load(f)
+        except Exception:
+            _state = {}
+    return _state
+
+
+def fingerprint(text: str) -> str:
+    norm = re.sub(r"\s+", " ", text or "").strip()
+    return hashlib.blake2b(f"{VERSION}\n{norm}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def matches(source: str, fp: str) -> bool:
+    with _lock:
+        return bool(fp) and _load().get(source) == fp
+
+
+def save(fingerprints: Dict[str, str]) -> int:
+    """Persist new fingerprints (source key -> fingerprint); returns how many were saved."""
+    if not fingerprints:
+        return 0
+    with _lock:
+        state = _load()
+        state.update(fingerprints)
+        try:
+            os.makedirs(os.path.dirname(EVENTS_FINGERPRINT_PATH) or ".", exist_ok=True)
+            tmp = f"{EVENTS_FINGERPRINT_PATH}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=1)
+            os.replace(tmp, EVENTS_FINGERPRINT_PATH)
+        except Exception as e:
+            print(f"[EVENTS] Fingerprint save failed: {e}")
+        return len(fingerprints)
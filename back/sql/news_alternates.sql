@@ -0,0 +1,7 @@
+-- back/sql/news_alternates.sql
+-- Near-duplicate copies of a story (dedupe.cluster_near_duplicates keeps one
+-- canonical row and lists the others here as {"Title", "Link", "Source"}).
+-- Written by Article.to_row(), served as "Alternates" by /articles.
+-- Run once in the Supabase SQL editor, before news_frontend_view.sql.
+
+alter table public.news add column if not exists alternates jsonb not null default '[]'::jsonb;
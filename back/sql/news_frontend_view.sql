@@ -0,0 +1,74 @@
+-- back/sql/news_frontend_view.sql
+-- Frontend shape of `news` for GET /articles with ARTICLES_PASSTHROUGH=true.
+--
+-- Same mapping as Article.to_frontend() after supabase_reader._to_article
+-- (source falls back to the link's host, region to the host-suffix guess),
+-- so the API can send PostgREST's response bytes as they are. Keep the two
+-- in sync (back/tests/test_articles_passthrough.py checks the column list
+-- and the region guess). Run once in the Supabase SQL editor.
+--
+-- The API reads it through news_frontend_latest(max_rows) below, which
+-- makes get_article_records' selection in the query: the newest max_rows
+-- rows (published desc, nulls first, then id desc) taken from the
+-- published index, returned with undated rows last like its re-sort.
+-- "_published" and "_id" are the raw columns it orders by; they are never
+-- selected. The view has no window function, so the limit is pushed down
+-- instead of numbering the whole table on every read.
+
+-- dropped first: "or replace" can't remove the old "_rank" column
+drop view if exists public.news_frontend cascade;
+create view public.news_frontend
+with (security_invoker = true) as
+select
+  coalesce(n.title, '')                                         as "Title",
+  coalesce(n.link, '')                                          as "Link",
+  s.source                                                      as "Source",
+  coalesce(to_char(n.published, 'YYYY-MM-DD'), '')              as "PublishedAt",
+  coalesce(n.summary, '')                                       as "Summary",
+  case when jsonb_typeof(n.topic) = 'array' then n.topic
+       else '[]'::jsonb end                                     as "Topic",
+  coalesce(nullif(n.region, ''),
+    case
+      when position('.ph' in s.haystack) > 0 then 'Philippines'
+      when position('.sg' in s.haystack) > 0 then 'Singapore'
+      when position('.my' in s.haystack) > 0 then 'Malaysia'
+      when position('.id' in s.haystack) > 0 then 'Indonesia'
+      when position('.vn' in s.haystack) > 0 then 'Vietnam'
+      when position('.th' in s.haystack) > 0 then 'Thailand'
+      else 'Global'
+    end)                                                        as "Region",
+  coalesce(n.keywords, '')                                      as "Keywords",
+  false                                                         as "Bookmarked",
+  -- link, else the row id (a number, as in Python), else ""
+  case when coalesce(n.link, '') <> '' then to_jsonb(n.link)
+       when n.id is not null then to_jsonb(n.id)
+       else to_jsonb(''::text) end                              as "id",
+  case when jsonb_typeof(n.alternates) = 'array' then n.alternates
+       else '[]'::jsonb end                                     as "Alternates",
+  n.published                                                   as "_published",
+  n.id                                                          as "_id"
+from public.news n
+cross join lateral (
+  select src as source, lower(src || ' ' || coalesce(n.link, '')) as haystack
+  from (select coalesce(nullif(n.source, ''),
+                        substring(n.link from '^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)'),
+                        '') as src) x
+) s;
+
+-- GET /rest/v1/rpc/news_frontend_latest?select=Title,Link&max_rows=1000
+create or replace function public.news_frontend_latest(max_rows integer default 1000)
+returns setof public.news_frontend
+language sql stable security invoker as $$
+  select * from (
+    select * from public.news_frontend
+    order by "_published" desc nulls first, "_id" desc
+    limit max_rows
+  ) latest
+  order by "_published" desc nulls last, "_id" desc
+$$;
+
+-- for the limit above (desc indexes default to nulls first)
+create index if not exists news_published_id_idx on public.news (published desc, id desc);
+
+grant select on public.news_frontend to anon, authenticated, service_role;
+grant execute on function public.news_frontend_latest(integer) to anon, authenticated, service_role;
@@ -0,0 +1,52 @@
+-- back/sql/news_tombstones.sql
+-- Delta sync support for GET /articles/changes.
+--
+-- Changes are read ordered by (updated_at, id); deleted rows leave a
+-- tombstone so clients can drop them, read ordered by (deleted_at, id).
+-- Both timestamps are stamped with clock_timestamp() when the row is
+-- written, but the row only becomes visible when its transaction commits,
+-- so a slow writer can commit a row stamped earlier than rows a client has
+-- already paged past. The API therefore only hands out rows older than
+-- CHANGES_SAFETY_LAG_S; keep statement_timeout for writers below that.
+-- Run once in the Supabase SQL editor.
+
+create index if not exists news_updated_at_id_idx on public.news (updated_at, id);
+
+-- stamp updated_at on every insert and update (upserts included)
+create or replace function public.news_touch_updated_at() returns trigger
+language plpgsql as $$
+begin
+  new.updated_at := clock_timestamp();
+  return new;
+end $$;
+
+drop trigger if exists news_touch_updated_at on public.news;
+-- rows written before the trigger existed: give them a timestamp to page on
+update public.news set updated_at = coalesce(inserted_at, now()) where updated_at is null;
+alter table public.news alter column updated_at set default clock_timestamp();
+create trigger news_touch_updated_at
+  before insert or update on public.news
+  for each row execute function public.news_touch_updated_at();
+
+create table if not exists public.news_tombstones (
+  id          bigint generated always as identity primary key,
+  news_id     text,
+  link        text not null,
+  deleted_at  timestamptz not null default clock_timestamp()
+);
+alter table public.news_tombstones alter column deleted_at set default clock_timestamp();
+drop index if exists public.news_tombstones_deleted_at_idx;
+create index if not exists news_tombstones_deleted_at_id_idx on public.news_tombstones (deleted_at, id);
+
+-- every delete (retention job, manual cleanup) records a tombstone
+create or replace function public.news_record_tombstone() returns trigger
+language plpgsql as $$
+begin
+  insert into public.news_tombstones (news_id, link) values (old.id::text, old.link);
+  return old;
+end $$;
+
+drop trigger if exists news_record_tombstone on public.news;
+create trigger news_record_tombstone
+  after delete on public.news
+  for each row execute function public.news_record_tombstone();
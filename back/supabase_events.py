@@ -1,19 +1,63 @@
 # back/supabase_events.py
 from __future__ import annotations
-import os, math
-from typing import List, Dict, Tuple
+import os, math, threading, time
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
 from datetime import date
-from supabase import create_client, Client
 
-__all__ = ["upsert_events", "fetch_upcoming_events"]
+if TYPE_CHECKING:
+    from supabase import Client
+
+from . import outbox, snapshot
+from .config import SNAPSHOT_ENABLED, EVENTS_CACHE_TTL_S
+
+__all__ = ["upsert_events", "send_batch", "fetch_upcoming_events", "invalidate_events_cache"]
 
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")
 
+_CLIENT: Optional[Client] = None
+
 def _client() -> Client:
-    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-        raise RuntimeError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY")
-    return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    # one client per process; create_client is not cheap
+    global _CLIENT
+    if _CLIENT is None:
+        if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+            raise RuntimeError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY")
+        from supabase import create_client  # heavy; imported on first use
+        _CLIENT = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    return _CLIENT
+
+# ---------- upcoming-events cache ----------
+# Keyed by the query filters; entries expire after EVENTS_CACHE_TTL_S. Cleared
+# by /refresh/events, whenever the local date changes (the `starts_on >= today`
+# cutoff moves at midnight) and when another worker published a new events
+# snapshot, which is how its refresh becomes visible here. Each clear bumps
+# the generation, so a query that started before it doesn't store its rows.
+_CACHE_MAX_KEYS = 128
+_cache_lock = threading.Lock()
+_cache: Dict[tuple, Tuple[float, List[Dict]]] = {}
+_cache_day: Optional[str] = None
+_cache_snapshot: Optional[int] = None
+_cache_gen = 0
+
+def _clear_locked() -> None:
+    global _cache_gen
+    _cache.clear()
+    _cache_gen += 1
+
+def invalidate_events_cache() -> None:
+    with _cache_lock:
+        _clear_locked()
+
+def _snapshot_version() -> Optional[int]:
+    if not SNAPSHOT_ENABLED:
+        return None
+    snap = snapshot.read("events")
+    return snap.version if snap is not None else None
+
+def _like_literal(s: str) -> str:
+    # ilike pattern matching `s` only: escape LIKE's wildcards (PostgREST reads * as % too)
+    return "".join("\\" + ch if ch in "\\%_*" else ch for ch in s)
 
 def _norm(s: str | None) -> str:
     return (s or "").strip().lower()
@@ -24,14 +68,46 @@ def _key(row: Dict) -> tuple[str, str, str]:
             _norm(row.get("region")),
             (row.get("starts_on") or "").strip())
 
-def upsert_events(rows: List[Dict]) -> Tuple[int, int]:
+def _dedupe(rows: List[Dict]) -> List[Dict]:
+    seen = set()
+    out: List[Dict] = []
+    for r in rows:
+        k = _key(r)
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(r)
+    return out
+
+def send_batch(rows: List[Dict]) -> int:
+    """One upsert call for cleaned rows; raises on failure (outbox.PermanentError for bad data)."""
+    try:
+        resp = _client().table("events").upsert(
+            _dedupe(rows),  # replayed outbox batches can overlap
+            on_conflict="dedupe_key",
+            ignore_duplicates=True  # extra safety vs existing rows
+        ).execute()
+    except Exception as e:
+        # PostgREST APIError carries the Postgres SQLSTATE: classes 22/23/42
+        # (bad data, constraint, schema) fail the same way on every retry
+        code = str(getattr(e, "code", "") or "")
+        if code[:2] in ("22", "23", "42"):
+            raise outbox.PermanentError(f"{code}: {e}") from e
+        raise
+    # supabase-py returns inserted/updated rows in resp.data
+    return len(resp.data or [])
+
+def upsert_events(rows: List[Dict]) -> Tuple[int, int, int, int]:
     """
     Upsert normalized rows into public.events.
     Expected keys per row: title, region, city, venue, starts_on, ends_on, link, source
-    Returns (written_count, skipped_count).
+    Returns (written_count, skipped_count, queued_count, failed_count);
+    queued rows are in the outbox and will be replayed when Supabase is
+    reachable again, failed rows were rejected (dead-lettered) or could not
+    be sent with the outbox off, and are lost.
     """
     if not rows:
-        return (0, 0)
+        return (0, 0, 0, 0)
 
     # 1) sanitize + keep only valid rows
     cleaned: List[Dict] = []
@@ -52,41 +128,77 @@ def upsert_events(rows: List[Dict]) -> Tuple[int, int]:
         })
 
     if not cleaned:
-        return (0, len(rows))
+        return (0, len(rows), 0, 0)
 
     # 2) dedupe **within this batch** to avoid the Postgres 21000 error
-    seen = set()
-    deduped: List[Dict] = []
-    for r in cleaned:
-        k = _key(r)
-        if k in seen:
-            continue
-        seen.add(k)
-        deduped.append(r)
+    deduped = _dedupe(cleaned)
 
-    # 3) upsert in small chunks (e.g., 200) and ignore duplicates against existing rows
-    sb = _client()
-    written_total = 0
+    # 3) upsert in small chunks (e.g., 200) through the outbox
+    written_total = queued = failed = 0
     chunk_size = 200
     for i in range(0, len(deduped), chunk_size):
         chunk = deduped[i:i + chunk_size]
-        resp = sb.table("events").upsert(
-            chunk,
-            on_conflict="dedupe_key",
-            ignore_duplicates=True  # extra safety vs existing rows
-        ).execute()
-        # supabase-py returns inserted/updated rows in resp.data
-        written_total += len(resp.data or [])
+        written, err, was_queued = outbox.deliver("events", chunk, send_batch)
+        if err:
+            print(f"[EVENTS] Upsert of {len(chunk)} rows failed: {err}")
+        if was_queued:
+            queued += len(chunk)
+        elif err:
+            failed += len(chunk)
+        written_total += written or 0
 
-    skipped = len(rows) - written_total
-    return (written_total, max(0, skipped))
+    skipped = len(rows) - written_total - queued - failed
+    return (written_total, max(0, skipped), queued, failed)
 
-def fetch_upcoming_events() -> List[Dict]:
-    sb = _client()
+def fetch_upcoming_events(
+    region: Optional[str] = None,
+    city: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Dict]:
+    """
+    Upcoming events (starts_on >= today), optionally filtered by region/city
+    (case-insensitive) and a starts_on window (ISO dates), paginated with
+    limit/offset. All filtering happens in the query; results are cached
+    for EVENTS_CACHE_TTL_S, or until the next events ingest or local midnight.
+    """
+    global _cache_day, _cache_snapshot
     today = date.today().isoformat()
-    resp = sb.table("events") \
-             .select("*") \
-             .gte("starts_on", today) \
-             .order("starts_on", desc=False) \
-             .execute()
-    return resp.data or []
+    version = _snapshot_version()
+    key = (
+        (region or "").strip().lower(), (city or "").strip().lower(),
+        date_from or "", date_to or "", limit, offset,
+    )
+    with _cache_lock:
+        if _cache_day != today or _cache_snapshot != version:
+            _clear_locked()
+            _cache_day, _cache_snapshot = today, version
+        gen = _cache_gen
+        hit = _cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < EVENTS_CACHE_TTL_S:
+        return hit[1]
+
+    q = _client().table("events") \
+                 .select("*") \
+                 .gte("starts_on", max(today, date_from or today))
+    if date_to:
+        q = q.lte("starts_on", date_to)
+    if region:
+        q = q.ilike("region", _like_literal(region.strip()))
+    if city:
+        q = q.ilike("city", _like_literal(city.strip()))
+    q = q.order("starts_on", desc=False).order("id", desc=False)  # id: stable pages
+    if limit:
+        q = q.range(offset, offset + limit - 1)
+    elif offset:
+        q = q.range(offset, offset + 9999)
+    data = q.execute().data or []
+
+    with _cache_lock:
+        if _cache_gen == gen:
+            if len(_cache) >= _CACHE_MAX_KEYS:
+                _cache.clear()
+            _cache[key] = (time.monotonic(), data)
+    return data
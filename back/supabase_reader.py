@@ -1,8 +1,15 @@
 # back/supabase_reader.py
+import base64
+import json
 import requests
+from typing import Dict, Iterable, List, Optional
 from urllib.parse import urlparse
-from datetime import datetime
-from .config import SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_TABLE
+from datetime import datetime, timedelta, timezone
+from .config import (
+    SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_TABLE, TOMBSTONE_TABLE, RETENTION_TOMBSTONE_DAYS,
+    ARTICLES_RPC, CHANGES_SAFETY_LAG_S,
+)
+from .article import Article, parse_published
 
 REST = f"{SUPABASE_URL.rstrip('/')}/rest/v1"
 HEADERS = {
@@ -26,44 +33,204 @@ def _infer_region(source: str, link: str) -> str:
         if suf in t: return name
     return "Global"
 
+# frontend field -> news columns needed to produce it (incl. fallbacks)
+FIELD_COLUMNS = {
+    "Title":       ("title",),
+    "Link":        ("link",),
+    "Source":      ("source", "link"),
+    "PublishedAt": ("published",),
+    "Summary":     ("summary",),
+    "Topic":       ("topic",),
+    "Region":      ("region", "source", "link"),
+    "Keywords":    ("keywords",),
+    "Bookmarked":  (),
+    "id":          ("link", "id"),
+    "Alternates":  ("alternates",),
+}
+_FIELD_BY_LOWER = {k.lower(): k for k in FIELD_COLUMNS}
+DEFAULT_SELECT = "id,title,link,source,published,summary,keywords,region,topic,alternates"
+
+def parse_fields(fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """
+    Normalize a sparse fieldset (case-insensitive, unknown names dropped) to
+    frontend keys in their usual order. None/empty means all fields.
+    """
+    if not fields:
+        return None
+    wanted = {_FIELD_BY_LOWER[f.strip().lower()] for f in fields if f.strip().lower() in _FIELD_BY_LOWER}
+    return [k for k in FIELD_COLUMNS if k in wanted] or None
+
+def select_for(fields: Optional[List[str]]) -> str:
+    """PostgREST `select` projection for the given frontend fields."""
+    if not fields:
+        return DEFAULT_SELECT
+    cols = {c for f in fields for c in FIELD_COLUMNS[f]}
+    return ",".join(c for c in DEFAULT_SELECT.split(",") if c in cols) or "id"
+
+def _to_article(row: dict) -> Article:
+    a = Article.from_row(row)
+    if "source" in row or "link" in row:
+        a.source = a.source or _domain(a.link)
+    if "region" in row:
+        a.region = a.region or _infer_region(a.source, a.link)
+    return a
+
 def _to_frontend(row: dict) -> dict:
-    link = row.get("link", "")
-    source = row.get("source") or _domain(link)
-    region = row.get("region") or _infer_region(source, link)
-    topic = row.get("topic")
-    if not isinstance(topic, list):
-        topic = []
-    keywords = row.get("keywords") or ""   # ← ADDED
+    return _to_article(row).to_frontend()
 
-    return {
-        "Title": row.get("title", ""),
-        "Link": link,
-        "Source": source,
-        "PublishedAt": row.get("published") or "",
-        "Summary": row.get("summary", ""),
-        "Topic": topic,
-        "Region": region,
-        "Keywords": keywords,              # ← ADDED
-        "Bookmarked": False,
-        "id": link or row.get("id", ""),
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+def get_article_records(select: str = DEFAULT_SELECT) -> List[Article]:
+    params = {
+        "select": select,
+        "order": "published.desc,id.desc",
+        "limit": "1000",
     }
+    r = requests.get(f"{REST}/{SUPABASE_TABLE}", headers=HEADERS, params=params, timeout=20)
+    r.raise_for_status()
+    rows = r.json() if r.text else []
+    out = [_to_article(x) for x in rows]
+    if "published" in select.split(","):
+        out.sort(key=lambda a: a.published or _OLDEST, reverse=True)
+    return out
 
-def get_articles() -> list:
+def get_recent_article_records(days: int, select: str = "title,link,source,published") -> List[Article]:
+    """Stored articles published in the last `days` days (or undated), newest first."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
     params = {
-        "select": "id,title,link,source,published,summary,keywords,region,topic,inserted_at,updated_at",
+        "select": select,
+        "or": f"(published.gte.{cutoff},published.is.null)",
         "order": "published.desc",
-        "limit": "1000",
+        "limit": "5000",
+    }
+    r = requests.get(f"{REST}/{SUPABASE_TABLE}", headers=HEADERS, params=params, timeout=20)
+    r.raise_for_status()
+    return [_to_article(x) for x in (r.json() if r.text else [])]
+
+def get_articles(fields: Optional[Iterable[str]] = None) -> list:
+    """
+    Articles in frontend shape. `fields` (e.g. ["Title", "Link"]) narrows both
+    the PostgREST select and the output keys.
+    """
+    keys = parse_fields(fields)
+    return [a.to_frontend(keys) for a in get_article_records(select_for(keys))]
+
+# ---------------- Passthrough (ARTICLES_PASSTHROUGH) ----------------
+# ARTICLES_RPC (sql/news_frontend_view.sql) returns rows already in the
+# frontend shape, so its JSON goes to the client without being decoded
+# here. It makes get_article_records' selection (published desc, nulls
+# first, then id desc, limit 1000) and re-sort (undated rows last) in SQL.
+
+def open_articles_stream(fields: Optional[Iterable[str]] = None) -> requests.Response:
+    """Streaming PostgREST response with /articles JSON from the RPC; the caller closes it."""
+    keys = parse_fields(fields)
+    params = {
+        "select": ",".join(keys or FIELD_COLUMNS),
+        "max_rows": "1000",
+    }
+    r = requests.get(f"{REST}/rpc/{ARTICLES_RPC}", headers=HEADERS, params=params, timeout=20, stream=True)
+    if r.status_code >= 400:
+        r.close()
+        r.raise_for_status()
+    return r
+
+def get_articles_bytes(fields: Optional[Iterable[str]] = None) -> bytes:
+    """Same JSON as get_articles(fields), as PostgREST's raw body."""
+    with open_articles_stream(fields) as r:
+        return r.content
+
+# ---------------- Delta sync ----------------
+# The cursor is opaque to clients: base64 of {"u": updated_at, "i": id} for
+# the last change, {"d": deleted_at, "t": id} for the last tombstone it has
+# seen, and "at", when it was issued. Both are paged on (timestamp, id), so
+# rows sharing a timestamp (one batch delete) are never skipped.
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(pos: Dict) -> str:
+    raw = json.dumps(pos, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Dict:
+    """{} for no cursor; InvalidCursor if it isn't one of ours."""
+    if not cursor:
+        return {}
+    try:
+        pos = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise InvalidCursor("invalid cursor")
+    if not isinstance(pos, dict):
+        raise InvalidCursor("invalid cursor")
+    return pos
+
+def _q(v) -> str:
+    # quote values inside PostgREST or=() filters (timestamps contain ':' and '+')
+    return '"' + str(v).replace('"', '\\"') + '"'
+
+def get_changes(since: Optional[str] = None, limit: int = 500) -> Dict:
+    """
+    Rows inserted/updated after the cursor (frontend shape, oldest first) and
+    links of rows deleted since then (from the tombstone table), plus the
+    cursor to pass next time. `has_more` means call again right away.
+
+    Only rows stamped more than CHANGES_SAFETY_LAG_S ago are returned: a
+    row is stamped when written but visible only once its transaction
+    commits, so a newer stamp may still be followed by an older one.
+    """
+    pos = decode_cursor(since)
+    now = datetime.now(timezone.utc)
+    if pos and RETENTION_TOMBSTONE_DAYS > 0:
+        # tombstones older than this are pruned by the retention job; a
+        # client that synced after it has missed none, however long ago
+        # the last delete was
+        horizon = now - timedelta(days=RETENTION_TOMBSTONE_DAYS)
+        issued = parse_published(pos.get("at") or pos.get("d"))
+        if issued is not None and issued < horizon:
+            raise InvalidCursor("cursor expired; sync again without `since`")
+    params = {
+        "select": DEFAULT_SELECT + ",updated_at",
+        "order": "updated_at.asc,id.asc",
+        "limit": str(limit),
     }
+    settled = (now - timedelta(seconds=CHANGES_SAFETY_LAG_S)).isoformat()
+    if CHANGES_SAFETY_LAG_S > 0:
+        params["updated_at"] = f"lt.{settled}"
+    if pos.get("u"):
+        params["or"] = (f"(updated_at.gt.{_q(pos['u'])},"
+                        f"and(updated_at.eq.{_q(pos['u'])},id.gt.{_q(pos.get('i', ''))}))")
     r = requests.get(f"{REST}/{SUPABASE_TABLE}", headers=HEADERS, params=params, timeout=20)
     r.raise_for_status()
     rows = r.json() if r.text else []
-    out = [_to_frontend(x) for x in rows]
 
-    def ts(a):
-        try:
-            return datetime.fromisoformat((a.get("PublishedAt") or "").replace("Z", "+00:00"))
-        except Exception:
-            return datetime.min
+    deleted: List[str] = []
+    tomb_params = {"select": "id,link,deleted_at", "order": "deleted_at.asc,id.asc", "limit": str(limit)}
+    if pos.get("d") and pos.get("t") is not None:
+        tomb_params["or"] = (f"(deleted_at.gt.{_q(pos['d'])},"
+                             f"and(deleted_at.eq.{_q(pos['d'])},id.gt.{_q(pos['t'])}))")
+    elif pos.get("d"):
+        tomb_params["or"] = f"(deleted_at.gt.{_q(pos['d'])})"
+    elif not pos:
+        tomb_params = None  # first sync: the client has nothing to delete
+    if tomb_params is not None:
+        if CHANGES_SAFETY_LAG_S > 0:
+            tomb_params["deleted_at"] = f"lt.{settled}"
+        t = requests.get(f"{REST}/{TOMBSTONE_TABLE}", headers=HEADERS, params=tomb_params, timeout=20)
+        t.raise_for_status()
+        tombs = t.json() if t.text else []
+        deleted = [x["link"] for x in tombs if x.get("link")]
+        if tombs:
+            pos["d"], pos["t"] = tombs[-1]["deleted_at"], tombs[-1]["id"]
 
-    out.sort(key=ts, reverse=True)
-    return out
+    if rows:
+        pos["u"], pos["i"] = rows[-1]["updated_at"], rows[-1]["id"]
+    if not pos.get("d"):
+        # start the tombstone timeline at the first change we hand out
+        pos["d"] = pos.get("u")
+    pos["at"] = now.isoformat()
+    return {
+        "changes": [_to_frontend(x) for x in rows],
+        "deleted": deleted,
+        "cursor": encode_cursor(pos),
+        "has_more": len(rows) >= limit or len(deleted) >= limit,
+    }
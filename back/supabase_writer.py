@@ -3,8 +3,9 @@
 import json
 import requests
 from typing import List, Tuple, Optional
-from urllib.parse import urlparse
 from .config import SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_TABLE
+from .article import Article
+from . import outbox
 
 REST = f"{SUPABASE_URL.rstrip('/')}/rest/v1"
 HEADERS = {
@@ -14,41 +15,34 @@ HEADERS = {
     "Prefer": "return=representation,resolution=merge-duplicates",
 }
 
-def _canon(u: str) -> str:
-    try:
-        p = urlparse(u or "")
-        return f"{p.scheme}://{p.netloc}{p.path}"
-    except Exception:
-        return u or ""
-
-def _row(a: dict) -> dict:
-    pub_raw = a.get("Published") or a.get("PublishedAt") or ""
-    published = pub_raw.split("T", 1)[0] if isinstance(pub_raw, str) and "T" in pub_raw else pub_raw
-
-    # keywords fallback
-    kw = a.get("Keywords")
-    if not kw and isinstance(a.get("Topic"), list):
-        kw = ", ".join(a["Topic"]) if a["Topic"] else "Energy"
-    if not kw:
-        kw = "Energy"
-
-    # topic as json array
-    topic = a.get("Topic") if isinstance(a.get("Topic"), list) else []
-
-    region = a.get("Region", "Global") or "Global"
-
-    return {
-        "title": a.get("Title", ""),
-        "link": _canon(a.get("Link", "")),
-        "source": a.get("Source", ""),
-        "published": published,        # DATE (YYYY-MM-DD) or empty
-        "summary": a.get("Summary", ""),
-        "keywords": kw,
-        "region": region,
-        "topic": topic,                # jsonb array
-    }
-
-def write_to_supabase(items: List[dict]) -> Tuple[int, List[str], Optional[dict]]:
+def _row(a: Article) -> dict:
+    # link is already canonical and published already parsed (see Article)
+    return a.to_row()
+
+def send_batch(rows: List[dict]) -> int:
+    """One upsert request; raises on failure (PermanentError when retrying won't help)."""
+    # replayed outbox batches can repeat a link; one upsert may touch a row only once
+    rows = list({r["link"]: r for r in rows}.values())
+    r = requests.post(
+        f"{REST}/{SUPABASE_TABLE}",
+        headers=HEADERS,
+        params={"on_conflict": "link"},
+        data=json.dumps(rows),
+        timeout=25,
+    )
+    if r.status_code >= 400:
+        msg = f"upsert {r.status_code}: {r.text[:300]}"
+        if r.status_code >= 500 or r.status_code in (408, 429):
+            raise RuntimeError(msg)
+        raise outbox.PermanentError(msg)
+    return len(r.json() if r.text else [])
+
+def write_to_supabase(items: List[Article]) -> Tuple[int, List[str], Optional[dict]]:
+    """
+    Upsert in chunks of 200. Each chunk goes through the outbox, so a chunk
+    that fails with a network/5xx error (or while the circuit is open) is
+    kept on disk and replayed later instead of being lost.
+    """
     def chunks(seq, n):
         for i in range(0, len(seq), n):
             yield seq[i:i+n]
@@ -57,19 +51,12 @@ def write_to_supabase(items: List[dict]) -> Tuple[int, List[str], Optional[dict]
     payload_rows = [_row(i) for i in (items or [])]
 
     for ch in chunks(payload_rows, 200):
-        r = requests.post(
-            f"{REST}/{SUPABASE_TABLE}",
-            headers=HEADERS,
-            params={"on_conflict": "link"},
-            data=json.dumps(ch),
-            timeout=25,
-        )
-        if r.status_code >= 400:
-            errs.append(f"upsert {r.status_code}: {r.text[:300]}")
+        written, err, _queued = outbox.deliver("articles", ch, send_batch)
+        if err:
+            errs.append(err)
             if sample is None:
-                sample = {"chunk": ch[:2], "error": r.text}
+                sample = {"chunk": ch[:2], "error": err}
             continue
-        data = r.json() if r.text else []
-        total += len(data)
+        total += written
 
     return total, errs, sample
@@ -0,0 +1,73 @@
+# back/tests/conftest.py
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from back import http_scheduler
+
+
+class LocalServer:
+    """
+    Tiny HTTP stand-in. `routes` maps a path to (status, headers, body) or to
+    a callable returning one; every request's path is appended to `hits`.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits.append(self.path)
+                route = server.routes.get(self.path, (404, {}, b"not found"))
+                status, headers, body = route() if callable(route) else route
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.netloc = f"127.0.0.1:{self.httpd.server_address[1]}"
+        self.url = f"http://{self.netloc}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def make_server(monkeypatch):
+    """Factory for stand-ins; each gets http_scheduler budget `limits` (concurrency, rate)."""
+    servers = []
+
+    def make(limits=(4, 0.0)):
+        srv = LocalServer()
+        monkeypatch.setitem(http_scheduler._LIMITS, srv.netloc, limits)
+        servers.append(srv)
+        return srv
+
+    yield make
+    for srv in servers:
+        srv.close()
+
+
+@pytest.fixture
+def local_server(make_server):
+    return make_server()
+
+
+@pytest.fixture
+def postgrest():
+    """The load harness's in-memory PostgREST stand-in."""
+    from back.loadtest.stub_postgrest import StubPostgrest
+    with StubPostgrest() as pg:
+        yield pg
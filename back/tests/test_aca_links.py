@@ -0,0 +1,31 @@
+# back/tests/test_aca_links.py
+from back.adapters.events import aca_playwright
+
+_PAGE = "https://www.allconferencealert.com/singapore/energy-conference.html"
+_HREFS = ["/event/1", "event-2.html", " https://other.example/e/3 "]
+
+
+def _card(i, href):
+    # nested deep enough that the HTML path's climb from the title stays in the card
+    return ("<div>" * 7 + f"<p>International Energy Conference {i}</p><p>1{i} March 2027</p>"
+            f"<p>Singapore, Singapore</p><a href='{href}'>View Event</a>" + "</div>" * 7)
+
+
+def test_dom_and_html_paths_resolve_links_the_same_way():
+    cards_html = "".join(_card(i, h) for i, h in enumerate(_HREFS, 1))
+    html = (f"<html><body><div><div><div><div><div><h2>Upcoming Energy Conferences in Singapore</h2></div>"
+            f"{cards_html}</div></div></div></div></body></html>")
+    from_html = aca_playwright._extract_events_from_html(html, "Singapore", _PAGE)
+
+    # what _SECTION_JS returns: the raw attribute, as in the page
+    cards = [{"title": f"International Energy Conference {i}", "date": f"1{i} March 2027",
+              "location": "Singapore, Singapore", "href": h} for i, h in enumerate(_HREFS, 1)]
+    from_dom = aca_playwright._events_from_cards(cards, "Singapore", _PAGE)
+
+    links = [r["link"] for r in from_dom]
+    assert links == [
+        "https://www.allconferencealert.com/event/1",
+        "https://www.allconferencealert.com/singapore/event-2.html",
+        "https://other.example/e/3",
+    ]
+    assert [r["link"] for r in from_html] == links
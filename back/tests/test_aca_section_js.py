@@ -0,0 +1,95 @@
+# back/tests/test_aca_section_js.py
+"""Runs _SECTION_JS under node against a small DOM stand-in (skipped without node)."""
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from back.adapters.events import aca_playwright
+
+NODE = shutil.which("node")
+pytestmark = pytest.mark.skipif(NODE is None, reason="node not installed")
+
+# just enough DOM for the section script: text nodes, elements, a tree walker
+_DOM = r"""
+class T { constructor(v) { this.nodeValue = v; this.parentElement = null; }
+          get textContent() { return this.nodeValue; } }
+class E {
+  constructor(tag, attrs, kids) {
+    this.tag = tag; this.attrs = attrs || {}; this.children = []; this.parentElement = null;
+    for (const k of kids || []) { const c = typeof k === "string" ? new T(k) : k; c.parentElement = this; this.children.push(c); }
+  }
+  get textContent() { return this.children.map(c => c.textContent).join(""); }
+  get innerText() {
+    return this.children.map(c => c instanceof T ? c.nodeValue
+      : (["p", "h2", "div"].includes(c.tag) ? "\n" + c.innerText + "\n" : c.innerText)).join("");
+  }
+  getAttribute(n) { return this.attrs[n]; }
+  *walk() { for (const c of this.children) { yield c; if (c instanceof E) yield* c.walk(); } }
+  querySelectorAll(sel) { return [...this.walk()].filter(c => c instanceof E && c.tag === "a" && c.attrs.href); }
+}
+const card = i => new E("div", {}, [
+  new E("p", {}, [`International Energy Conference ${i}`]),
+  new E("p", {}, [`1${i} March 2027`]),
+  new E("p", {}, ["Singapore, Singapore"]),
+  new E("a", {href: `/event/${i}`}, ["View Event"])]);
+const page = header => new E("body", {}, [new E("div", {}, [new E("div", {}, [new E("div", {}, [
+  new E("div", {}, [new E("div", {}, [new E("h2", {}, [header])]), card(1), card(2)])])])])]);
+global.NodeFilter = {SHOW_TEXT: 4};
+global.document = {
+  body: page(HEADER),
+  createTreeWalker(root) { const it = [...root.walk()].filter(n => n instanceof T); let i = 0; return {nextNode: () => it[i++] || null}; },
+};
+"""
+
+
+class _NodePage:
+    """page.evaluate() stand-in that runs the script under node."""
+
+    def __init__(self, header: str):
+        self.header = header
+
+    def evaluate(self, script: str, arg):
+        src = (_DOM.replace("HEADER", json.dumps(self.header))
+               + f"console.log(JSON.stringify(({script})({json.dumps(arg)})));")
+        res = subprocess.run([NODE, "-e", src], capture_output=True, text=True, timeout=30)
+        if res.returncode != 0:
+            raise RuntimeError(res.stderr)
+        return json.loads(res.stdout)
+
+
+def _section(header: str):
+    return _NodePage(header).evaluate(aca_playwright._SECTION_JS,
+                                      ["Singapore", list(aca_playwright._TITLE_KEYWORDS)])
+
+
+def test_section_script_runs():
+    res = _section("Upcoming Energy Conferences in Singapore 2027")
+    assert "International Energy Conference 1" in res["text"]
+    assert res["text"].rstrip().endswith("/event/1\n/event/2")
+    assert [c["date"] for c in res["cards"]] == ["11 March 2027", "12 March 2027"]
+    assert _section("Nothing here") == {"text": "", "cards": []}
+
+
+def test_read_section_rows():
+    fp, cards = aca_playwright._read_section(_NodePage("Upcoming Energy Conferences in Singapore 2027"), "Singapore")
+    assert fp
+    assert aca_playwright._read_section(_NodePage("Nothing here"), "Singapore") == ("", [])
+    rows = aca_playwright._events_from_cards(cards, "Singapore")
+    assert [(r["title"], r["starts_on"], r["city"], r["link"]) for r in rows] == [
+        ("International Energy Conference 1", "2027-03-11", "Singapore",
+         "https://www.allconferencealert.com/event/1"),
+        ("International Energy Conference 2", "2027-03-12", "Singapore",
+         "https://www.allconferencealert.com/event/2"),
+    ]
+
+
+def test_date_patterns_agree():
+    js = re.search(r"const dateRe = (/.+/[a-z]*);", aca_playwright._SECTION_JS).group(1)
+    lines = ["13th Jan 2026", "13TH JAN 2026", "2nd march 2027", "20 December 2025", "Singapore, Singapore"]
+    src = f"console.log(JSON.stringify({json.dumps(lines)}.map(l => {js}.test(l))));"
+    res = subprocess.run([NODE, "-e", src], capture_output=True, text=True, timeout=30)
+    assert json.loads(res.stdout) == [bool(aca_playwright._DATE_RE.search(l)) for l in lines]
+    assert aca_playwright._parse_full_date("13th Jan 2026") == "2026-01-13"
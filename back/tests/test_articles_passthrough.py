@@ -0,0 +1,59 @@
+# back/tests/test_articles_passthrough.py
+import json
+import os
+import re
+
+import pytest
+
+from back import supabase_reader
+from back.article import Article
+from back.loadtest.stub_postgrest import seed
+
+_VIEW_SQL = os.path.join(os.path.dirname(__file__), "..", "sql", "news_frontend_view.sql")
+
+
+def _view_sql() -> str:
+    with open(_VIEW_SQL, encoding="utf-8") as f:
+        sql = f.read()
+    # the create view statement, without comments
+    body = sql[sql.index("create view public.news_frontend"):sql.index("from public.news n")]
+    return re.sub(r"--[^\n]*", "", body)
+
+
+@pytest.fixture
+def pg(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_reader, "REST", f"{postgrest.url}/rest/v1")
+    seed(postgrest, news=1500, events=0)
+    # undated rows, and more rows per day than fit: the limit has to cut through ties
+    postgrest.store.upsert("news", [
+        {"title": f"Undated {i}", "link": f"https://fixture.example/undated/{i}", "published": None, "region": None}
+        for i in range(30)
+    ], "link")
+    return postgrest
+
+
+@pytest.mark.parametrize("fields", [None, ["Title", "PublishedAt"]])
+def test_rpc_returns_the_newest_rows_with_undated_last(pg, fields):
+    raw = json.loads(supabase_reader.get_articles_bytes(fields))
+    assert len(raw) == 1000
+    assert set(raw[0]) == set(fields or Article(title="", link="").to_frontend())
+    dates = [a["PublishedAt"] for a in raw]
+    # undated rows are selected first and listed last
+    assert dates[-30:] == [""] * 30 and "" not in dates[:-30]
+
+
+def test_view_columns_are_the_frontend_keys():
+    columns = re.findall(r'\bas "([^"]+)"', _view_sql())
+    assert [c for c in columns if not c.startswith("_")] == list(Article(title="", link="").to_frontend())
+
+
+def test_view_region_guess_matches_the_python_fallback():
+    pairs = re.findall(r"position\('([^']+)' in s\.haystack\) > 0 then '([^']+)'", _view_sql())
+    assert pairs
+    suffixes = [s for s, _ in pairs]
+    for i, (suffix, region) in enumerate(pairs):
+        # the host carries this suffix and every later one: the first match has to win in both
+        link = "https://x" + "".join(suffixes[i:]) + "/a"
+        assert supabase_reader._infer_region("", link) == region
+    assert supabase_reader._infer_region("", "https://example.com/a") == "Global"
+    assert "else 'Global'" in _view_sql()
@@ -0,0 +1,47 @@
+# back/tests/test_backfill.py
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from back import backfill
+from back.article import Article
+
+
+@pytest.fixture
+def feed(monkeypatch, tmp_path):
+    state_path = tmp_path / "backfill.json"
+    monkeypatch.setattr(backfill, "BACKFILL_STATE_PATH", str(state_path))
+    monkeypatch.setattr(backfill, "BACKFILL_CHUNK", 1)
+
+    def units(url, since, st):
+        for page in range(1, 4):
+            yield [f"entry {page}"], {"next": page + 1}
+        yield [], {"next": 4, "done": True}
+
+    monkeypatch.setattr(backfill, "_paged_units", units)
+    monkeypatch.setattr(backfill, "entry_to_article",
+                        lambda e, url, label, since: Article(title=e, link=f"https://x.example/{e[-1]}"))
+    return state_path
+
+
+def test_failed_write_keeps_the_checkpoint(feed, monkeypatch):
+    calls = []
+
+    def write(items, dry_run):
+        calls.append(items[0].title)
+        return (0, ["HTTP 500"]) if len(calls) == 2 else (len(items), [])
+
+    monkeypatch.setattr(backfill, "_write", write)
+    state = {}
+    with pytest.raises(RuntimeError, match="checkpoint kept"):
+        backfill._backfill_feed("https://x.example/feed", date.today() - timedelta(days=30), state, False)
+    saved = json.loads(feed.read_text())["https://x.example/feed"]
+    assert calls == ["entry 1", "entry 2"]
+    assert saved["next"] == 2 and not saved.get("done")
+
+
+def test_clean_run_reaches_the_end(feed, monkeypatch):
+    monkeypatch.setattr(backfill, "_write", lambda items, dry_run: (len(items), []))
+    st = backfill._backfill_feed("https://x.example/feed", date.today() - timedelta(days=30), {}, False)
+    assert st["done"] and st["written"] == 3
@@ -0,0 +1,30 @@
+# back/tests/test_bench_importtime.py
+import pytest
+
+from back import bench_importtime
+
+_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:      2000 |       2000 |     requests
+import time:       300 |        300 |     back.config
+import time:     40000 |      40000 |     fastapi
+import time:      1200 |      43500 |   back.main
+import time:       500 |      44000 | app
+"""
+
+
+def test_only_the_apps_own_modules_count():
+    s = bench_importtime.parse(_OUTPUT, ("app",))
+    assert s.total_ms == 44.0
+    assert s.own_ms == 2.0
+    assert s.heavy == ["requests"]
+
+
+def test_too_few_runs_is_rejected():
+    with pytest.raises(SystemExit):
+        bench_importtime.main(["--runs", "2"])
+
+
+def test_startup_import_budget():
+    # the gate itself: no heavy adapters at startup, app share within budget
+    assert bench_importtime.main([]) == 0
@@ -0,0 +1,74 @@
+# back/tests/test_changes.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from back import supabase_reader
+from back.supabase_reader import InvalidCursor, decode_cursor, encode_cursor, get_changes
+
+
+@pytest.fixture
+def pg(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_reader, "REST", f"{postgrest.url}/rest/v1")
+    monkeypatch.setattr(supabase_reader, "RETENTION_TOMBSTONE_DAYS", 30)
+    monkeypatch.setattr(supabase_reader, "CHANGES_SAFETY_LAG_S", 0)
+    return postgrest
+
+
+def _tombstones(pg, links, deleted_at):
+    t = pg.store.tables["news_tombstones"]
+    for link in links:
+        tid = pg.store._id()
+        t[tid] = {"id": tid, "news_id": "1", "link": link, "deleted_at": deleted_at}
+
+
+def test_tombstones_sharing_a_timestamp_are_all_paged(pg):
+    pg.store.upsert("news", [{"title": "a", "link": "https://x.example/a", "updated_at": "2026-01-01"}], "link")
+    cursor = get_changes()["cursor"]
+    # one batch delete: every tombstone has the same deleted_at
+    _tombstones(pg, [f"https://x.example/{i}" for i in range(5)], datetime.now(timezone.utc).isoformat())
+    deleted = []
+    for _ in range(5):
+        page = get_changes(since=cursor, limit=2)
+        deleted += page["deleted"]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert sorted(deleted) == [f"https://x.example/{i}" for i in range(5)]
+
+
+def test_expiry_follows_the_issue_time_not_the_last_tombstone(pg):
+    old = (datetime.now(timezone.utc) - timedelta(days=90)).isoformat()
+    recent = encode_cursor({"u": old, "i": 1, "d": old, "t": 1,
+                            "at": datetime.now(timezone.utc).isoformat()})
+    page = get_changes(since=recent)
+    assert decode_cursor(page["cursor"])["at"]
+
+    stale = encode_cursor({"u": old, "i": 1, "d": old, "t": 1, "at": old})
+    with pytest.raises(InvalidCursor):
+        get_changes(since=stale)
+
+
+def _ago(seconds):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def test_rows_newer_than_the_safety_lag_wait_for_the_next_sync(pg, monkeypatch):
+    monkeypatch.setattr(supabase_reader, "CHANGES_SAFETY_LAG_S", 30)
+    pg.store.upsert("news", [{"title": t, "link": f"https://x.example/{t}"} for t in ("old", "new")], "link")
+    rows = {r["title"]: r for r in pg.store.tables["news"].values()}
+    rows["old"]["updated_at"] = _ago(120)
+    rows["new"]["updated_at"] = _ago(5)   # its transaction may not have committed yet
+    page = get_changes()
+    assert [c["Title"] for c in page["changes"]] == ["old"]
+
+    _tombstones(pg, ["https://x.example/gone"], _ago(5))
+    page = get_changes(since=page["cursor"])
+    assert (page["changes"], page["deleted"]) == ([], [])
+
+    rows["new"]["updated_at"] = _ago(60)
+    for t in pg.store.tables["news_tombstones"].values():
+        t["deleted_at"] = _ago(60)
+    page = get_changes(since=page["cursor"])
+    assert [c["Title"] for c in page["changes"]] == ["new"]
+    assert page["deleted"] == ["https://x.example/gone"]
@@ -0,0 +1,68 @@
+# back/tests/test_dedupe.py
+from datetime import datetime, timedelta, timezone
+
+from back import outbox, supabase_reader, supabase_writer
+from back.article import Article
+from back.dedupe import NearDupIndex, cluster_near_duplicates
+
+_T0 = datetime(2026, 3, 1, 8, tzinfo=timezone.utc)
+
+
+def _art(title, link, source="a.example", summary="", hours=0, alternates=None):
+    return Article(title=title, link=link, source=source, summary=summary,
+                   published=_T0 + timedelta(hours=hours), alternates=list(alternates or []))
+
+
+def test_threshold():
+    a = _art("Vietnam approves offshore wind auction rules for 2026", "https://a.example/1")
+    close = _art("Vietnam approves final offshore wind auction rules for 2026", "https://b.example/1")
+    far = _art("Vietnam approves solar rooftop rules", "https://c.example/1")
+    assert len(cluster_near_duplicates([a, close], threshold=0.6)) == 1
+    assert len(cluster_near_duplicates([a, far], threshold=0.6)) == 2
+    assert len(cluster_near_duplicates([a, close], threshold=0.95)) == 2
+
+
+def test_representative_prefers_publisher_link_then_summary_then_earliest():
+    title = "Malaysia opens large scale solar tender round five"
+    gnews = _art(title, "https://news.google.com/rss/articles/x", summary="s", hours=-5)
+    bare = _art(title, "https://b.example/1", hours=-3)
+    summarized_late = _art(title, "https://c.example/1", summary="s", hours=2)
+    summarized_early = _art(title, "https://d.example/1", summary="s", hours=1)
+    out = cluster_near_duplicates([gnews, bare, summarized_late, summarized_early])
+    assert [a.link for a in out] == ["https://d.example/1"]
+    assert [x["Link"] for x in out[0].alternates] == [
+        "https://c.example/1", "https://b.example/1", "https://news.google.com/rss/articles/x"]
+
+
+def test_alternates_of_merged_copies_are_carried():
+    title = "Thailand publishes hydrogen roadmap to 2040"
+    older = {"Title": title, "Link": "https://z.example/1", "Source": "z.example"}
+    a = _art(title, "https://a.example/1", summary="s")
+    b = _art(title, "https://b.example/1", alternates=[older])
+    out = cluster_near_duplicates([a, b])
+    assert out[0].alternates == [{"Title": title, "Link": "https://b.example/1", "Source": "a.example"}, older]
+
+
+def test_near_dup_index_keeps_the_first_copy():
+    index = NearDupIndex()
+    first = _art("Singapore grid battery storage tender awarded", "https://b.example/1", hours=5)
+    later = _art("Singapore grid battery storage tender awarded", "https://a.example/1", summary="s")
+    assert index.match(first) is None
+    assert index.match(later) is first
+    assert index.match(_art("Philippines LNG terminal starts operations", "https://c.example/1")) is None
+    assert len(index) == 2
+
+
+def test_alternates_are_stored_and_served(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_writer, "REST", f"{postgrest.url}/rest/v1")
+    monkeypatch.setattr(supabase_reader, "REST", f"{postgrest.url}/rest/v1")
+    monkeypatch.setattr(outbox, "OUTBOX_ENABLED", False)
+    title = "Indonesia coal phase-out plan gets funding"
+    kept = cluster_near_duplicates([_art(title, "https://a.example/1", summary="s"),
+                                    _art(title, "https://b.example/1", "b.example")])
+    written, errs, _ = supabase_writer.write_to_supabase(kept)
+    assert (written, errs) == (1, [])
+    [row] = supabase_reader.get_articles()
+    assert row["Alternates"] == [{"Title": title, "Link": "https://b.example/1", "Source": "b.example"}]
+    assert supabase_reader.get_articles(["Title", "Alternates"]) == [
+        {"Title": title, "Alternates": row["Alternates"]}]
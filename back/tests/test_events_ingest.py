@@ -0,0 +1,184 @@
+# back/tests/test_events_ingest.py
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from back import events_ingest, outbox, supabase_events
+from back.adapters.events import registry
+from back.adapters.events.registry import SourceRun
+
+_DAY = (date.today() + timedelta(days=30)).isoformat()
+
+
+def _row(title):
+    return {"title": title, "region": "Singapore", "city": "Singapore", "starts_on": _DAY}
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    calls = []
+    monkeypatch.setattr(events_ingest.source_fingerprints, "save", lambda fps: calls.append(dict(fps)))
+    return calls
+
+
+def _fake_sources(monkeypatch, rows):
+    run = SourceRun("aca_http")
+    run.fingerprints = {"https://aca.example/sg": "fp1"}
+    monkeypatch.setattr(events_ingest, "run_sources", lambda force=False: {
+        "aca_http": {"rows": rows, "status": "ok", "seconds": 0.1, "run": run},
+    })
+
+
+def test_rejected_rows_count_as_failed(monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_ENABLED", False)
+
+    def reject(rows):
+        raise outbox.PermanentError("23502: null value")
+
+    monkeypatch.setattr(supabase_events, "send_batch", reject)
+    assert supabase_events.upsert_events([_row("Energy Asia"), _row("Grid Summit")]) == (0, 0, 0, 2)
+
+
+def test_fingerprints_not_saved_when_rows_are_lost(monkeypatch, saved):
+    _fake_sources(monkeypatch, [_row("Energy Asia")])
+    monkeypatch.setattr(events_ingest, "upsert_events", lambda rows: (0, 0, 0, len(rows)))
+    out = events_ingest.run_events_ingest()
+    assert out["failed"] == 1
+    assert saved == []
+
+
+@pytest.mark.parametrize("result", [(1, 0, 0, 0), (0, 0, 1, 0), (0, 1, 0, 0)])
+def test_fingerprints_saved_when_rows_are_stored_or_queued(monkeypatch, saved, result):
+    _fake_sources(monkeypatch, [_row("Energy Asia")])
+    monkeypatch.setattr(events_ingest, "upsert_events", lambda rows: result)
+    events_ingest.run_events_ingest()
+    assert saved == [{"https://aca.example/sg": "fp1"}]
+
+
+def test_each_adapter_saves_on_its_own_rows(monkeypatch, saved):
+    runs = {n: SourceRun(n) for n in ("aca_playwright", "aca_http")}
+    runs["aca_playwright"].fingerprints = {"pw": "fp1"}
+    runs["aca_http"].fingerprints = {"http": "fp2"}
+    rows = {"aca_playwright": [_row("Energy Asia"), _row("Grid Summit")],
+            "aca_http": [_row("Grid Summit"), _row("Hydrogen Week")]}
+    monkeypatch.setattr(events_ingest, "run_sources", lambda force=False: {
+        n: {"rows": rows[n], "status": "ok", "seconds": 0.1, "run": runs[n]} for n in runs
+    })
+    calls = []
+
+    def upsert(batch):
+        calls.append(sorted(r["title"] for r in batch))
+        lost = any(r["title"] == "Hydrogen Week" for r in batch)
+        return (0, 0, 0, len(batch)) if lost else (len(batch), 0, 0, 0)
+
+    monkeypatch.setattr(events_ingest, "upsert_events", upsert)
+    out = events_ingest.run_events_ingest()
+    # the shared row goes with the adapter that produced it first
+    assert calls == [["Energy Asia", "Grid Summit"], ["Hydrogen Week"]]
+    assert saved == [{"pw": "fp1"}]
+    assert (out["upserted"], out["failed"]) == (2, 1)
+    assert out["adapters"]["aca_http"]["failed"] == 1
+
+
+def _stops_at_deadline(force=False, run=None):
+    while not run.expired():
+        time.sleep(0.01)
+    return [_row("Energy Asia")]
+
+
+def _finishes_late(force=False, run=None):
+    time.sleep(0.1)
+    return [_row("Energy Asia")]
+
+
+def test_partial_only_when_the_adapter_saw_its_deadline(monkeypatch):
+    monkeypatch.setitem(registry._BUDGETS, "t_stop", 0.05)
+    monkeypatch.setitem(registry._BUDGETS, "t_late", 0.05)
+    registry.register("t_stop", f"{__name__}:_stops_at_deadline")
+    registry.register("t_late", f"{__name__}:_finishes_late")
+    try:
+        out = registry.run_sources(["t_stop", "t_late"])
+    finally:
+        registry.SOURCES.pop("t_stop")
+        registry.SOURCES.pop("t_late")
+    assert out["t_stop"]["status"] == "partial"
+    assert out["t_late"]["status"] == "ok"
+
+
+def _ignores_deadline(force=False, run=None):
+    try:
+        while not run.cancelled.is_set():
+            time.sleep(0.01)
+        return [_row("Energy Asia")]
+    finally:
+        _cleaned_up.set()
+
+
+_cleaned_up = threading.Event()
+
+
+def test_abandoned_adapter_is_cancelled(monkeypatch):
+    _cleaned_up.clear()
+    monkeypatch.setattr(registry, "_GRACE_S", 0.05)
+    monkeypatch.setitem(registry._BUDGETS, "t_stuck", 0.05)
+    registry.register("t_stuck", f"{__name__}:_ignores_deadline")
+    try:
+        out = registry.run_sources(["t_stuck"])
+    finally:
+        registry.SOURCES.pop("t_stuck")
+    assert out["t_stuck"]["status"] == "timeout"
+    assert out["t_stuck"]["run"].expired()
+    assert _cleaned_up.wait(2)
+
+
+class _FakeBrowser:
+    """sync_playwright stand-in whose pages hang until their timeout."""
+
+    def __init__(self):
+        self.closed = False
+        self.timeouts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def chromium(self):
+        return self
+
+    def launch(self, **kw):
+        return self
+
+    def new_context(self, **kw):
+        return self
+
+    def set_default_timeout(self, ms):
+        self.timeouts.append(ms)
+
+    def new_page(self):
+        return self
+
+    def goto(self, url, wait_until=None, timeout=None):
+        time.sleep(timeout / 1000)
+        raise TimeoutError(f"Timeout {timeout}ms exceeded")
+
+    def close(self):
+        self.closed = True
+
+
+def test_slow_page_stops_at_the_deadline_and_closes_chromium(monkeypatch):
+    from back.adapters.events import aca_playwright
+
+    fake = _FakeBrowser()
+    monkeypatch.setattr(aca_playwright, "sync_playwright", lambda: fake)
+    monkeypatch.setitem(registry._BUDGETS, "aca_playwright", 0.2)
+    started = time.monotonic()
+    out = registry.run_sources(["aca_playwright"])
+    assert time.monotonic() - started < 3
+    assert out["aca_playwright"]["status"] == "partial"
+    assert fake.closed
+    assert fake.timeouts[0] <= 1200  # capped at the budget, not the 60 s page default
@@ -0,0 +1,83 @@
+# back/tests/test_feed_health.py
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from back import feed_health
+from back.adapters.rss_adapter import _count_new_entries
+
+_URL = "https://a.example/feed"
+
+
+@pytest.fixture
+def state(monkeypatch, tmp_path):
+    path = tmp_path / "feed_state.json"
+    monkeypatch.setattr(feed_health, "FEED_STATE_PATH", str(path))
+    monkeypatch.setattr(feed_health, "FEED_SCHEDULING", True)
+    monkeypatch.setattr(feed_health, "FEED_MIN_INTERVAL_MIN", 30)
+    monkeypatch.setattr(feed_health, "FEED_MAX_INTERVAL_MIN", 120)
+    monkeypatch.setattr(feed_health, "FEED_MAX_BACKOFF_MIN", 200)
+    feed_health.reload()
+    yield path
+    feed_health.reload()
+
+
+def _intervals(**kw):
+    return [feed_health.record_fetch(_URL, **kw)["interval_min"] for _ in range(4)]
+
+
+def test_active_feed_stays_at_the_minimum(state):
+    assert _intervals(new_items=3) == [30, 30, 30, 30]
+
+
+def test_quiet_feed_doubles_up_to_the_maximum(state):
+    assert _intervals() == [60, 120, 120, 120]
+
+
+@pytest.mark.parametrize("kw", [{"error": "timeout"}, {"empty": True}])
+def test_failing_feed_backs_off_up_to_the_cap(state, kw):
+    assert _intervals(**kw) == [60, 120, 200, 200]
+    # one good fetch resets the backoff
+    assert feed_health.record_fetch(_URL, new_items=1)["interval_min"] == 30
+
+
+def test_bozo_feed_with_entries_is_not_backed_off(state):
+    st = None
+    for _ in range(3):
+        st = feed_health.record_fetch(_URL, new_items=2, bozo=True)
+    assert st["interval_min"] == 30
+    assert st["bozo_streak"] == 3
+
+
+def test_due_feeds_skips_feeds_until_their_slot(state):
+    other = "https://b.example/feed"
+    feed_health.record_fetch(_URL, new_items=1)
+    due, skipped = feed_health.due_feeds([{"url": _URL}, {"url": other}])
+    assert (due, skipped) == ([{"url": other}], [{"url": _URL}])
+    assert feed_health.last_run == {"fetched": [other], "skipped": [_URL]}
+    assert len(feed_health.due_feeds([_URL, other], force=True)[0]) == 2
+
+
+def test_state_survives_a_reload(state):
+    feed_health.record_fetch(_URL, "A", new_items=1, newest_published="2026-03-01T08:00:00Z")
+    feed_health.record_fetch(_URL, "A", newest_published="2026-02-01T08:00:00Z")
+    feed_health.reload()
+    assert feed_health.newest_seen(_URL) == "2026-03-01T08:00:00Z"
+    assert json.loads(state.read_text())[_URL]["history"] == [1, 0]
+    [row] = feed_health.health_report()
+    assert (row["name"], row["fetches"], row["avg_new_per_fetch"]) == ("A", 2, 0.5)
+    assert 0 < row["next_due_in_min"] <= 60
+    assert row["hours_since_last_new"] is not None
+
+
+def test_only_entries_newer_than_the_last_fetch_count_as_new():
+    def entry(day):
+        return SimpleNamespace(published_parsed=time.strptime(f"2026-03-{day:02d}", "%Y-%m-%d"))
+
+    entries = [entry(3), entry(1), SimpleNamespace(published_parsed=None), entry(2)]
+    new, newest = _count_new_entries(entries, "")
+    assert new == 3
+    assert _count_new_entries(entries, newest) == (0, newest)
+    assert _count_new_entries(entries + [entry(4)], newest)[0] == 1
@@ -0,0 +1,46 @@
+# back/tests/test_feed_stream.py
+from datetime import datetime, timezone
+
+from back import feed_stream
+from back.adapters import rss_adapter
+
+
+def _rss(items):
+    body = "".join(
+        f"<item><title>{t}</title><link>https://example.com/{i}</link><pubDate>{d}</pubDate></item>"
+        for i, (t, d) in enumerate(items)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{body}</channel></rss>'.encode()
+
+
+def _chunks(data, n=64):
+    return [data[i:i + n] for i in range(0, len(data), n)]
+
+
+def test_html_entity_past_the_first_chunk_falls_back_to_feedparser():
+    items = [(f"Solar story {i}", "Mon, 01 Jan 2024 00:00:00 GMT") for i in range(5)]
+    items.append(("Wind&nbsp;farm approved", "Mon, 01 Jan 2024 00:00:00 GMT"))
+    stats = feed_stream.StreamStats()
+    feed = feed_stream.parse_stream(_chunks(_rss(items)), stats=stats)
+    assert stats.fallback
+    assert len(feed.entries) == 6
+    assert feed.entries[-1].title == "Wind\xa0farm approved"
+
+
+def test_well_formed_feed_streams():
+    items = [(f"Solar story {i}", "Mon, 01 Jan 2024 00:00:00 GMT") for i in range(5)]
+    stats = feed_stream.StreamStats()
+    feed = feed_stream.parse_stream(_chunks(_rss(items)), limit=2, stats=stats)
+    assert not stats.fallback and stats.stopped_early
+    assert [e.title for e in feed.entries] == ["Solar story 0", "Solar story 1"]
+
+
+def test_stale_run_is_off_for_google_news_feeds():
+    assert rss_adapter._stale_run("https://news.google.com/rss/search?q=solar") == 0
+    assert rss_adapter._stale_run("https://example.com/feed") == rss_adapter.RSS_STREAM_STALE_RUN
+
+    old, new = "Mon, 01 Jan 2024 00:00:00 GMT", "Mon, 01 Jan 2035 00:00:00 GMT"
+    data = _rss([(f"Old {i}", old) for i in range(3)] + [("New", new)])
+    since = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    feed = feed_stream.parse_stream(_chunks(data), since=since, stale_run=0)
+    assert feed.entries[-1].title == "New"
@@ -0,0 +1,31 @@
+# back/tests/test_fields.py
+from back import supabase_reader
+from back.supabase_reader import parse_fields, select_for
+
+
+def test_parse_fields_normalizes_names_and_order():
+    assert parse_fields([" link", "TITLE", "nope", "title"]) == ["Title", "Link"]
+    assert parse_fields(["nope"]) is None
+    assert parse_fields([]) is None
+
+
+def test_select_for_adds_fallback_columns():
+    assert select_for(None) == supabase_reader.DEFAULT_SELECT
+    assert select_for(["Title"]) == "title"
+    assert select_for(["Source"]) == "link,source"
+    assert select_for(["Region"]) == "link,source,region"
+    assert select_for(["Bookmarked"]) == "id"
+
+
+def test_sparse_articles_keep_the_fallbacks(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_reader, "REST", f"{postgrest.url}/rest/v1")
+    postgrest.store.upsert("news", [
+        {"title": "Grid tender in Vietnam", "link": "https://www.vnexpress.net/grid", "source": None,
+         "published": "2026-03-01T08:00:00+00:00", "region": None, "summary": "long text"},
+    ], "link")
+    full = supabase_reader.get_articles()
+    assert supabase_reader.get_articles(["source", "Region"]) == [
+        {"Source": full[0]["Source"], "Region": full[0]["Region"]}]
+    assert (full[0]["Source"], full[0]["Region"]) == ("www.vnexpress.net", "Vietnam")
+    assert supabase_reader.get_articles(["Title", "Link"]) == [
+        {"Title": "Grid tender in Vietnam", "Link": "https://www.vnexpress.net/grid"}]
@@ -0,0 +1,94 @@
+# back/tests/test_http_scheduler.py
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+import requests
+
+from back import http_scheduler
+
+
+def _slow(server, seconds=0.2):
+    """Route that records how many requests it is serving at once."""
+    state = {"now": 0, "max": 0, "starts": []}
+    lock = threading.Lock()
+
+    def route():
+        with lock:
+            state["now"] += 1
+            state["max"] = max(state["max"], state["now"])
+            state["starts"].append(time.monotonic())
+        time.sleep(seconds)
+        with lock:
+            state["now"] -= 1
+        return 200, {}, b"ok"
+
+    return route, state
+
+
+def _parallel(n, fn):
+    threads = [threading.Thread(target=fn) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrency_budget(make_server):
+    srv = make_server(limits=(2, 0.0))
+    srv.routes["/feed"], state = _slow(srv)
+    _parallel(6, lambda: http_scheduler.get(srv.url + "/feed").close())
+    assert len(state["starts"]) == 6
+    assert state["max"] == 2
+
+
+def test_rate_budget(make_server):
+    srv = make_server(limits=(4, 10.0))  # one start per 100 ms
+    srv.routes["/feed"], state = _slow(srv, 0)
+    _parallel(4, lambda: http_scheduler.get(srv.url + "/feed").close())
+    starts = sorted(state["starts"])
+    assert all(b - a >= 0.08 for a, b in zip(starts, starts[1:]))
+
+
+def test_429_is_retried_after_cooldown(local_server):
+    answers = [(429, {"Retry-After": "0.2"}, b""), (200, {}, b"ok")]
+    local_server.routes["/feed"] = lambda: answers.pop(0)
+    t = time.monotonic()
+    r = http_scheduler.get(local_server.url + "/feed")
+    assert r.status_code == 200
+    assert time.monotonic() - t >= 0.2
+    assert local_server.hits == ["/feed", "/feed"]
+
+
+def test_redirect_hops_use_each_hosts_budget(make_server, monkeypatch):
+    google, publisher = make_server(), make_server()
+    google.routes["/rss/articles/a"] = (302, {"Location": publisher.url + "/story"}, b"")
+    publisher.routes["/story"] = (200, {}, b"story")
+    slots = []
+    real_slot = http_scheduler.host_slot
+
+    @contextmanager
+    def spy(url):
+        with real_slot(url) as h:
+            slots.append(h.name)
+            yield h
+
+    monkeypatch.setattr(http_scheduler, "host_slot", spy)
+    r = http_scheduler.get(google.url + "/rss/articles/a")
+    assert (r.status_code, r.url, r.text) == (200, publisher.url + "/story", "story")
+    assert [h.status_code for h in r.history] == [302]
+    assert slots == [google.netloc, publisher.netloc]
+
+
+def test_redirects_can_be_turned_off(local_server):
+    local_server.routes["/a"] = (301, {"Location": "/b"}, b"")
+    r = http_scheduler.get(local_server.url + "/a", allow_redirects=False)
+    assert r.status_code == 301
+    assert local_server.hits == ["/a"]
+
+
+def test_redirect_loop(local_server):
+    local_server.routes["/a"] = (302, {"Location": "/a"}, b"")
+    with pytest.raises(requests.TooManyRedirects):
+        http_scheduler.get(local_server.url + "/a")
@@ -0,0 +1,65 @@
+# back/tests/test_ingest_worker.py
+import os
+import time
+
+import pytest
+
+from back import ingest_worker
+
+
+def _slow_job(force=False):
+    with open(os.environ["TEST_JOB_PID_FILE"], "w") as f:
+        f.write(str(os.getpid()))
+    time.sleep(60)
+    return {"done": True}
+
+
+def _pid_job(force=False):
+    return {"pid": os.getpid()}
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    monkeypatch.setattr(ingest_worker, "ISOLATED", True)
+    monkeypatch.setattr(ingest_worker, "_WARM_MODULES", [])
+    monkeypatch.setitem(ingest_worker._JOBS, "slow", _slow_job)
+    monkeypatch.setitem(ingest_worker._JOBS, "pid", _pid_job)
+    yield
+    ingest_worker.stop()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_timed_out_job_does_not_keep_running(isolated, monkeypatch, tmp_path):
+    pid_file = tmp_path / "pid"
+    monkeypatch.setenv("TEST_JOB_PID_FILE", str(pid_file))
+    monkeypatch.setattr(ingest_worker, "INGEST_JOB_TIMEOUT_S", 5)
+
+    with pytest.raises(RuntimeError, match="INGEST_JOB_TIMEOUT_S"):
+        ingest_worker.run("slow")
+    pid = int(pid_file.read_text())
+    assert not _alive(pid)
+
+    # a fresh pool takes the next job
+    assert ingest_worker.run("pid")["pid"] != pid
+
+
+def test_timeout_terminates_the_worker_that_ran_the_job(isolated, monkeypatch, tmp_path):
+    pid_file = tmp_path / "pid"
+    monkeypatch.setenv("TEST_JOB_PID_FILE", str(pid_file))
+    monkeypatch.setattr(ingest_worker, "INGEST_JOB_TIMEOUT_S", 5)
+    reported = []
+    worker_pid = ingest_worker._worker_pid
+    monkeypatch.setattr(ingest_worker, "_worker_pid", lambda job_id: reported.append(worker_pid(job_id)) or reported[-1])
+
+    with pytest.raises(RuntimeError):
+        ingest_worker.run("slow")
+    # the PID the worker reported for the job, not one read from the executor's internals
+    assert reported[0] == int(pid_file.read_text())
+    assert ingest_worker._job_pids == {}
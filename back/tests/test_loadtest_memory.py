@@ -0,0 +1,31 @@
+# back/tests/test_loadtest_memory.py
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from back.loadtest import run
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+
+_WORKER = "import time; b = bytearray(48 << 20); time.sleep(30)"
+_SUPERVISOR = (
+    "import subprocess, sys, time\n"
+    f"kids = [subprocess.Popen([sys.executable, '-c', {_WORKER!r}]) for _ in range(2)]\n"
+    "time.sleep(30)"
+)
+
+
+def test_memory_includes_every_worker():
+    # a supervisor with two workers, like uvicorn --workers 2
+    parent = subprocess.Popen([sys.executable, "-c", _SUPERVISOR])
+    try:
+        run._wait_for_workers(parent.pid, 2, timeout=20)
+        assert len(run._tree(parent.pid)) == 3
+        assert run.rss_mb(parent.pid) > 2 * 40
+    finally:
+        for pid in reversed(run._tree(parent.pid)):
+            os.kill(pid, signal.SIGKILL)
+        parent.wait(5)
@@ -0,0 +1,126 @@
+# back/tests/test_outbox.py
+import os
+import time
+
+import pytest
+
+from back import outbox
+
+
+class _Backend:
+    """Upserts rows by link, like the news table; `down` fails every call, titles in `reject` are bad data."""
+
+    def __init__(self):
+        self.rows, self.calls, self.down, self.reject = {}, [], False, set()
+
+    def send(self, rows):
+        self.calls.append([r["title"] for r in rows])
+        if self.down:
+            raise RuntimeError("upsert 503")
+        if any(r["title"] in self.reject for r in rows):
+            raise outbox.PermanentError("upsert 400: bad row")
+        for r in rows:
+            self.rows[r["link"]] = r["title"]
+        return len(rows)
+
+
+_BACKEND = _Backend()
+
+
+def _send(rows):
+    return _BACKEND.send(rows)
+
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    global _BACKEND
+    _BACKEND = _Backend()
+    monkeypatch.setattr(outbox, "OUTBOX_ENABLED", True)
+    monkeypatch.setattr(outbox, "OUTBOX_DIR", str(tmp_path))
+    monkeypatch.setattr(outbox, "_FAILED_DIR", str(tmp_path / "failed"))
+    monkeypatch.setattr(outbox, "_GRACE_S", 0)
+    monkeypatch.setattr(outbox, "OUTBOX_DRAIN_ROWS", 500)
+    monkeypatch.setattr(outbox, "BREAKER", outbox.CircuitBreaker(2, 0.2))
+    monkeypatch.setattr(outbox, "_SENDERS", {"articles": f"{__name__}:_send"})
+    return _BACKEND
+
+
+def _row(link, title):
+    return {"link": f"https://a.example/{link}", "title": title}
+
+
+def _deliver(*rows):
+    return outbox.deliver("articles", list(rows), _send)
+
+
+def test_crash_between_send_and_ack_does_not_undo_a_newer_write(backend):
+    # sent, then the process died before ack(): the batch stays pending
+    outbox.enqueue("articles", [_row(1, "v1"), _row(2, "v1")])
+    backend.send([_row(1, "v1"), _row(2, "v1")])
+    time.sleep(0.01)
+    assert _deliver(_row(1, "v2")) == (1, None, False)
+
+    stats = outbox.drain()
+    assert (stats["batches"], stats["superseded"]) == (1, 1)
+    assert backend.calls[-1] == ["v1"]  # only the row nobody rewrote
+    assert backend.rows == {"https://a.example/1": "v2", "https://a.example/2": "v1"}
+    assert outbox.depth()["pending"] == 0
+    assert not os.path.exists(outbox._ledger_path("articles"))
+
+
+def test_unacked_batch_is_replayed_when_nothing_newer_was_written(backend):
+    outbox.enqueue("articles", [_row(1, "v1")])
+    assert outbox.drain()["batches"] == 1
+    assert backend.rows == {"https://a.example/1": "v1"}
+    assert outbox.depth()["pending"] == 0
+
+
+def test_breaker_opens_queues_and_closes_after_a_good_replay(backend):
+    backend.down = True
+    assert _deliver(_row(1, "v1"))[2] is True
+    assert _deliver(_row(1, "v2"))[2] is True
+    assert outbox.BREAKER.describe()["state"] == "open"
+    sent = len(backend.calls)
+    assert _deliver(_row(1, "v3"))[2] is True
+    assert len(backend.calls) == sent  # open: queued without a request
+
+    backend.down = False
+    assert outbox.drain()["batches"] == 0  # still cooling down
+    time.sleep(0.25)
+    stats = outbox.drain()
+    assert stats["batches"] == 3
+    assert outbox.BREAKER.describe()["state"] == "closed"
+    assert backend.rows == {"https://a.example/1": "v3"}
+
+
+def test_permanent_error_is_bisected_to_the_bad_batch(backend):
+    outbox.enqueue("articles", [_row(1, "ok1")])
+    bad = outbox.enqueue("articles", [_row(2, "bad")])
+    outbox.enqueue("articles", [_row(3, "ok3")])
+    backend.reject = {"bad"}
+
+    stats = outbox.drain()
+    assert (stats["batches"], stats["failed"]) == (2, 1)
+    assert backend.rows == {"https://a.example/1": "ok1", "https://a.example/3": "ok3"}
+    assert os.listdir(outbox._FAILED_DIR) == [bad]
+    assert outbox.depth()["pending"] == 0
+
+
+@pytest.mark.parametrize("drain_rows", [500, 1])
+def test_replays_apply_oldest_first(backend, monkeypatch, drain_rows):
+    monkeypatch.setattr(outbox, "OUTBOX_DRAIN_ROWS", drain_rows)
+    for title in ("v1", "v2", "v3"):
+        outbox.enqueue("articles", [_row(1, title)])
+    outbox.drain()
+    assert [t for call in backend.calls for t in call] == ["v1", "v2", "v3"]
+    assert backend.rows == {"https://a.example/1": "v3"}
+
+
+def test_queued_batch_does_not_overwrite_a_later_upload(backend):
+    backend.down = True
+    _deliver(_row(1, "old"), _row(2, "old"))
+    backend.down = False
+    time.sleep(0.25)  # let the breaker's cooldown pass
+    assert _deliver(_row(1, "new"))[1] is None
+    outbox.drain()
+    assert backend.rows == {"https://a.example/1": "new", "https://a.example/2": "old"}
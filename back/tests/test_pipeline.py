@@ -0,0 +1,103 @@
+# back/tests/test_pipeline.py
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from back import pipeline, supabase_writer
+from back.article import Article
+
+_NOW = datetime.now(timezone.utc)
+
+
+def _art(title, link, source="a.example"):
+    return Article(title=title, link=link, source=source, published=_NOW)
+
+
+@pytest.fixture
+def written(monkeypatch):
+    monkeypatch.setattr(pipeline, "URL_RESOLVE_ENABLED", False)
+    monkeypatch.setattr(pipeline, "NEAR_DUP_ENABLED", True)
+    monkeypatch.setattr(pipeline, "REFRESH_PIPELINE_CHUNK", 2)
+    monkeypatch.setattr(pipeline, "stored_near_dup_index", lambda days_limit: None)
+    chunks = []
+    done = threading.Event()
+
+    def write(items):
+        chunks.append([a.link for a in items])
+        done.set()
+        return len(items), [], None
+
+    monkeypatch.setattr(supabase_writer, "write_to_supabase", write)
+    return chunks, done
+
+
+def _feeds(monkeypatch, gen):
+    monkeypatch.setattr(pipeline, "iter_feed_batches", lambda days_limit, force: gen())
+
+
+def test_cross_chunk_copies_become_alternates(monkeypatch, written):
+    def gen():
+        yield [_art("Vietnam approves offshore wind auction rules", "https://a.example/1"),
+               _art("Malaysia grid battery tender opens", "https://a.example/2")]
+        yield [_art("Vietnam approves offshore wind auction rules", "https://b.example/9", "b.example"),
+               _art("Thailand hydrogen roadmap published", "https://b.example/3", "b.example")]
+
+    _feeds(monkeypatch, gen)
+    kept, stats = pipeline.run_news_pipeline(days_limit=7)
+    assert [a.link for a in kept] == ["https://a.example/1", "https://a.example/2", "https://b.example/3"]
+    assert kept[0].alternates == [{"Title": "Vietnam approves offshore wind auction rules",
+                                   "Link": "https://b.example/9", "Source": "b.example"}]
+    assert stats["near_dups"] == 1
+
+
+def test_stage_error_after_a_write_returns_what_was_written(monkeypatch, written):
+    chunks, done = written
+
+    def gen():
+        yield [_art("Vietnam approves offshore wind auction rules", "https://a.example/1"),
+               _art("Malaysia grid battery tender opens", "https://a.example/2")]
+        done.wait(5)
+        raise RuntimeError("feed exploded")
+
+    _feeds(monkeypatch, gen)
+    kept, stats = pipeline.run_news_pipeline(days_limit=7)
+    assert chunks == [["https://a.example/1", "https://a.example/2"]]
+    assert [a.link for a in kept] == chunks[0]
+    assert "feed exploded" in stats["error"]
+
+
+def test_stage_error_before_any_write_raises(monkeypatch, written):
+    def gen():
+        raise RuntimeError("feed exploded")
+        yield []
+
+    _feeds(monkeypatch, gen)
+    with pytest.raises(RuntimeError, match="feed exploded"):
+        pipeline.run_news_pipeline(days_limit=7)
+
+
+def test_written_winner_is_upserted_again_with_later_alternates(monkeypatch, written):
+    writes = []
+
+    def write(items):
+        writes.append([(a.link, [x["Link"] for x in a.alternates]) for a in items])
+        return len(items), [], None
+
+    monkeypatch.setattr(supabase_writer, "write_to_supabase", write)
+
+    def gen():
+        yield [_art("Vietnam approves offshore wind auction rules", "https://a.example/1"),
+               _art("Malaysia grid battery tender opens", "https://a.example/2")]
+        while not writes:  # the first chunk is in the backend before its copy shows up
+            time.sleep(0.01)
+        yield [_art("Vietnam approves offshore wind auction rules", "https://b.example/9", "b.example"),
+               _art("Thailand hydrogen roadmap published", "https://b.example/3", "b.example")]
+
+    _feeds(monkeypatch, gen)
+    kept, stats = pipeline.run_news_pipeline(days_limit=7)
+    assert writes[0] == [("https://a.example/1", []), ("https://a.example/2", [])]
+    assert writes[-1] == [("https://a.example/1", ["https://b.example/9"])]
+    assert (stats["written"], stats["revised"]) == (3, 1)
+    assert [a.link for a in kept] == ["https://a.example/1", "https://a.example/2", "https://b.example/3"]
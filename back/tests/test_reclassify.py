@@ -0,0 +1,65 @@
+# back/tests/test_reclassify.py
+import pytest
+
+from back import main, reclassify
+
+
+@pytest.fixture
+def news(postgrest, monkeypatch, tmp_path):
+    monkeypatch.setattr(reclassify, "REST", f"{postgrest.url}/rest/v1")
+    monkeypatch.setattr(reclassify, "RECLASSIFY_STATE_PATH", str(tmp_path / "reclassify.json"))
+    rows = []
+    for i in range(5):
+        row = {"title": f"Cat video {i}", "link": f"https://a.example/{i}", "source": "a.example",
+               "topic": [], "keywords": "Energy", "region": "Global"}
+        rows.append(row)
+    # rows 1 and 3 carry tags from older rules
+    rows[1].update(title="Vietnam approves offshore wind auction", region="Global")
+    rows[3].update(title="Vietnam approves offshore wind auction rules", region="Global")
+    postgrest.store.upsert("news", rows, "link")
+    return postgrest
+
+
+def _regions(pg):
+    return {r["link"]: r["region"] for r in pg.store.query("news", [])}
+
+
+def test_keyset_pages_cover_every_row_once(news):
+    stats = reclassify.reclassify(batch_size=2)
+    assert (stats["status"], stats["pages"], stats["scanned"]) == ("done", 3, 5)
+    assert stats["changed"] == stats["run_changed"] == 2
+    regions = _regions(news)
+    assert regions["https://a.example/1"] == regions["https://a.example/3"] == "Vietnam"
+    assert regions["https://a.example/0"] == "Global"
+
+
+def test_resume_from_the_checkpoint(news):
+    first = reclassify.reclassify(batch_size=2, max_pages=1)
+    assert (first["status"], first["scanned"], first["run_changed"]) == ("partial", 2, 1)
+
+    second = reclassify.reclassify(batch_size=2)
+    assert (second["status"], second["scanned"], second["pages"]) == ("done", 5, 2)
+    assert (second["changed"], second["run_changed"]) == (2, 1)
+
+    assert reclassify.reclassify(batch_size=2)["status"] == "up-to-date"
+    assert reclassify.reclassify(batch_size=2, restart=True)["run_changed"] == 0
+
+
+def test_dry_run_writes_nothing(news, tmp_path):
+    stats = reclassify.reclassify(batch_size=2, dry_run=True)
+    assert (stats["status"], stats["run_changed"]) == ("done", 2)
+    assert set(_regions(news).values()) == {"Global"}
+    assert not (tmp_path / "reclassify.json").exists()
+
+
+def test_caches_are_rebuilt_only_when_this_run_changed_rows(monkeypatch):
+    published = []
+    monkeypatch.setattr(main, "_publish_snapshot", lambda name, build: published.append(name))
+    monkeypatch.setattr(main, "_rebuild_index", lambda version=None: None)
+    # a resumed run: earlier runs changed rows, this one didn't
+    monkeypatch.setattr(reclassify, "reclassify", lambda **kw: {"pages": 3, "changed": 7, "run_changed": 0})
+    main._reclassify(restart=False, dry_run=False, max_pages=None)
+    assert published == []
+    monkeypatch.setattr(reclassify, "reclassify", lambda **kw: {"pages": 1, "changed": 7, "run_changed": 2})
+    main._reclassify(restart=False, dry_run=False, max_pages=None)
+    assert published == ["articles"]
@@ -0,0 +1,57 @@
+# back/tests/test_search_index.py
+import threading
+import time
+
+from back import search_index
+from back.article import Article
+from back.search_index import SearchIndex
+
+
+def _art(i, title):
+    return Article(title=title, link=f"https://example.com/{i}", summary="", source="example.com")
+
+
+def _fresh_global(monkeypatch):
+    monkeypatch.setattr(search_index, "INDEX", SearchIndex())
+
+
+def test_concurrent_first_searches_build_once(monkeypatch):
+    _fresh_global(monkeypatch)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return [_art(1, "Hydrogen plant opens")]
+
+    threads = [threading.Thread(target=search_index.ensure_loaded, args=(loader,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert [a.link for a in search_index.INDEX.search("hydrogen")] == ["https://example.com/1"]
+
+
+def test_new_snapshot_version_rebuilds(monkeypatch):
+    _fresh_global(monkeypatch)
+    rows = [[_art(1, "Solar tender")], [_art(1, "Solar tender"), _art(2, "Solar farm approved")]]
+    loader = lambda: rows.pop(0)
+    search_index.ensure_loaded(loader, version=1)
+    assert len(search_index.ensure_loaded(loader, version=1)) == 1
+    assert len(search_index.ensure_loaded(loader, version=2)) == 2
+    assert search_index.INDEX.version == 2
+
+
+def test_replace_all_swaps_without_an_empty_window():
+    index = SearchIndex()
+    index.replace_all([_art(1, "Wind auction")])
+    seen = []
+
+    def rows():
+        seen.append(len(index.search("wind")))  # old contents still served mid-build
+        yield _art(2, "Wind turbines ordered")
+
+    index.replace_all(rows())
+    assert seen == [1]
+    assert [a.link for a in index.search("wind")] == ["https://example.com/2"]
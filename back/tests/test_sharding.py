@@ -0,0 +1,52 @@
+# back/tests/test_sharding.py
+import os
+import subprocess
+import sys
+from datetime import date, datetime, timezone
+
+from back import fetch_news, supabase_reader
+from back.article import Article
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _import_config(**env):
+    return subprocess.run(
+        [sys.executable, "-c", "import back.config"],
+        cwd=_ROOT, env={**os.environ, **env}, capture_output=True, text=True,
+    )
+
+
+def test_shard_index_out_of_range_fails_at_startup():
+    bad = _import_config(SHARD_COUNT="2", SHARD_INDEX="2")
+    assert bad.returncode != 0 and "SHARD_INDEX=2" in bad.stderr
+    assert _import_config(SHARD_COUNT="2", SHARD_INDEX="1").returncode == 0
+
+
+def test_other_shards_stored_stories_are_dropped(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_reader, "REST", f"{postgrest.url}/rest/v1")
+    monkeypatch.setattr(fetch_news, "SHARD_COUNT", 2)
+    today = date.today().isoformat()
+    postgrest.store.upsert("news", [
+        {"title": "Vietnam approves offshore wind auction rules for 2026", "link": "https://a.example/1",
+         "source": "a.example", "published": today},
+        {"title": "Old story about grid batteries in Thailand tender", "link": "https://a.example/old",
+         "source": "a.example", "published": "2000-01-01"},
+    ], "link")
+    index = fetch_news.stored_near_dup_index(days_limit=7)
+    now = datetime.now(timezone.utc)
+
+    def art(title, link):
+        return Article(title=title, link=link, source="b.example", published=now)
+
+    assert index.match(art("Vietnam approves offshore wind auction rules for 2026", "https://b.example/x")).link \
+        == "https://a.example/1"
+    # the stored row itself (an update from its own shard) is kept
+    assert index.match(art("Vietnam approves offshore wind auction rules for 2026", "https://a.example/1")) is None
+    # only recent rows are indexed
+    assert index.match(art("Old story about grid batteries in Thailand tender", "https://b.example/y")) is None
+
+
+def test_single_shard_skips_the_lookup(monkeypatch):
+    monkeypatch.setattr(fetch_news, "SHARD_COUNT", 1)
+    assert fetch_news.stored_near_dup_index(days_limit=7) is None
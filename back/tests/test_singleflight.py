@@ -0,0 +1,148 @@
+# back/tests/test_singleflight.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from back import singleflight
+from back.singleflight import run_single_flight
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def lock_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(singleflight, "REFRESH_LOCK_DIR", str(tmp_path))
+    return tmp_path
+
+
+class _Blocking:
+    """fn() that signals `started` and returns {"n": call number} once released."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.started, self.release = threading.Event(), threading.Event()
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {"n": self.calls}
+
+
+def _in_thread(fn):
+    out = {}
+
+    def target():
+        try:
+            out["result"] = fn()
+        except Exception as e:
+            out["error"] = e
+    t = threading.Thread(target=target)
+    t.start()
+    return t, out
+
+
+def test_concurrent_call_joins_the_run_in_flight(lock_dir):
+    fn = _Blocking()
+    t1, leader = _in_thread(lambda: run_single_flight("k", fn))
+    assert fn.started.wait(5)
+    t2, joiner = _in_thread(lambda: run_single_flight("k", fn))
+    time.sleep(0.1)
+    fn.release.set()
+    t1.join()
+    t2.join()
+    assert fn.calls == 1
+    assert leader["result"] == {"n": 1}
+    assert joiner["result"] == {"n": 1, "coalesced": "joined"}
+
+
+def test_joiners_get_the_leaders_exception(lock_dir):
+    fn = _Blocking(error=RuntimeError("feeds down"))
+    t1, leader = _in_thread(lambda: run_single_flight("k", fn))
+    assert fn.started.wait(5)
+    t2, joiner = _in_thread(lambda: run_single_flight("k", fn))
+    time.sleep(0.1)
+    fn.release.set()
+    t1.join()
+    t2.join()
+    assert fn.calls == 1
+    assert str(leader["error"]) == str(joiner["error"]) == "feeds down"
+
+
+def test_recent_result_is_reused_unless_forced(lock_dir):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return {"n": len(calls)}
+    assert run_single_flight("k", fn, min_interval=60) == {"n": 1}
+    assert run_single_flight("k", fn, min_interval=60) == {"n": 1, "coalesced": "recent"}
+    assert run_single_flight("k", fn, min_interval=60, force=True) == {"n": 2}
+    assert len(calls) == 2
+
+
+def test_forced_call_runs_after_a_normal_run_in_flight(lock_dir):
+    fn = _Blocking()
+    t1, normal = _in_thread(lambda: run_single_flight("k", fn))
+    assert fn.started.wait(5)
+    t2, forced = _in_thread(lambda: run_single_flight("k", fn, force=True))
+    time.sleep(0.1)
+    fn.release.set()
+    t1.join()
+    t2.join()
+    assert fn.calls == 2
+    assert (normal["result"], forced["result"]) == ({"n": 1}, {"n": 2})
+
+
+def test_normal_call_joins_a_forced_run(lock_dir):
+    fn = _Blocking()
+    t1, forced = _in_thread(lambda: run_single_flight("k", fn, force=True))
+    assert fn.started.wait(5)
+    t2, normal = _in_thread(lambda: run_single_flight("k", fn))
+    time.sleep(0.1)
+    fn.release.set()
+    t1.join()
+    t2.join()
+    assert fn.calls == 1
+    assert normal["result"] == {"n": 1, "coalesced": "joined"}
+
+
+_CHILD = """
+import sys, time
+from back.singleflight import run_single_flight
+def fn():
+    open(sys.argv[1], "w").close()
+    time.sleep(1.0)
+    return {"by": "child"}
+run_single_flight("k", fn)
+"""
+
+
+def _run_child(lock_dir):
+    started = lock_dir / "started"
+    env = {**os.environ, "REFRESH_LOCK_DIR": str(lock_dir)}
+    child = subprocess.Popen([sys.executable, "-c", _CHILD, str(started)], cwd=_ROOT, env=env)
+    deadline = time.time() + 20
+    while not started.exists():
+        assert time.time() < deadline and child.poll() is None
+        time.sleep(0.02)
+    return child
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_file_lock_coordinates_processes(lock_dir, force):
+    child = _run_child(lock_dir)
+    try:
+        out = run_single_flight("k", lambda: {"by": "parent"}, force=force)
+        assert child.wait(20) == 0
+    finally:
+        child.kill()
+    # a normal call takes the other worker's result; a forced one runs after it
+    assert out == ({"by": "parent"} if force else {"by": "child", "coalesced": "joined"})
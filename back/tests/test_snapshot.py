@@ -0,0 +1,106 @@
+# back/tests/test_snapshot.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from back import snapshot
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def dirs(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snap"))
+    monkeypatch.setattr(snapshot, "REFRESH_LOCK_DIR", str(tmp_path / "locks"))
+    return tmp_path
+
+
+def _counting(body=b"[]", delay=0.0):
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(delay)
+        return body
+    return build, calls
+
+
+def _no_build():
+    raise AssertionError("should not rebuild")
+
+
+def test_reuse_then_rebuild_after_expiry(dirs):
+    build, calls = _counting()
+    first = snapshot.read_or_build("t", build, max_age=0.2)
+    assert snapshot.read_or_build("t", build, max_age=0.2).version == first.version
+    assert len(calls) == 1
+    time.sleep(0.3)
+    assert snapshot.read_or_build("t", build, max_age=0.2).version != first.version
+    assert len(calls) == 2
+
+
+def test_two_readers_without_a_snapshot_build_once(dirs):
+    build, calls = _counting(b'["x"]', delay=0.2)
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(snapshot.read_or_build("t", build, max_age=60)))
+               for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert [bytes(s.body) for s in out] == [b'["x"]', b'["x"]']
+
+
+def test_stale_snapshot_is_served_while_a_thread_rebuilds(dirs):
+    old = snapshot.publish("t", b'["old"]')
+    time.sleep(0.3)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build():
+        started.set()
+        release.wait(5)
+        return b'["new"]'
+
+    leader = []
+    t = threading.Thread(target=lambda: leader.append(snapshot.read_or_build("t", slow_build, max_age=0.2)))
+    t.start()
+    assert started.wait(5)
+    assert snapshot.read_or_build("t", _no_build, max_age=0.2).version == old
+    release.set()
+    t.join()
+    assert bytes(leader[0].body) == b'["new"]'
+    assert snapshot.read_or_build("t", _no_build, max_age=0.2).version == leader[0].version
+
+
+_CHILD = """
+import sys, time
+from back import snapshot
+def build():
+    open(sys.argv[1], "w").close()
+    time.sleep(1.5)
+    return b'["child"]'
+snapshot.read_or_build("t", build, max_age=0.2)
+"""
+
+
+def test_stale_snapshot_is_served_while_another_process_rebuilds(dirs):
+    old = snapshot.publish("t", b'["old"]')
+    time.sleep(0.3)
+    started = dirs / "started"
+    env = {**os.environ, "SNAPSHOT_DIR": snapshot.SNAPSHOT_DIR, "REFRESH_LOCK_DIR": snapshot.REFRESH_LOCK_DIR}
+    child = subprocess.Popen([sys.executable, "-c", _CHILD, str(started)], cwd=_ROOT, env=env)
+    try:
+        deadline = time.time() + 20
+        while not started.exists():
+            assert time.time() < deadline and child.poll() is None
+            time.sleep(0.02)
+        assert snapshot.read_or_build("t", _no_build, max_age=0.2).version == old
+        assert child.wait(20) == 0
+    finally:
+        child.kill()
+    assert bytes(snapshot.read_or_build("t", _no_build, max_age=5).body) == b'["child"]'
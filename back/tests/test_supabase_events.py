@@ -0,0 +1,66 @@
+# back/tests/test_supabase_events.py
+from datetime import date, timedelta
+
+import pytest
+
+from back import supabase_events
+
+
+@pytest.fixture
+def events(postgrest, monkeypatch):
+    monkeypatch.setattr(supabase_events, "SUPABASE_URL", postgrest.url)
+    monkeypatch.setattr(supabase_events, "SUPABASE_SERVICE_ROLE_KEY", "test")
+    monkeypatch.setattr(supabase_events, "_CLIENT", None)
+    monkeypatch.setattr(supabase_events, "SNAPSHOT_ENABLED", False)
+    supabase_events.invalidate_events_cache()
+    day = (date.today() + timedelta(days=10)).isoformat()
+    postgrest.store.upsert("events", [
+        {"title": f"Energy Summit {i}", "region": region, "city": region, "starts_on": day}
+        for i, region in enumerate(["Singapore", "Singapore", "Malaysia", "100% Green"])
+    ], "dedupe_key")
+    return postgrest
+
+
+def test_region_filter_is_literal(events):
+    assert len(supabase_events.fetch_upcoming_events(region="singapore")) == 2
+    assert supabase_events.fetch_upcoming_events(region="Sing_pore") == []
+    assert supabase_events.fetch_upcoming_events(region="%") == []
+    assert [e["region"] for e in supabase_events.fetch_upcoming_events(region="100% green")] == ["100% Green"]
+
+
+def test_pages_do_not_overlap(events):
+    pages = [supabase_events.fetch_upcoming_events(limit=2, offset=o) for o in (0, 2)]
+    titles = [e["title"] for page in pages for e in page]
+    assert sorted(titles) == [f"Energy Summit {i}" for i in range(4)]
+
+
+def test_query_racing_an_invalidation_is_not_cached(events, monkeypatch):
+    real = supabase_events._client
+
+    def client_then_invalidate():
+        supabase_events.invalidate_events_cache()  # an ingest finishes while we query
+        return real()
+
+    monkeypatch.setattr(supabase_events, "_client", client_then_invalidate)
+    supabase_events.fetch_upcoming_events(region="Malaysia")
+    assert supabase_events._cache == {}
+
+
+def test_cache_expires(events, monkeypatch):
+    assert len(supabase_events.fetch_upcoming_events(city="Malaysia")) == 1
+    events.store.upsert("events", [{"title": "Grid Forum", "region": "Malaysia", "city": "Malaysia",
+                                    "starts_on": date.today().isoformat()}], "dedupe_key")
+    assert len(supabase_events.fetch_upcoming_events(city="Malaysia")) == 1  # cached
+    monkeypatch.setattr(supabase_events, "EVENTS_CACHE_TTL_S", 0)
+    assert len(supabase_events.fetch_upcoming_events(city="Malaysia")) == 2
+
+
+def test_new_events_snapshot_clears_the_cache(events, monkeypatch):
+    version = [1]
+    monkeypatch.setattr(supabase_events, "_snapshot_version", lambda: version[0])
+    assert len(supabase_events.fetch_upcoming_events(region="Malaysia")) == 1
+    events.store.upsert("events", [{"title": "Grid Forum", "region": "Malaysia", "city": "KL",
+                                    "starts_on": date.today().isoformat()}], "dedupe_key")
+    assert len(supabase_events.fetch_upcoming_events(region="Malaysia")) == 1
+    version[0] = 2  # another worker refreshed and published
+    assert len(supabase_events.fetch_upcoming_events(region="Malaysia")) == 2
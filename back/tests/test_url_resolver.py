@@ -0,0 +1,62 @@
+# back/tests/test_url_resolver.py
+import json
+
+import pytest
+
+from back import url_resolver
+
+
+@pytest.fixture
+def google(local_server, monkeypatch, tmp_path):
+    """The stand-in plays news.google.com; the cache goes to a temp file."""
+    monkeypatch.setattr(url_resolver, "is_google_news", lambda u: (u or "").startswith(local_server.url + "/rss/"))
+    monkeypatch.setattr(url_resolver, "URL_CACHE_PATH", str(tmp_path / "resolved.json"))
+    monkeypatch.setattr(url_resolver, "_cache", None)
+    return local_server
+
+
+def test_follows_redirect_and_caches(google):
+    google.routes["/rss/articles/r1"] = (302, {"Location": google.url + "/news/story-1"}, b"")
+    google.routes["/news/story-1"] = (200, {}, b"<html>story</html>")
+    link = google.url + "/rss/articles/r1"
+
+    assert url_resolver.resolve_links([link]) == {link: google.url + "/news/story-1"}
+    assert url_resolver.resolve_links([link]) == {link: google.url + "/news/story-1"}
+    assert google.hits.count("/rss/articles/r1") == 1
+    with open(url_resolver.URL_CACHE_PATH) as f:
+        assert json.load(f) == {link: google.url + "/news/story-1"}
+
+
+def test_reads_data_n_au_when_there_is_no_redirect(google):
+    google.routes["/rss/articles/d1"] = (200, {}, b'<c-wiz data-n-au="https://publisher.example/a"></c-wiz>')
+    link = google.url + "/rss/articles/d1"
+    assert url_resolver.resolve_links([link]) == {link: "https://publisher.example/a"}
+
+
+def test_miss_is_retried_after_ttl(google, monkeypatch):
+    google.routes["/rss/articles/m1"] = (200, {}, b"<html>consent page</html>")
+    link = google.url + "/rss/articles/m1"
+
+    assert url_resolver.resolve_links([link]) == {link: link}
+    assert url_resolver.resolve_links([link]) == {link: link}
+    assert google.hits.count("/rss/articles/m1") == 1  # recent miss: not asked again
+
+    monkeypatch.setattr(url_resolver, "URL_MISS_TTL_S", 0)
+    google.routes["/rss/articles/m1"] = (302, {"Location": google.url + "/news/story-2"}, b"")
+    google.routes["/news/story-2"] = (200, {}, b"<html>story</html>")
+    assert url_resolver.resolve_links([link]) == {link: google.url + "/news/story-2"}
+    assert google.hits.count("/rss/articles/m1") == 2
+
+
+def test_server_error_is_not_cached(google):
+    google.routes["/rss/articles/e1"] = (500, {}, b"oops")
+    link = google.url + "/rss/articles/e1"
+    assert url_resolver.resolve_links([link]) == {}
+    assert url_resolver.resolve_links([link]) == {}
+    assert google.hits.count("/rss/articles/e1") == 2
+
+
+def test_non_google_links_map_to_themselves(google):
+    assert url_resolver.resolve_links(["https://publisher.example/c"]) == {
+        "https://publisher.example/c": "https://publisher.example/c"}
+    assert google.hits == []
@@ -0,0 +1,159 @@
+# back/url_resolver.py
+"""
+Resolve Google News redirect links to the publisher's URL.
+
+Items from news.google.com feeds carry links like
+https://news.google.com/rss/articles/CBMi... which redirect to the real
+article. We follow them concurrently through http_scheduler (which keeps
+news.google.com, and every publisher it redirects to, within its per-host
+budget) and remember every answer in a JSON cache on disk, so each link is
+resolved once no matter how many refreshes see it again. A link Google
+didn't send anywhere is stored with the time of the miss and looked up
+again after URL_MISS_TTL_S.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from . import http_scheduler
+from .config import (
+    URL_CACHE_PATH, URL_CACHE_MAX, URL_MISS_TTL_S,
+    URL_RESOLVE_WORKERS, URL_RESOLVE_TIMEOUT,
+)
+
+__all__ = ["resolve_links", "is_google_news"]
+
+UA = {"User-Agent": "Mozilla/5.0 (ENGIE-NewsBot/1.0)"}
+
+# Google News article pages that don't HTTP-redirect embed the target here
+_DATA_N_AU_RE = re.compile(rb'data-n-au="([^"]+)"')
+
+_lock = threading.Lock()
+_cache: Optional[Dict[str, object]] = None  # link -> publisher URL, or epoch seconds of a miss
+
+
+def is_google_news(u: str) -> bool:
+    try:
+        return urlparse(u or "").netloc.endswith("news.google.com")
+    except Exception:
+        return False
+
+
+# ---------------------------------------------------------------------
+# Persistent cache
+# ---------------------------------------------------------------------
+def _load_cache() -> Dict[str, object]:
+    global _cache
+    if _cache is None:
+        try:
+            with open(URL_CACHE_PATH, "r", encoding="utf-8") as f:
+                _cache = json.load(f)
+        except Exception:
+            _cache = {}
+    return _cache
+
+
+def _save_cache() -> None:
+    cache = _load_cache()
+    # keep the newest entries only (dicts preserve insertion order)
+    if URL_CACHE_MAX and len(cache) > URL_CACHE_MAX:
+        for k in list(cache)[: len(cache) - URL_CACHE_MAX]:
+            del cache[k]
+    try:
+        os.makedirs(os.path.dirname(URL_CACHE_PATH) or ".", exist_ok=True)
+        tmp = f"{URL_CACHE_PATH}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, URL_CACHE_PATH)
+    except Exception as e:
+        print(f"[RESOLVE] Cache save failed: {e}")
+
+
+def _cached(cache: Dict[str, object], url: str, now: float) -> Optional[str]:
+    """Publisher URL, `url` itself for a recent miss, or None when it needs a lookup."""
+    v = cache.get(url)
+    if isinstance(v, str) and v != url:
+        return v
+    if isinstance(v, (int, float)) and now - v < URL_MISS_TTL_S:
+        return url
+    return None  # unknown, expired miss, or a miss stored without a time by older versions
+
+
+# ---------------------------------------------------------------------
+# Resolution
+# ---------------------------------------------------------------------
+def _resolve_one(url: str) -> Optional[str]:
+    """
+    Returns the publisher URL, or None when Google doesn't send us anywhere
+    else. Raises on network errors and 5xx answers so transient failures are
+    retried on the next refresh.
+    """
+    r = http_scheduler.get(url, headers=UA, allow_redirects=True, timeout=URL_RESOLVE_TIMEOUT, stream=True)
+    try:
+        if r.status_code >= 500:
+            r.raise_for_status()
+        if not is_google_news(r.url):
+            return r.url
+        # no HTTP redirect: look for the target in the first part of the page
+        head = b""
+        for chunk in r.iter_content(chunk_size=16384):
+            head += chunk
+            m = _DATA_N_AU_RE.search(head)
+            if m:
+                return m.group(1).decode("utf-8", "replace")
+            if len(head) >= 131072:
+                break
+        return None
+    finally:
+        r.close()
+
+
+def resolve_links(urls: Iterable[str]) -> Dict[str, str]:
+    """
+    Map each Google News link to its final publisher URL. Non-Google links,
+    and links Google doesn't redirect, map to themselves. Failed lookups are
+    left out of the result.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    now = time.time()
+    with _lock:
+        cache = _load_cache()
+        out = {u: (u if not is_google_news(u) else _cached(cache, u, now)) for u in urls}
+    todo = [u for u, v in out.items() if v is None]
+    if not todo:
+        return out
+
+    def work(u: str):
+        try:
+            return u, True, _resolve_one(u)
+        except Exception as e:
+            print(f"[RESOLVE] {u[:80]}: {e}")
+            return u, False, None
+
+    resolved = 0
+    answers: Dict[str, object] = {}
+    with ThreadPoolExecutor(max_workers=max(1, URL_RESOLVE_WORKERS)) as pool:
+        for u, ok, final in pool.map(work, todo):
+            if not ok:
+                continue
+            out[u] = final or u
+            answers[u] = final or time.time()
+            if final:
+                resolved += 1
+
+    with _lock:
+        cache = _load_cache()
+        for u, v in answers.items():
+            cache.pop(u, None)  # re-insert as newest
+            cache[u] = v
+        _save_cache()
+
+    print(f"[RESOLVE] {len(urls) - len(todo)} already known, {resolved}/{len(todo)} resolved")
+    return {u: v for u, v in out.items() if v is not None}